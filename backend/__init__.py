@@ -6,11 +6,16 @@ from backend.auth import AuthMixin
 from backend.employees import EmployeeMixin
 from backend.patients import PatientMixin
 from backend.appointments import AppointmentMixin
+from backend.availability import AvailabilityMixin
 from backend.clinical import ClinicalMixin
+from backend.payroll import PayrollMixin
 from backend.dashboard import DashboardMixin
 from backend.analytics import AnalyticsMixin
 from backend.settings import SettingsMixin
 from backend.search import SearchMixin
+from backend.scheduler import SchedulerMixin
+from backend.notifications import NotificationMixin
+from backend.documents import DocumentMixin
 
 
 class AuthBackend(
@@ -19,11 +24,16 @@ class AuthBackend(
     EmployeeMixin,
     PatientMixin,
     AppointmentMixin,
+    AvailabilityMixin,
     ClinicalMixin,
+    PayrollMixin,
     DashboardMixin,
     AnalyticsMixin,
     SettingsMixin,
     SearchMixin,
+    SchedulerMixin,
+    NotificationMixin,
+    DocumentMixin,
 ):
     # All DB methods in one class - just pass this to every page
     pass
@@ -1,31 +1,141 @@
 # Appointment CRUD + scheduling logic
 
+import time
+from datetime import date as _date, timedelta as _timedelta
+
+from backend.db_config import QUERY_CACHE_TTL
+
+# Row shape shared by get_appointments() and get_appointments_window()
+_APPT_SELECT = """
+    SELECT a.appointment_id, a.appointment_date, a.appointment_time,
+           CONCAT(p.first_name,' ',p.last_name) AS patient_name,
+           CONCAT(e.first_name,' ',e.last_name) AS doctor_name,
+           s.service_name, a.status, a.notes,
+           a.cancellation_reason, a.reschedule_reason,
+           CASE
+               WHEN i.invoice_id IS NULL THEN 'No Invoice'
+               ELSE i.status
+           END AS billing_status
+    FROM appointments a
+    INNER JOIN patients p ON a.patient_id = p.patient_id
+    INNER JOIN employees e ON a.doctor_id = e.employee_id
+    INNER JOIN services s ON a.service_id = s.service_id
+    LEFT JOIN invoices i ON a.appointment_id = i.appointment_id
+"""
+
+
+def tab_window(tab, today=None):
+    """(date_from, date_to, newest_first) for an appointments tab name.
+
+    None in either bound means open-ended.
+    """
+    today = today or _date.today()
+    tab = (tab or "all").lower()
+    if tab == "today":
+        return today, today, False
+    if tab == "tomorrow":
+        tmr = today + _timedelta(days=1)
+        return tmr, tmr, False
+    if tab in ("week", "this week"):
+        start = today - _timedelta(days=today.weekday())
+        return start, start + _timedelta(days=6), False
+    if tab in ("month", "this month"):
+        start = today.replace(day=1)
+        nxt = (start + _timedelta(days=32)).replace(day=1)
+        return start, nxt - _timedelta(days=1), False
+    if tab == "upcoming":
+        return today, None, False
+    if tab == "past":
+        return None, today - _timedelta(days=1), True
+    return None, None, True
+
+
+def booking_window_end(today=None):
+    """Last bookable date: the last day of next month."""
+    today = today or _date.today()
+    first_next = (today.replace(day=1) + _timedelta(days=32)).replace(day=1)
+    return (first_next + _timedelta(days=32)).replace(day=1) - _timedelta(days=1)
+
 
 class AppointmentMixin:
 
+    APPOINTMENT_PAGE_SIZE = 100
+    # new status -> statuses an appointment may move from
+    STATUS_TRANSITIONS = {
+        "Confirmed": ("Pending",),
+        "Cancelled": ("Pending", "Confirmed"),
+        "No-Show":   ("Pending", "Confirmed"),
+        "Completed": ("Pending", "Confirmed"),
+    }
+
     def get_appointments(self, doctor_email=None):
         """Return appointments. Optionally filter by doctor_email."""
         where = "WHERE e.email = %s" if doctor_email else ""
         params = (doctor_email,) if doctor_email else ()
-        return self.fetch(f"""
-            SELECT a.appointment_id, a.appointment_date, a.appointment_time,
-                   CONCAT(p.first_name,' ',p.last_name) AS patient_name,
-                   CONCAT(e.first_name,' ',e.last_name) AS doctor_name,
-                   s.service_name, a.status, a.notes,
-                   a.cancellation_reason, a.reschedule_reason,
-                   CASE
-                       WHEN i.invoice_id IS NULL THEN 'No Invoice'
-                       ELSE i.status
-                   END AS billing_status
-            FROM appointments a
-            INNER JOIN patients p ON a.patient_id = p.patient_id
-            INNER JOIN employees e ON a.doctor_id = e.employee_id
-            INNER JOIN services s ON a.service_id = s.service_id
-            LEFT JOIN invoices i ON a.appointment_id = i.appointment_id
+        return self.fetch(f"""{_APPT_SELECT}
             {where}
             ORDER BY a.appointment_date DESC, a.appointment_time DESC
         """, params)
 
+    def get_appointments_window(self, tab=None, date_from=None, date_to=None, status=None,
+                                doctor_id=None, doctor_email=None, search=None,
+                                cursor=None, limit=None, newest_first=None):
+        """One page of appointments inside a date window.
+
+        The window comes from *tab* ('today', 'tomorrow', 'week', 'month',
+        'upcoming', 'past', 'all') unless date_from / date_to are given.
+        *cursor* is the 'next_cursor' of the previous page (keyset on
+        date, time, id), so paging deep into history stays cheap.
+
+        Returns {'rows': [...], 'next_cursor': tuple or None}.
+        """
+        t_from, t_to, t_desc = tab_window(tab)
+        date_from = date_from if date_from is not None else t_from
+        date_to = date_to if date_to is not None else t_to
+        desc = t_desc if newest_first is None else newest_first
+        limit = limit or self.APPOINTMENT_PAGE_SIZE
+
+        where, params = [], []
+        if date_from is not None:
+            where.append("a.appointment_date >= %s")
+            params.append(date_from)
+        if date_to is not None:
+            where.append("a.appointment_date <= %s")
+            params.append(date_to)
+        if status:
+            where.append("a.status = %s")
+            params.append(status)
+        if doctor_id:
+            where.append("a.doctor_id = %s")
+            params.append(doctor_id)
+        if doctor_email:
+            where.append("e.email = %s")
+            params.append(doctor_email)
+        if search:
+            like = f"%{search.strip()}%"
+            where.append("(CONCAT(p.first_name,' ',p.last_name) LIKE %s"
+                         " OR CONCAT(e.first_name,' ',e.last_name) LIKE %s"
+                         " OR s.service_name LIKE %s OR a.notes LIKE %s)")
+            params += [like] * 4
+        if cursor:
+            op = "<" if desc else ">"
+            where.append(f"(a.appointment_date, a.appointment_time, a.appointment_id) {op} (%s, %s, %s)")
+            params += list(cursor)
+
+        order = "DESC" if desc else "ASC"
+        rows = self.fetch(f"""{_APPT_SELECT}
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY a.appointment_date {order}, a.appointment_time {order}, a.appointment_id {order}
+            LIMIT %s
+        """, (*params, limit + 1))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = (str(last["appointment_date"]), str(last["appointment_time"]),
+                           last["appointment_id"])
+        return {"rows": rows, "next_cursor": next_cursor}
+
     def get_appointments_for_doctor(self, doctor_email):
         """Convenience alias."""
         return self.get_appointments(doctor_email=doctor_email)
@@ -36,99 +146,79 @@ class AppointmentMixin:
                    e.department_id
             FROM employees e INNER JOIN roles r ON e.role_id = r.role_id
             WHERE r.role_name='Doctor' AND e.status='Active' ORDER BY e.first_name
-        """)
+        """, cached=True)
 
     def get_doctors_available_today(self):
         """Return all active doctors, with schedule info for those available today."""
-        return self.fetch("""
-            SELECT DISTINCT e.employee_id, CONCAT(e.first_name,' ',e.last_name) AS doctor_name,
-                   e.department_id,
-                   TIME_FORMAT(ds.start_time, '%h:%i %p') AS sched_start,
-                   TIME_FORMAT(ds.end_time, '%h:%i %p') AS sched_end
-            FROM employees e
-            INNER JOIN roles r ON e.role_id = r.role_id
-            LEFT JOIN doctor_schedules ds ON e.employee_id = ds.doctor_id
-              AND ds.day_of_week = DAYNAME(CURDATE())
-            WHERE r.role_name = 'Doctor'
-              AND e.status = 'Active'
-            ORDER BY ds.start_time IS NULL, e.first_name
-        """)
+        return self.get_availability_snapshot().available_today()
 
     def get_doctor_availability_overview(self):
         """Return all active doctors with today's availability status and appointment count.
 
         Sorted so available-today doctors appear first, then by name.
         """
-        return self.fetch("""
-            SELECT e.employee_id,
-                   CONCAT(e.first_name,' ',e.last_name) AS doctor_name,
-                   COALESCE(d.department_name, '\u2014') AS department,
-                   ds.day_of_week,
-                   TIME_FORMAT(ds.start_time, '%h:%i %p') AS sched_start,
-                   TIME_FORMAT(ds.end_time, '%h:%i %p')   AS sched_end,
-                   CASE 
-                       WHEN lr.request_id IS NOT NULL THEN 'On Leave'
-                       WHEN ds.schedule_id IS NOT NULL THEN 'Available'
-                       ELSE 'Not Available'
-                   END AS availability,
-                   COALESCE(ac.appt_count, 0) AS appt_count
-            FROM employees e
-            INNER JOIN roles r ON e.role_id = r.role_id
-            LEFT  JOIN departments d ON e.department_id = d.department_id
-            LEFT  JOIN doctor_schedules ds
-                       ON e.employee_id = ds.doctor_id
-                      AND ds.day_of_week = DAYNAME(CURDATE())
-            LEFT  JOIN leave_requests lr
-                       ON e.employee_id = lr.employee_id
-                      AND lr.status = 'Approved'
-                      AND CURDATE() BETWEEN lr.leave_from AND lr.leave_until
-            LEFT  JOIN (
-                SELECT doctor_id, COUNT(*) AS appt_count
-                FROM appointments
-                WHERE appointment_date = CURDATE()
-                GROUP BY doctor_id
-            ) ac ON e.employee_id = ac.doctor_id
-            WHERE r.role_name = 'Doctor' AND e.status = 'Active'
-            ORDER BY 
-                CASE 
-                    WHEN lr.request_id IS NOT NULL THEN 0 
-                    WHEN ds.schedule_id IS NOT NULL THEN 1 
-                    ELSE 0 
-                END DESC, 
-                e.first_name
-        """)
+        return self.get_availability_snapshot().overview()
 
     def get_services_list(self, active_only=True):
         q = "SELECT service_id, service_name, price, category, is_active FROM services"
         if active_only:
             q += " WHERE is_active = 1"
-        return self.fetch(q + " ORDER BY service_name")
+        return self.fetch(q + " ORDER BY service_name", cached=True)
 
     def get_services_for_doctor(self, doctor_id):
         """Return active services available for a doctor based on their department.
 
         Uses service_departments junction table.  Only returns services that
-        are explicitly mapped to this doctor's department.
+        are explicitly mapped to this doctor's department, plus services not
+        mapped to any department. Served from an in-memory map, see
+        _service_map().
         """
-        return self.fetch("""
-            SELECT s.service_id, s.service_name, s.price, s.category
+        smap = self._service_map()
+        dept = smap["doctor_dept"].get(doctor_id)
+        merged = smap["merged"].get(dept)
+        if merged is None:
+            merged = sorted(smap["by_dept"].get(dept, []) + smap["unmapped"],
+                            key=lambda svc: svc["service_name"])
+            smap["merged"][dept] = merged
+        return [dict(svc) for svc in merged]
+
+    _SERVICE_MAP_TABLES = {"services", "service_departments", "employees"}
+    _service_map_data = None  # shared; dropped when a _SERVICE_MAP_TABLES table changes
+    _service_map_at = 0.0
+
+    def _service_map(self):
+        """Department -> active services, built from two queries and kept until
+        services, service_departments or employees change here, or for at most
+        QUERY_CACHE_TTL seconds so edits from other workstations show up."""
+        smap = AppointmentMixin._service_map_data
+        if smap is not None and time.monotonic() - AppointmentMixin._service_map_at <= QUERY_CACHE_TTL:
+            return smap
+        services = self.fetch("""
+            SELECT s.service_id, s.service_name, s.price, s.category, sd.department_id
             FROM services s
+            LEFT JOIN service_departments sd ON sd.service_id = s.service_id
             WHERE s.is_active = 1
-              AND (
-                  EXISTS (
-                      SELECT 1 FROM service_departments sd
-                      WHERE sd.service_id = s.service_id
-                        AND sd.department_id = (
-                            SELECT e.department_id FROM employees e WHERE e.employee_id = %s
-                        )
-                  )
-                  OR NOT EXISTS (
-                      SELECT 1 FROM service_departments sd2
-                      WHERE sd2.service_id = s.service_id
-                  )
-              )
-            ORDER BY s.service_name
-        """, (doctor_id,))
+        """)
+        employees = self.fetch("SELECT employee_id, department_id FROM employees")
+        by_dept, unmapped = {}, []
+        for row in services or []:
+            dept = row.pop("department_id")
+            if dept is None:
+                unmapped.append(row)
+            else:
+                by_dept.setdefault(dept, []).append(row)
+        smap = {"by_dept": by_dept, "unmapped": unmapped, "merged": {},
+                "doctor_dept": {e["employee_id"]: e["department_id"] for e in employees or []}}
+        if services:  # don't keep an empty map from a failed query
+            AppointmentMixin._service_map_data = smap
+            AppointmentMixin._service_map_at = time.monotonic()
+            self.query_cache.add_listener(AppointmentMixin._drop_service_map)
+        return smap
+
+    @staticmethod
+    def _drop_service_map(tables):
+        if AppointmentMixin._SERVICE_MAP_TABLES & {t.lower() for t in tables}:
+            AppointmentMixin._service_map_data = None
 
     def get_all_services(self):
         return self.get_services_list(active_only=False)
@@ -141,7 +231,7 @@ class AppointmentMixin:
         if exclude_id:
             q += " AND appointment_id != %s"
             params.append(exclude_id)
-        row = self.fetch(q, params, one=True)
+        row = self.fetch(q, params, one=True, prepared=True)
         return row["cnt"] > 0 if row else False
 
     def check_daily_quota(self, doctor_id, date, exclude_id=None):
@@ -154,65 +244,223 @@ class AppointmentMixin:
             params.append(exclude_id)
         row = self.fetch(q, params, one=True)
         count = row["cnt"] if row else 0
-        max_quota = 20
+        max_quota = self.DAILY_QUOTA
         return (count < max_quota, count, max_quota)
 
     def _validate_appointment_date(self, date_str):
         """Return (ok, error_msg). Date must be today or later, within current or next month."""
-        from datetime import date, datetime
-        import calendar
+        from datetime import datetime
         try:
-            appt_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+            appt_date = datetime.strptime(str(date_str), "%Y-%m-%d").date()
         except (ValueError, TypeError):
             return False, "Invalid date format."
-        today = date.today()
+        today = _date.today()
         if appt_date < today:
             return False, "Cannot schedule an appointment in the past."
-        # Max = last day of next month
-        if today.month == 12:
-            next_y, next_m = today.year + 1, 1
-        else:
-            next_y, next_m = today.year, today.month + 1
-        max_day = calendar.monthrange(next_y, next_m)[1]
-        max_date = date(next_y, next_m, max_day)
+        max_date = booking_window_end(today)
         if appt_date > max_date:
             return False, f"Appointments can only be scheduled up to {max_date.strftime('%B %d, %Y')}."
         return True, ""
 
+    def _appointment_row(self, cur, appointment_id):
+        """The get_appointments() row for one appointment, read on *cur*."""
+        cur.execute(_APPT_SELECT + " WHERE a.appointment_id=%s", (appointment_id,))
+        return cur.fetchone()
+
     def add_appointment(self, data):
-        appt_date = data.get("date")
-        if not appt_date:
-            from datetime import date as _date
-            appt_date = _date.today().strftime("%Y-%m-%d")
+        """Book one appointment from IDs (patient_id, doctor_id, service_id).
 
-        pid = data.get("patient_id") or self._lookup_patient_id(data["patient_name"])
-        if not pid:
+        INSERT and the joined read-back share one connection, so the caller
+        gets the new row - display names included - without further queries.
+        Returns the row dict, or False.
+        """
+        appt_date = data.get("date") or _date.today().strftime("%Y-%m-%d")
+        if not data.get("patient_id"):
             return False
         conn = None
         try:
             conn = self._get_connection()
-            with conn.cursor() as cur:
+            with conn.cursor(dictionary=True) as cur:
                 cur.execute("""
                     INSERT INTO appointments (patient_id, doctor_id, service_id,
                         appointment_date, appointment_time, status, notes,
                         cancellation_reason, reschedule_reason)
                     VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                """, (pid, data["doctor_id"], data["service_id"],
+                """, (data["patient_id"], data["doctor_id"], data["service_id"],
                       appt_date, data["time"], "Confirmed",
                       data.get("notes", ""), data.get("cancellation_reason", ""),
                       data.get("reschedule_reason", "")))
-                appt_id = cur.lastrowid
+                row = self._appointment_row(cur, cur.lastrowid)
+                conn.commit()
+            self.invalidate_cache("appointments")
+            log_type = "Walk-in" if str(appt_date) == _date.today().strftime("%Y-%m-%d") \
+                else "Scheduled Appointment"
+            self.log_activity("Created", "Appointment",
+                              f"{log_type} #{row['appointment_id']} for {row['patient_name']} "
+                              f"with Dr. {row['doctor_name']}")
+            return row
+        except Exception:
+            try:
+                if conn:
+                    conn.rollback()
+            except Exception:
+                pass
+            return False
+        finally:
+            if conn:
+                conn.close()
+
+    # ── Status transitions ────────────────────────────────────────
+
+    def transition_appointments(self, appointment_ids, new_status, reason=None):
+        """Move many appointments to *new_status* in one transaction.
+
+        Only appointments whose current status is allowed by
+        STATUS_TRANSITIONS change; the rest are reported back. *reason* is
+        stored as the cancellation reason when cancelling. Writes one
+        activity log entry for the whole batch.
+
+        Returns {'updated': [ids], 'skipped': [(id, status)]} or an error string.
+        """
+        allowed = self.STATUS_TRANSITIONS.get(new_status)
+        if allowed is None:
+            return f"Unknown status '{new_status}'."
+        ids = sorted({int(i) for i in appointment_ids if i})
+        if not ids:
+            return {"updated": [], "skipped": []}
+        marks = ",".join(["%s"] * len(ids))
+        conn = None
+        try:
+            conn = self._get_connection()
+            with conn.cursor(dictionary=True) as cur:
+                cur.execute(f"SELECT appointment_id, status FROM appointments "
+                            f"WHERE appointment_id IN ({marks}) FOR UPDATE", ids)
+                current = {r["appointment_id"]: r["status"] for r in cur.fetchall()}
+                updated = [i for i in ids if current.get(i) in allowed]
+                skipped = [(i, current.get(i, "Missing")) for i in ids if i not in updated]
+                if updated:
+                    set_sql = "status=%s"
+                    params = [new_status]
+                    if new_status == "Cancelled":
+                        set_sql += ", cancellation_reason=%s"
+                        params.append((reason or "").strip())
+                    cur.execute(f"UPDATE appointments SET {set_sql} WHERE appointment_id IN "
+                                f"({','.join(['%s'] * len(updated))})", (*params, *updated))
                 conn.commit()
-            doctor_name = data.get('doctor', '')
-            if not doctor_name and data.get('doctor_id'):
-                doctor_name = self._get_employee_name(data['doctor_id'])
+            if updated:
+                self.invalidate_cache("appointments")
+                verb = {"Confirmed": "Confirmed", "Cancelled": "Cancelled",
+                        "No-Show": "Marked no-show for", "Completed": "Completed"}[new_status]
+                shown = ", ".join(f"#{i}" for i in updated[:20])
+                more = f" and {len(updated) - 20} more" if len(updated) > 20 else ""
+                detail = f"{verb} {len(updated)} appt{'s' if len(updated) != 1 else ''}: {shown}{more}"
+                if new_status == "Cancelled" and reason:
+                    detail += f" (reason: {reason.strip()})"
+                self.log_activity("Edited", "Appointment", detail)
+            return {"updated": updated, "skipped": skipped}
+        except Exception as e:
+            try:
+                if conn:
+                    conn.rollback()
+            except Exception:
+                pass
+            return str(e)
+        finally:
+            if conn:
+                conn.close()
+
+    # ── Recurring series ──────────────────────────────────────────
 
-            from datetime import date as _date
-            is_today = appt_date == _date.today().strftime("%Y-%m-%d")
-            log_type = "Walk-in" if is_today else "Scheduled Appointment"
+    RECURRING_MAX_OCCURRENCES = 26
+
+    def plan_recurring_appointments(self, data, every=1, unit="weeks", until=None, count=None):
+        """Occurrence dates for a series, each checked against availability.
+
+        Starts at data['date'] and repeats every *every* days or weeks until
+        *until* (inclusive) or *count* occurrences, whichever comes first.
+        Occurrences after booking_window_end() are refused, the same window
+        single bookings get. Returns [{'date', 'ok', 'reason'}, ...]; all
+        occurrences are checked with one get_slot_availability() call.
+        """
+        from backend.availability import _as_date, _minutes
+        start = _as_date(data["date"])
+        step = _timedelta(days=every * (7 if unit == "weeks" else 1))
+        if step.days < 1:
+            return []
+        until = _as_date(until) if until else None
+        count = min(count or self.RECURRING_MAX_OCCURRENCES, self.RECURRING_MAX_OCCURRENCES)
+        dates, d = [], start
+        while len(dates) < count and (until is None or d <= until):
+            dates.append(d)
+            d += step
+        if not dates:
+            return []
+
+        today, last = _date.today(), booking_window_end()
+        per_day = {}
+        if dates[0] <= last:
+            avail = self.get_slot_availability(dates[0], min(dates[-1], last),
+                                               doctor_id=data["doctor_id"])
+            per_day = avail.get(data["doctor_id"], {})
+        tm = _minutes(data["time"])
+        plan = []
+        for d in dates:
+            slots = per_day.get(d)
+            if slots is None:
+                reason = "Doctor has no schedule on this day"
+            elif slots.on_leave:
+                reason = "Doctor on approved leave"
+            elif slots.booked >= slots.quota:
+                reason = "Daily quota reached"
+            elif not slots.is_free(tm):
+                reason = ("Time slot taken" if slots.index_of(tm) is not None
+                          else "Outside the doctor's working hours")
+            else:
+                reason = ""
+            if d < today:
+                reason = "Date has passed"
+            elif d > last:
+                reason = f"Beyond the booking window (up to {last.strftime('%B %d, %Y')})"
+            plan.append({"date": d.isoformat(), "ok": not reason, "reason": reason})
+        return plan
+
+    def add_recurring_appointments(self, data, dates, every=1, unit="weeks"):
+        """Book *dates* (from plan_recurring_appointments) as one series,
+        from IDs like add_appointment (patient_id, doctor_id, service_id).
+
+        All rows go in one transaction; the first is the series parent and
+        the rest point at it via recurring_parent_id. Returns the number of
+        appointments created, or False (also when any date is outside the
+        booking window).
+        """
+        dates = sorted(dates)
+        pid = data.get("patient_id")
+        if not pid or not dates or not all(self._validate_appointment_date(d)[0] for d in dates):
+            return False
+        sql = """
+            INSERT INTO appointments (patient_id, doctor_id, service_id,
+                appointment_date, appointment_time, status, notes,
+                cancellation_reason, reschedule_reason, recurring_parent_id)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+        """
+        base = (pid, data["doctor_id"], data["service_id"])
+        tail = (data["time"], "Confirmed", data.get("notes", ""), "", "")
+        conn = None
+        try:
+            conn = self._get_connection()
+            with conn.cursor() as cur:
+                cur.execute(sql, (*base, dates[0], *tail, None))
+                parent_id = cur.lastrowid
+                self._executemany(cur, sql, [(*base, d, *tail, parent_id) for d in dates[1:]])
+                conn.commit()
+            self.invalidate_cache("appointments")
+            doctor_name = data.get("doctor") or self._get_employee_name(data["doctor_id"])
+            label = "week" if unit == "weeks" else "day"
             self.log_activity("Created", "Appointment",
-                              f"{log_type} #{appt_id} for {data['patient_name']} with Dr. {doctor_name}")
-            return True
+                              f"Recurring series #{parent_id}: {len(dates)} visits every {every} "
+                              f"{label}{'s' if every != 1 else ''} ({dates[0]} to {dates[-1]}) "
+                              f"for {data['patient_name']} with Dr. {doctor_name}")
+            return len(dates)
         except Exception:
             try:
                 if conn:
@@ -225,34 +473,49 @@ class AppointmentMixin:
                 conn.close()
 
     def update_appointment(self, appointment_id, data):
-        # Validate date range only if date changed from original
-        original = self.fetch("SELECT appointment_date FROM appointments WHERE appointment_id=%s",
-                              (appointment_id,), one=True)
-        original_date = str(original["appointment_date"]) if original else ""
-        if data["date"] != original_date:
-            ok, err = self._validate_appointment_date(data["date"])
-            if not ok:
-                return False
-        pid = data.get("patient_id") or self._lookup_patient_id(data["patient_name"])
-        if not pid:
+        """Save an edited appointment and return its refreshed row, or False.
+
+        The booking-window check only applies when the date actually moves;
+        it is folded into the UPDATE's WHERE clause instead of pre-reading
+        the stored date, and the joined read-back tells whether it held.
+        """
+        if not data.get("patient_id"):
             return False
-        ok = self.exec("""
-            UPDATE appointments
-            SET patient_id=%s, doctor_id=%s, service_id=%s, appointment_date=%s,
-                appointment_time=%s, status=%s, notes=%s,
-                cancellation_reason=%s, reschedule_reason=%s
-            WHERE appointment_id=%s
-        """, (pid, data["doctor_id"], data["service_id"],
-              data["date"], data["time"], data.get("status", "Pending"),
-              data.get("notes", ""), data.get("cancellation_reason", ""),
-              data.get("reschedule_reason", ""),
-              appointment_id))
-        if ok:
-            doctor_name = data.get('doctor', '')
-            if not doctor_name and data.get('doctor_id'):
-                doctor_name = self._get_employee_name(data['doctor_id'])
+        date_ok, _ = self._validate_appointment_date(data["date"])
+        conn = None
+        try:
+            conn = self._get_connection()
+            with conn.cursor(dictionary=True) as cur:
+                cur.execute("""
+                    UPDATE appointments
+                    SET patient_id=%s, doctor_id=%s, service_id=%s, appointment_date=%s,
+                        appointment_time=%s, status=%s, notes=%s,
+                        cancellation_reason=%s, reschedule_reason=%s
+                    WHERE appointment_id=%s AND (%s OR appointment_date=%s)
+                """, (data["patient_id"], data["doctor_id"], data["service_id"],
+                      data["date"], data["time"], data.get("status", "Pending"),
+                      data.get("notes", ""), data.get("cancellation_reason", ""),
+                      data.get("reschedule_reason", ""),
+                      appointment_id, date_ok, data["date"]))
+                row = self._appointment_row(cur, appointment_id)
+                conn.commit()
+            # A rejected date change leaves the stored date in place
+            if not row or str(row["appointment_date"]) != str(data["date"]):
+                return False
+            self.invalidate_cache("appointments")
             self.log_activity("Edited", "Appointment",
-                              f"Appt #{appointment_id} for {data.get('patient_name','')} with Dr. {doctor_name}")
-        return ok
+                              f"Appt #{appointment_id} for {row['patient_name']} "
+                              f"with Dr. {row['doctor_name']}")
+            return row
+        except Exception:
+            try:
+                if conn:
+                    conn.rollback()
+            except Exception:
+                pass
+            return False
+        finally:
+            if conn:
+                conn.close()
 
 
@@ -114,5 +114,5 @@ class AuthMixin:
     def get_all_roles(self):
         """Return a list of role name strings."""
         rows = self.fetch(
-            "SELECT role_name FROM roles ORDER BY role_id", ())
+            "SELECT role_name FROM roles ORDER BY role_id", (), cached=True)
         return [r["role_name"] for r in (rows or [])]
@@ -0,0 +1,482 @@
+# Slot availability engine - free appointment slots per doctor per day.
+# Schedules and booked appointments for a whole date range are loaded in two
+# queries, approved leave comes from the shared LeaveIndex, and all three are
+# folded into one bitmap per doctor-day.
+
+import threading
+import time
+import traceback
+from datetime import date, datetime, timedelta
+
+from backend.db_config import (
+    SLOT_MINUTES, DAILY_QUOTA, OVERBOOK_ENABLED, OVERBOOK_MAX_PER_DAY,
+    OVERBOOK_SHOW_THRESHOLD, NOSHOW_RETRAIN_HOURS, QUERY_CACHE_TTL,
+)
+from backend.noshow import NoShowModel
+
+_DAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+def _minutes(t):
+    """TIME column (timedelta / time / 'HH:MM[:SS]') -> minutes after midnight."""
+    if t is None:
+        return None
+    if hasattr(t, "total_seconds"):
+        return int(t.total_seconds()) // 60
+    if hasattr(t, "hour"):
+        return t.hour * 60 + t.minute
+    parts = str(t).split(":")
+    return int(parts[0]) * 60 + int(parts[1])
+
+
+def _as_date(d):
+    if isinstance(d, datetime):
+        return d.date()
+    if isinstance(d, date):
+        return d
+    return datetime.strptime(str(d)[:10], "%Y-%m-%d").date()
+
+
+class DaySlots:
+    """One doctor's bookable slots for one day.
+
+    Bit i of *bits* is set when the slot starting at
+    start + i * slot_minutes is free. *overbooked* counts slots reopened
+    for a second booking because their patient is unlikely to show.
+    """
+
+    __slots__ = ("day", "start", "end", "slot_minutes", "bits", "booked", "quota", "on_leave",
+                 "overbooked")
+
+    def __init__(self, day, start, end, slot_minutes, quota):
+        self.day = day
+        self.start = start
+        self.end = end
+        self.slot_minutes = slot_minutes
+        self.quota = quota
+        self.booked = 0
+        self.on_leave = False
+        self.overbooked = 0
+        count = max(0, (end - start) // slot_minutes)
+        self.bits = (1 << count) - 1
+
+    @property
+    def slot_count(self):
+        return max(0, (self.end - self.start) // self.slot_minutes)
+
+    def index_of(self, minutes):
+        """Slot index holding *minutes*, or None if outside working hours."""
+        if minutes is None or minutes < self.start or minutes >= self.end:
+            return None
+        i = (minutes - self.start) // self.slot_minutes
+        return i if i < self.slot_count else None
+
+    def take(self, minutes):
+        self.booked += 1
+        i = self.index_of(minutes)
+        if i is not None:
+            self.bits &= ~(1 << i)
+
+    def is_free(self, minutes):
+        i = self.index_of(minutes)
+        return i is not None and bool(self.bits >> i & 1)
+
+    @property
+    def full(self):
+        return self.on_leave or self.booked >= self.quota
+
+    def free_minutes(self):
+        """Start times (minutes after midnight) of every bookable slot."""
+        if self.full:
+            return []
+        bits, out, i = self.bits, [], 0
+        while bits:
+            if bits & 1:
+                out.append(self.start + i * self.slot_minutes)
+            bits >>= 1
+            i += 1
+        return out
+
+    def free_times(self):
+        """Bookable slots as 'HH:MM:SS' strings (the appointment_time format)."""
+        return [f"{m // 60:02d}:{m % 60:02d}:00" for m in self.free_minutes()]
+
+    def first_free(self):
+        if self.full or not self.bits:
+            return None
+        low = self.bits & -self.bits
+        return self.start + (low.bit_length() - 1) * self.slot_minutes
+
+    def as_dict(self):
+        return {"date": self.day.isoformat(), "start": self.start, "end": self.end,
+                "slot_minutes": self.slot_minutes, "bits": self.bits if not self.full else 0,
+                "booked": self.booked, "quota": self.quota, "on_leave": self.on_leave,
+                "overbooked": self.overbooked}
+
+
+class AvailabilitySnapshot:
+    """Today's availability for every active doctor, kept in memory.
+
+    Built with two queries the first time it is read each day; who is on
+    leave comes from the LeaveIndex. Writes to schedules, leave, employees
+    or departments trigger a full rebuild on the next read; appointment writes only refresh the per-doctor counts.
+    It is also rebuilt after *max_age* seconds so changes made on other
+    workstations show up, like the query cache.
+    """
+
+    _FULL = {"doctor_schedules", "leave_requests", "employees", "departments", "roles"}
+
+    def __init__(self, backend, max_age=QUERY_CACHE_TTL):
+        self._backend = backend
+        self._lock = threading.Lock()
+        self._max_age = max_age
+        self._built_at = 0.0
+        self.day = None
+        self.doctors = {}        # doctor_id -> row dict
+        self._stale_counts = False
+
+    def invalidate(self, tables):
+        tables = {t.lower() for t in tables}
+        if tables & self._FULL:
+            self.day = None
+        elif "appointments" in tables:
+            self._stale_counts = True
+
+    def _ensure(self):
+        with self._lock:
+            if self.day != date.today() or time.monotonic() - self._built_at > self._max_age:
+                self._build()
+            elif self._stale_counts:
+                self._load_counts()
+
+    def _build(self):
+        rows = self._backend.fetch("""
+            SELECT e.employee_id, e.first_name,
+                   CONCAT(e.first_name,' ',e.last_name) AS doctor_name,
+                   e.department_id,
+                   COALESCE(d.department_name, '\u2014') AS department,
+                   ds.schedule_id, ds.day_of_week, ds.start_time,
+                   TIME_FORMAT(ds.start_time, '%h:%i %p') AS sched_start,
+                   TIME_FORMAT(ds.end_time, '%h:%i %p')   AS sched_end
+            FROM employees e
+            INNER JOIN roles r ON e.role_id = r.role_id
+            LEFT  JOIN departments d ON e.department_id = d.department_id
+            LEFT  JOIN doctor_schedules ds
+                       ON e.employee_id = ds.doctor_id
+                      AND ds.day_of_week = DAYNAME(CURDATE())
+            WHERE r.role_name = 'Doctor' AND e.status = 'Active'
+        """)
+        away = self._backend.get_employees_on_leave() if rows else {}
+        doctors = {}
+        for r in rows or []:
+            r["on_leave"] = r["employee_id"] in away
+            r["availability"] = ("On Leave" if r["on_leave"] else
+                                 "Available" if r["schedule_id"] is not None else "Not Available")
+            r["appt_count"] = 0
+            doctors[r["employee_id"]] = r
+        self.doctors = doctors
+        self.day = date.today() if rows else None  # retry next read if the query failed
+        self._built_at = time.monotonic()
+        self._load_counts()
+
+    def _load_counts(self):
+        rows = self._backend.fetch("""
+            SELECT doctor_id, COUNT(*) AS appt_count FROM appointments
+            WHERE appointment_date = CURDATE() GROUP BY doctor_id
+        """)
+        counts = {r["doctor_id"]: r["appt_count"] for r in rows or []}
+        for doc_id, doc in self.doctors.items():
+            doc["appt_count"] = counts.get(doc_id, 0)
+        self._stale_counts = False
+
+    # ── Views ──────────────────────────────────────────────────────
+    def get(self, doctor_id):
+        """One doctor's row for today, or None."""
+        self._ensure()
+        doc = self.doctors.get(doctor_id)
+        return dict(doc) if doc else None
+
+    def available_today(self):
+        """Rows for get_doctors_available_today(): scheduled doctors first."""
+        self._ensure()
+        keys = ("employee_id", "doctor_name", "department_id", "sched_start", "sched_end")
+        docs = sorted(self.doctors.values(),
+                      key=lambda d: (d["start_time"] is None, d["first_name"]))
+        return [{k: d[k] for k in keys} for d in docs]
+
+    def overview(self):
+        """Rows for get_doctor_availability_overview(): available doctors first."""
+        self._ensure()
+        keys = ("employee_id", "doctor_name", "department", "day_of_week", "sched_start",
+                "sched_end", "availability", "appt_count")
+        docs = sorted(self.doctors.values(),
+                      key=lambda d: (d["availability"] != "Available", d["first_name"]))
+        return [{k: d[k] for k in keys} for d in docs]
+
+
+class AvailabilityMixin:
+
+    SLOT_MINUTES = SLOT_MINUTES
+    DAILY_QUOTA = DAILY_QUOTA
+    OVERBOOK_ENABLED = OVERBOOK_ENABLED
+    _noshow_model = None  # shared across instances, see get_noshow_model()
+    _noshow_lock = threading.Lock()
+    _snapshot = None      # AvailabilitySnapshot, see get_availability_snapshot()
+
+    def get_slot_availability(self, date_from, date_to=None, doctor_id=None,
+                              department_id=None, exclude_id=None, now=None, bookings=True,
+                              overbook=None):
+        """Free slots for one doctor (or all active doctors) over a date range.
+
+        Returns {doctor_id: {date: DaySlots}}. Days without a schedule are
+        left out; days on approved leave come back with on_leave set.
+        Slots that already started are masked out for today.
+        With bookings=False the appointments query is skipped (capacity only).
+        With overbooking on (OVERBOOK_ENABLED unless *overbook* says otherwise)
+        slots held by likely no-shows are reopened, see _apply_overbooking().
+        """
+        date_from = _as_date(date_from)
+        date_to = _as_date(date_to) if date_to else date_from
+        if date_to < date_from:
+            return {}
+
+        where, params = ["r.role_name = 'Doctor'", "e.status = 'Active'"], []
+        if doctor_id is not None:
+            where.append("e.employee_id = %s")
+            params.append(doctor_id)
+        if department_id is not None:
+            where.append("e.department_id = %s")
+            params.append(department_id)
+        schedules = self.fetch(f"""
+            SELECT ds.doctor_id, ds.day_of_week, ds.start_time, ds.end_time
+            FROM doctor_schedules ds
+            INNER JOIN employees e ON ds.doctor_id = e.employee_id
+            INNER JOIN roles r ON e.role_id = r.role_id
+            WHERE {' AND '.join(where)}
+        """, params)
+        if not schedules:
+            return {}
+
+        weekly = {}  # doctor_id -> {weekday: (start, end)}
+        for s in schedules:
+            start, end = _minutes(s["start_time"]), _minutes(s["end_time"])
+            if start is not None and end is not None and end > start:
+                weekly.setdefault(s["doctor_id"], {})[_DAY_NAMES.index(s["day_of_week"])] = (start, end)
+        if not weekly:
+            return {}
+
+        ids = sorted(weekly)
+        marks = ",".join(["%s"] * len(ids))
+        leaves = self.get_leave_index().in_range(date_from, date_to, ids)
+        overbook = self.OVERBOOK_ENABLED if overbook is None else overbook
+        appt_q = f"""
+            SELECT doctor_id, patient_id, service_id, appointment_date, appointment_time,
+                   created_at
+            FROM appointments
+            WHERE doctor_id IN ({marks}) AND appointment_date BETWEEN %s AND %s
+              AND status <> 'Cancelled'
+        """
+        appt_params = [*ids, date_from, date_to]
+        if exclude_id:
+            appt_q += " AND appointment_id <> %s"
+            appt_params.append(exclude_id)
+        appts = self.fetch(appt_q, appt_params) if bookings else []
+
+        # Build every scheduled doctor-day, then fold leave and bookings in
+        result = {}
+        days = [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+        for doc, week in weekly.items():
+            per_day = {}
+            for d in days:
+                hours = week.get(d.weekday())
+                if hours:
+                    per_day[d] = DaySlots(d, hours[0], hours[1], self.SLOT_MINUTES, self.DAILY_QUOTA)
+            if per_day:
+                result[doc] = per_day
+
+        for leave_from, leave_until, emp_id in leaves:
+            per_day = result.get(emp_id, {})
+            d, until = max(leave_from, date_from), min(leave_until, date_to)
+            while d <= until:
+                if d in per_day:
+                    per_day[d].on_leave = True
+                d += timedelta(days=1)
+
+        booked = {}  # DaySlots -> [appointment rows]
+        for a in appts or []:
+            slots = result.get(a["doctor_id"], {}).get(_as_date(a["appointment_date"]))
+            if slots is not None:
+                slots.take(_minutes(a["appointment_time"]))
+                booked.setdefault(slots, []).append(a)
+        if overbook and booked:
+            self._apply_overbooking(booked)
+
+        now = now or datetime.now()
+        today = now.date()
+        if bookings and date_from <= today <= date_to:
+            cutoff = now.hour * 60 + now.minute
+            for per_day in result.values():
+                slots = per_day.get(today)
+                if slots is None:
+                    continue
+                for i in range(slots.slot_count):
+                    if slots.start + i * slots.slot_minutes <= cutoff:
+                        slots.bits &= ~(1 << i)
+        return result
+
+    def get_availability_snapshot(self):
+        """Shared in-memory AvailabilitySnapshot for today."""
+        snap = AvailabilityMixin._snapshot
+        if snap is None:
+            snap = AvailabilityMixin._snapshot = AvailabilitySnapshot(self)
+            self.query_cache.add_listener(snap.invalidate)
+        return snap
+
+    def get_doctor_availability(self, doctor_id):
+        """Today's availability row for one doctor (from the snapshot)."""
+        return self.get_availability_snapshot().get(doctor_id)
+
+    def _apply_overbooking(self, booked):
+        """Reopen slots whose patient will probably not show.
+
+        Per doctor-day: the expected no-shows (sum of 1 - P(show)), capped at
+        OVERBOOK_MAX_PER_DAY, raise the quota; that many singly-booked slots
+        with P(show) below OVERBOOK_SHOW_THRESHOLD are marked free again,
+        least likely to show first. Slots never hold more than two bookings.
+        """
+        model = self.get_noshow_model()
+        if model is None or not model.fitted:
+            return  # the overall show rate alone doesn't say which slots to reopen
+        days = list(booked.items())
+        flat = [a for _, rows in days for a in rows]
+        probs = iter(model.predict(flat))
+        for slots, rows in days:
+            per_slot = {}
+            expected_no_shows = 0.0
+            for a in rows:
+                p = next(probs)
+                expected_no_shows += 1.0 - p
+                i = slots.index_of(_minutes(a["appointment_time"]))
+                if i is not None:
+                    per_slot.setdefault(i, []).append(p)
+            allowance = min(OVERBOOK_MAX_PER_DAY, int(expected_no_shows))
+            doubled = sum(len(ps) - 1 for ps in per_slot.values() if len(ps) > 1)
+            candidates = sorted((ps[0], i) for i, ps in per_slot.items()
+                                if len(ps) == 1 and ps[0] < OVERBOOK_SHOW_THRESHOLD)
+            reopen = candidates[:max(0, allowance - doubled)]
+            for _, i in reopen:
+                slots.bits |= 1 << i
+            slots.overbooked = len(reopen)
+            slots.quota += allowance
+
+    def get_noshow_model(self, refresh=False):
+        """Shared NoShowModel, retrained every NOSHOW_RETRAIN_HOURS.
+
+        Training runs on a background thread so the first calendar view
+        doesn't wait for it; until the first model is ready this returns
+        None and no slots are overbooked.
+        """
+        model = AvailabilityMixin._noshow_model
+        stale = (model is None or refresh or
+                 (datetime.now() - model.trained_at).total_seconds() > NOSHOW_RETRAIN_HOURS * 3600)
+        if stale and AvailabilityMixin._noshow_lock.acquire(blocking=False):
+            threading.Thread(target=self._train_noshow_in_background,
+                             name="carecrud-noshow", daemon=True).start()
+        return model
+
+    def _train_noshow_in_background(self):
+        try:
+            self.train_noshow_model()
+        except Exception:
+            traceback.print_exc()
+        finally:
+            AvailabilityMixin._noshow_lock.release()
+
+    def train_noshow_model(self, days=365):
+        """Fit the no-show model on the last *days* days of appointments."""
+        rows = self.fetch("""
+            SELECT patient_id, service_id, appointment_date, appointment_time, created_at, status
+            FROM appointments
+            WHERE appointment_date >= CURDATE() - INTERVAL %s DAY AND appointment_date < CURDATE()
+              AND status IN ('Completed', 'No-Show', 'Cancelled')
+            ORDER BY appointment_date, appointment_time
+        """, (days,))
+        model = NoShowModel().fit(rows or [])
+        AvailabilityMixin._noshow_model = model
+        return model
+
+    def get_available_slots(self, doctor_id, day, exclude_id=None):
+        """Bookable 'HH:MM:SS' slots for one doctor on one day.
+
+        Returns None when the doctor has no schedule that day (any time is
+        allowed then), otherwise a DaySlots with the free bitmap.
+        """
+        day = _as_date(day)
+        return self.get_slot_availability(day, day, doctor_id=doctor_id,
+                                          exclude_id=exclude_id).get(doctor_id, {}).get(day)
+
+    def find_next_free_slot(self, department_id=None, doctor_id=None, after=None, days=14):
+        """Earliest free slot across matching doctors within *days* days.
+
+        Returns {'doctor_id', 'date', 'time'} or None.
+        """
+        start = _as_date(after) if after else date.today()
+        avail = self.get_slot_availability(start, start + timedelta(days=days - 1),
+                                           doctor_id=doctor_id, department_id=department_id)
+        best = None
+        for doc, per_day in avail.items():
+            for d, slots in per_day.items():
+                m = slots.first_free()
+                if m is not None and (best is None or (d, m) < best[:2]):
+                    best = (d, m, doc)
+        if best is None:
+            return None
+        d, m, doc = best
+        return {"doctor_id": doc, "date": d.isoformat(), "time": f"{m // 60:02d}:{m % 60:02d}:00"}
+
+    def get_availability_bitmaps(self, date_from, date_to=None, doctor_id=None, department_id=None):
+        """Serialisable form of get_slot_availability: {doctor_id: [day dict, ...]}."""
+        avail = self.get_slot_availability(date_from, date_to, doctor_id=doctor_id,
+                                           department_id=department_id)
+        return {doc: [per_day[d].as_dict() for d in sorted(per_day)] for doc, per_day in avail.items()}
+
+    def get_calendar_heatmap(self, month=None, doctor_id=None, months=1):
+        """Per-day load for calendar shading.
+
+        *month* is any date in the first month (default: this month);
+        *months* consecutive months are covered. Counts come from one
+        grouped query; capacity is the bookable slots (capped by the daily
+        quota) of every scheduled doctor not on leave.
+
+        Returns {'YYYY-MM-DD': {'count', 'capacity', 'utilization'}}.
+        """
+        first = (_as_date(month) if month else date.today()).replace(day=1)
+        last = first
+        for _ in range(max(1, months)):
+            last = (last + timedelta(days=32)).replace(day=1)
+        last -= timedelta(days=1)
+
+        q = """
+            SELECT appointment_date, COUNT(*) AS cnt FROM appointments
+            WHERE appointment_date BETWEEN %s AND %s AND status <> 'Cancelled'
+        """
+        params = [first, last]
+        if doctor_id:
+            q += " AND doctor_id = %s"
+            params.append(doctor_id)
+        counts = {_as_date(r["appointment_date"]): r["cnt"]
+                  for r in self.fetch(q + " GROUP BY appointment_date", params)}
+
+        capacity = {}
+        avail = self.get_slot_availability(first, last, doctor_id=doctor_id, bookings=False)
+        for per_day in avail.values():
+            for d, slots in per_day.items():
+                if not slots.on_leave:
+                    capacity[d] = capacity.get(d, 0) + min(slots.slot_count, slots.quota)
+
+        out = {}
+        for d in sorted(set(counts) | set(capacity)):
+            cnt, cap = counts.get(d, 0), capacity.get(d, 0)
+            out[d.isoformat()] = {"count": cnt, "capacity": cap,
+                                  "utilization": round(cnt / cap, 3) if cap else (1.0 if cnt else 0.0)}
+        return out
@@ -1,13 +1,55 @@
 # DB connection + helper functions
 
+import os
+import re
+import sys
+import time
 import mysql.connector
-from mysql.connector import Error, pooling
-from backend.db_config import DB_CONFIG
+from mysql.connector import Error
+from backend import db_config
+from backend.db_config import (
+    DB_CONFIG, USE_C_EXTENSION, PREPARED_CACHE_SIZE, SLOW_QUERY_MS, SLOW_QUERY_LOG,
+    QUERY_CACHE_SIZE, QUERY_CACHE_TTL, LOG_RETENTION_DAYS, LOG_ARCHIVE_BATCH,
+)
+from backend.metrics import QueryMetrics
+from backend.pool import ManagedPool
+from backend.query_cache import QueryCache, tables_in
+from backend.stmt_cache import cache_for
+
+ER_UNKNOWN_STMT_HANDLER = 1243  # prepared statement was deallocated server-side
+
+
+# INSERT ... VALUES (...) - the form mysql.connector batches into one statement
+_INSERT_RE = re.compile(r"^\s*INSERT\b.*\bVALUES\s*\(", re.IGNORECASE | re.DOTALL)
 
 
 class DatabaseBase:
     DB_CONFIG = DB_CONFIG
     _pool = None  # shared across all instances
+    BULK_BATCH_SIZE = 500  # rows per executemany() round trip
+    # Shared query instrumentation; a relative log path is kept next to the project
+    metrics = QueryMetrics(SLOW_QUERY_MS, os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), SLOW_QUERY_LOG))
+    # Shared SELECT result cache for reference data - see fetch(cached=...)
+    query_cache = QueryCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+    # Secondary indexes created on startup when missing: (table, name, columns).
+    # Keep in sync with database/carecrud.sql.
+    MANAGED_INDEXES = [
+        # conflict / quota checks, availability engine, per-doctor reports
+        ("appointments", "idx_appointments_doctor_day",
+         "doctor_id, appointment_date, appointment_time, status"),
+        # date-window listings: today's counts, upcoming, calendar views
+        ("appointments", "idx_appointments_date_status", "appointment_date, status"),
+        # paychecks created by a payroll run
+        ("paycheck_requests", "idx_paycheck_requests_run", "run_id"),
+        # paged paycheck listings, see get_paycheck_requests_page()
+        ("paycheck_requests", "idx_paycheck_requests_status_created", "status, created_at"),
+        ("paycheck_requests", "idx_paycheck_requests_created", "created_at"),
+        # period timesheets across all employees (uq_attendance covers per-employee)
+        ("attendance", "idx_attendance_date", "record_date, employee_id, status"),
+        # unread backlog per employee and high-water-mark notification polls
+        ("notifications", "idx_notifications_unread", "employee_id, is_read, notification_id"),
+    ]
 
     def __init__(self):
         self._current_user_email = ""
@@ -20,32 +62,70 @@ class DatabaseBase:
         self._current_user_role = role
 
     # ── Connection pool ────────────────────────────────────────────
+    def _connection_config(self):
+        """DB_CONFIG, switched to the C extension when enabled and available."""
+        config = dict(self.DB_CONFIG)
+        if USE_C_EXTENSION and mysql.connector.HAVE_CEXT:
+            config["use_pure"] = False
+        return config
+
+    def _new_pool(self):
+        return ManagedPool(
+            self._connection_config(),
+            min_size=db_config.POOL_MIN_SIZE,
+            max_size=db_config.POOL_MAX_SIZE,
+            timeout=db_config.POOL_ACQUIRE_TIMEOUT,
+            idle_check=db_config.POOL_IDLE_CHECK,
+            max_lifetime=db_config.POOL_MAX_LIFETIME,
+            ui_reserved=db_config.POOL_UI_RESERVED,
+            reset_session=db_config.POOL_RESET_SESSION,
+            skip_reset_for_reads=db_config.POOL_SKIP_RESET_FOR_READS,
+            keepalive=db_config.POOL_KEEPALIVE,
+        )
+
     def _init_pool(self):
         """Create the connection pool once. Re-create it if the DB doesn't exist yet."""
         if DatabaseBase._pool is not None:
             return
         try:
-            DatabaseBase._pool = pooling.MySQLConnectionPool(
-                pool_name="carecrud_pool",
-                pool_size=5,
-                pool_reset_session=True,
-                **self.DB_CONFIG,
-            )
+            DatabaseBase._pool = self._new_pool()
         except Error as e:
             if e.errno == 1049:  # ER_BAD_DB_ERROR – DB not yet created
                 self._create_database_and_tables()
-                DatabaseBase._pool = pooling.MySQLConnectionPool(
-                    pool_name="carecrud_pool",
-                    pool_size=5,
-                    pool_reset_session=True,
-                    **self.DB_CONFIG,
-                )
+                DatabaseBase._pool = self._new_pool()
             else:
                 raise
+        self.metrics.register_gauges("pool", DatabaseBase._pool.stats)
+        self.metrics.register_gauges("cache", self.query_cache.stats)
+
+    def _get_connection(self, read_only=False, keep_session=False):
+        """Return a dedicated pooled connection. Caller must call .close() when done.
+        Waits up to POOL_ACQUIRE_TIMEOUT seconds if every connection is busy.
+        read_only=True lets the pool skip the session reset on release;
+        keep_session=True always skips it (see ManagedPool.acquire)."""
+        return DatabaseBase._pool.acquire(read_only=read_only, keep_session=keep_session)
+
+    def _release_connection(self, conn):
+        """Return *conn* to the pool."""
+        conn.close()
+
+    def get_pool_stats(self):
+        """Pool size, utilization and wait-time numbers."""
+        return DatabaseBase._pool.stats() if DatabaseBase._pool else {}
 
-    def _get_connection(self):
-        """Return a dedicated pooled connection. Caller must call .close() when done."""
-        return DatabaseBase._pool.get_connection()
+    def _run_prepared(self, conn, sql, params):
+        """Execute *sql* through the connection's prepared-statement cache.
+        Retries once if the server no longer knows the statement."""
+        cache = cache_for(conn, PREPARED_CACHE_SIZE)
+        for attempt in (0, 1):
+            cur, stmt = cache.get(sql)
+            try:
+                cur.execute(stmt, tuple(params or ()))
+                return cur
+            except Error as e:
+                if e.errno != ER_UNKNOWN_STMT_HANDLER or attempt:
+                    raise
+                cache.discard()
 
     def _create_database_and_tables(self):
         """Automatically create the database and tables from carecrud.sql if missing."""
@@ -71,6 +151,13 @@ class DatabaseBase:
         pass
 
     # ── Schema auto-migration ──────────────────────────────────────
+    def _ensure_indexes(self, cur):
+        """Create any MANAGED_INDEXES entry the database doesn't have yet."""
+        for table, name, columns in self.MANAGED_INDEXES:
+            cur.execute(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (name,))
+            if not cur.fetchall():
+                cur.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
     def _ensure_schema(self):
         """Create any missing tables or columns so the app works on older DBs."""
         conn = None
@@ -125,6 +212,17 @@ class DatabaseBase:
                     cur.execute(f"SHOW COLUMNS FROM queue_entries LIKE '{col}'")
                     if not cur.fetchone():
                         cur.execute(f"ALTER TABLE queue_entries ADD COLUMN {col} {typedef}")
+                # 'No-Show' appointment status
+                cur.execute("SHOW COLUMNS FROM appointments LIKE 'status'")
+                col = cur.fetchone()
+                if col and "No-Show" not in str(col[1]):
+                    cur.execute("ALTER TABLE appointments MODIFY COLUMN status "
+                                "ENUM('Pending','Confirmed','Cancelled','Completed','No-Show') "
+                                "NOT NULL DEFAULT 'Pending'")
+                # recurring_parent_id on appointments (links a recurring series)
+                cur.execute("SHOW COLUMNS FROM appointments LIKE 'recurring_parent_id'")
+                if not cur.fetchone():
+                    cur.execute("ALTER TABLE appointments ADD COLUMN recurring_parent_id INT DEFAULT NULL")
                 # updated_at column on queue_entries (for consultation duration tracking)
                 cur.execute("SHOW COLUMNS FROM queue_entries LIKE 'updated_at'")
                 if not cur.fetchone():
@@ -203,6 +301,28 @@ class DatabaseBase:
                     if not cur.fetchone():
                         cur.execute(f"ALTER TABLE paycheck_requests ADD COLUMN {col} {typedef}")
 
+                # payroll_runs table (one header per batch payroll run)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS payroll_runs (
+                        run_id           INT AUTO_INCREMENT PRIMARY KEY,
+                        period_from      DATE NOT NULL,
+                        period_until     DATE NOT NULL,
+                        filters          VARCHAR(255) DEFAULT NULL,
+                        prorated         TINYINT(1) NOT NULL DEFAULT 1,
+                        employee_count   INT NOT NULL DEFAULT 0,
+                        total_gross      DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+                        total_deductions DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+                        total_net        DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+                        created_by       INT NOT NULL,
+                        created_at       DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (created_by) REFERENCES employees(employee_id)
+                    )
+                """)
+                # run_id on paycheck_requests (links a request to its payroll run)
+                cur.execute("SHOW COLUMNS FROM paycheck_requests LIKE 'run_id'")
+                if not cur.fetchone():
+                    cur.execute("ALTER TABLE paycheck_requests ADD COLUMN run_id INT DEFAULT NULL")
+
                 # address column on employees
                 cur.execute("SHOW COLUMNS FROM employees LIKE 'address'")
                 if not cur.fetchone():
@@ -249,10 +369,41 @@ class DatabaseBase:
                     )
                 """)
 
+                # Maintenance job schedule + run history (see backend/scheduler.py)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS scheduled_jobs (
+                        job_name         VARCHAR(50) PRIMARY KEY,
+                        next_run_at      DATETIME NOT NULL,
+                        last_started_at  DATETIME DEFAULT NULL,
+                        last_finished_at DATETIME DEFAULT NULL,
+                        last_status      VARCHAR(10) DEFAULT NULL,
+                        last_duration_ms INT DEFAULT NULL,
+                        last_host        VARCHAR(100) DEFAULT NULL,
+                        run_count        INT NOT NULL DEFAULT 0,
+                        fail_count       INT NOT NULL DEFAULT 0
+                    )
+                """)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS job_runs (
+                        run_id      INT AUTO_INCREMENT PRIMARY KEY,
+                        job_name    VARCHAR(50) NOT NULL,
+                        host        VARCHAR(100) DEFAULT NULL,
+                        started_at  DATETIME DEFAULT NULL,
+                        finished_at DATETIME NOT NULL,
+                        duration_ms INT NOT NULL DEFAULT 0,
+                        status      VARCHAR(10) NOT NULL,
+                        result      VARCHAR(255) DEFAULT NULL,
+                        INDEX idx_job_runs_job (job_name, run_id)
+                    )
+                """)
+                # Old activity_log rows, moved by archive_activity_log()
+                cur.execute("CREATE TABLE IF NOT EXISTS activity_log_archive LIKE activity_log")
+
                 # Improve performance of activity logs
                 cur.execute("SHOW INDEX FROM activity_log WHERE Key_name = 'idx_activity_log_created_at'")
                 if not cur.fetchone():
                     cur.execute("CREATE INDEX idx_activity_log_created_at ON activity_log (created_at)")
+                self._ensure_indexes(cur)
 
                 # service_departments junction table (links services to departments)
                 cur.execute("""
@@ -317,52 +468,104 @@ class DatabaseBase:
                 conn.close()
 
     # ── Query helpers ──────────────────────────────────────────────
-    def fetch(self, sql, params=None, one=False):
-        """SELECT helper. Returns list of dicts, or single dict if one=True."""
-        conn = None
-        try:
-            conn = self._get_connection()
-            with conn.cursor(dictionary=True) as cur:
-                cur.execute(sql, params)
-                res = cur.fetchall()
-                if one:
-                    return res[0] if res else None
-                return res
-        except Error:
+    def fetch(self, sql, params=None, one=False, prepared=False, cached=False):
+        """SELECT helper. Returns list of dicts, or single dict if one=True.
+        prepared=True reuses a server-side prepared statement for hot queries.
+        cached=True (or a TTL in seconds) serves repeat calls from the result
+        cache until the TTL runs out or a write touches one of the tables."""
+        site = sys._getframe(1).f_code.co_name
+        if cached:
+            key = QueryCache.key(sql, params)
+            res = self.query_cache.get(key)
+            if res is None:
+                res = self._fetch_rows(sql, params, prepared, site)
+                if res is not None:
+                    self.query_cache.put(key, res, None if cached is True else cached)
+        else:
+            res = self._fetch_rows(sql, params, prepared, site)
+        if res is None:  # query failed
             return None if one else []
+        if one:
+            return res[0] if res else None
+        return res
+
+    def _fetch_rows(self, sql, params, prepared, site):
+        """Run a SELECT and return its rows, or None if it failed."""
+        start = time.perf_counter()
+        conn, res, err = None, [], None
+        try:
+            conn = self._get_connection(read_only=True)
+            if prepared:
+                cur = self._run_prepared(conn, sql, params)
+                cols = cur.column_names
+                res = [dict(zip(cols, r)) for r in cur.fetchall()]
+            else:
+                with conn.cursor(dictionary=True) as cur:
+                    cur.execute(sql, params)
+                    res = cur.fetchall()
+            return res
+        except Error as e:
+            err = e
+            return None
         finally:
             if conn:
-                conn.close()
+                self._release_connection(conn)
+            self.metrics.record(site, "fetch", (time.perf_counter() - start) * 1000,
+                                len(res), err, sql=sql)
 
-    def exec(self, sql, params=None):
+    def exec(self, sql, params=None, prepared=False):
         """INSERT/UPDATE/DELETE helper. Commits and returns lastrowid or rowcount."""
-        conn = None
+        site = sys._getframe(1).f_code.co_name
+        start = time.perf_counter()
+        conn, rows, err = None, 0, None
         try:
-            conn = self._get_connection()
-            with conn.cursor() as cur:
-                cur.execute(sql, params)
+            # A committed prepared write leaves nothing in the session, so the
+            # pool keeps it (and its prepared statements) as is
+            conn = self._get_connection(keep_session=prepared)
+            if prepared:
+                cur = self._run_prepared(conn, sql, params)
                 conn.commit()
-                return cur.lastrowid or cur.rowcount
-        except Error:
+                result = cur.lastrowid or cur.rowcount
+            else:
+                with conn.cursor() as cur:
+                    cur.execute(sql, params)
+                    conn.commit()
+                    result = cur.lastrowid or cur.rowcount
+            rows = max(cur.rowcount, 0)
+            self.invalidate_cache(*tables_in(sql))
+            return result
+        except Error as e:
+            err = e
             return False
         finally:
             if conn:
-                conn.close()
+                self._release_connection(conn)
+            self.metrics.record(site, "exec", (time.perf_counter() - start) * 1000,
+                                rows, err, sql=sql)
 
     def exec_many(self, queries):
         """Run multiple write queries in one transaction.
-        queries = [(sql, params), ...]. Returns total rowcount or False."""
-        conn = None
+        queries = [(sql, params), ...]. Returns total rowcount or False.
+        Consecutive INSERTs with identical SQL are sent as one multi-row batch."""
+        site = sys._getframe(1).f_code.co_name
+        start = time.perf_counter()
+        conn, total, trips, err = None, 0, 0, None
         try:
             conn = self._get_connection()
-            total = 0
             with conn.cursor() as cur:
-                for sql, params in queries:
-                    cur.execute(sql, params or ())
-                    total += cur.rowcount
+                for sql, rows in self._group_inserts(queries):
+                    if len(rows) > 1:
+                        total += self._executemany(cur, sql, rows, site=site)
+                        trips += self._round_trips(sql, len(rows))
+                    else:
+                        cur.execute(sql, rows[0] or ())
+                        total += cur.rowcount
+                        trips += 1
                 conn.commit()
+            self.invalidate_cache(*{t for q, _ in queries for t in tables_in(q)})
             return total
-        except Error:
+        except Error as e:
+            err = e
             try:
                 if conn:
                     conn.rollback()
@@ -371,14 +574,100 @@ class DatabaseBase:
             return False
         finally:
             if conn:
-                conn.close()
+                self._release_connection(conn)
+            self.metrics.record(site, "exec_many", (time.perf_counter() - start) * 1000,
+                                total, err, round_trips=trips,
+                                sql="; ".join(q for q, _ in queries[:3]))
+
+    # ── Bulk writes ────────────────────────────────────────────────
+    @staticmethod
+    def _group_inserts(queries):
+        """Collapse runs of the same INSERT statement into (sql, [params, ...]).
+        Anything else stays as its own (sql, [params]) group, in order."""
+        groups = []
+        for sql, params in queries:
+            if groups and groups[-1][0] == sql and _INSERT_RE.match(sql):
+                groups[-1][1].append(params)
+            else:
+                groups.append((sql, [params]))
+        return groups
+
+    def _round_trips(self, sql, n_rows):
+        """Round trips executemany() needs for *n_rows* of *sql*."""
+        if _INSERT_RE.match(sql):
+            return -(-n_rows // self.BULK_BATCH_SIZE)  # one per chunk
+        return n_rows
+
+    def _executemany(self, cur, sql, rows, site=None):
+        """executemany() on an open cursor in chunks of BULK_BATCH_SIZE.
+        mysql.connector rewrites INSERT ... VALUES into one multi-row statement,
+        so each chunk is a single round trip. Returns total rowcount.
+
+        The shared bulk-write helper for every mixin: it runs inside the
+        caller's transaction (next to its other statements), so committing
+        and invalidate_cache() stay with the caller. Standalone batches can
+        go through exec_many(), which groups identical INSERTs the same way."""
+        rows = [tuple(r) for r in rows]
+        if not rows:
+            return 0
+        site = site or sys._getframe(1).f_code.co_name
+        start = time.perf_counter()
+        total, err = 0, None
+        try:
+            for i in range(0, len(rows), self.BULK_BATCH_SIZE):
+                cur.executemany(sql, rows[i:i + self.BULK_BATCH_SIZE])
+                total += max(cur.rowcount, 0)
+            return total
+        except Error as e:
+            err = e
+            raise
+        finally:
+            self.metrics.record(site, "bulk", (time.perf_counter() - start) * 1000,
+                                len(rows), err, round_trips=self._round_trips(sql, len(rows)),
+                                sql=sql)
+
+    def get_bulk_stats(self):
+        """Return bulk-write counters plus the average rows sent per round trip."""
+        stats = {"calls": 0, "rows": 0, "round_trips": 0}
+        for row in self.metrics.summary(op="bulk"):
+            stats["calls"] += row["calls"]
+            stats["rows"] += row["rows"]
+            stats["round_trips"] += row["round_trips"]
+        trips = stats["round_trips"]
+        stats["rows_per_round_trip"] = round(stats["rows"] / trips, 2) if trips else 0
+        return stats
+
+    # ── Result cache ───────────────────────────────────────────────
+    def invalidate_cache(self, *tables):
+        """Drop cached SELECTs reading from *tables*. exec/exec_many
+        do this automatically; call it after committing on a raw cursor."""
+        if tables:
+            self.query_cache.invalidate(tables)
+
+    def get_cache_stats(self):
+        """Result cache size, hit/miss counts and hit rate."""
+        return self.query_cache.stats()
+
+    # ── Instrumentation ────────────────────────────────────────────
+    def get_query_metrics(self, op=None):
+        """Per-call-site latency summary (calls, errors, rows, avg/p95/max ms)."""
+        return self.metrics.summary(op)
+
+    def export_query_metrics(self, path, fmt="json"):
+        """Write query metrics to *path* as 'json' or 'prometheus' text."""
+        return self.metrics.export(path, fmt)
+
+    def start_metrics_endpoint(self, port=9464):
+        """Serve /metrics and /metrics.json on localhost. Returns the bound port."""
+        return self.metrics.serve(port)
 
     # ── Common lookups (used by multiple mixins) ────────────────────
     def _get_employee_name(self, employee_id):
-        """Return 'First Last' for an employee, or '' if not found."""
+        """Return 'First Last' for an employee, or '' if not found.
+        Served from the query cache - it mostly feeds activity-log lines."""
         row = self.fetch(
             "SELECT CONCAT(first_name,' ',last_name) AS n FROM employees WHERE employee_id=%s",
-            (employee_id,), one=True)
+            (employee_id,), one=True, cached=True)
         return row["n"] if row else ""
 
     def _lookup_patient_id(self, name):
@@ -389,16 +678,58 @@ class DatabaseBase:
         return row["patient_id"] if row else None
 
     def _lookup_role_id(self, role_name):
-        row = self.fetch("SELECT role_id FROM roles WHERE role_name = %s", (role_name,), one=True)
+        row = self.fetch("SELECT role_id FROM roles WHERE role_name = %s", (role_name,),
+                         one=True, cached=True)
         return row["role_id"] if row else None
 
     # ── Activity Log ───────────────────────────────────────────────
     def log_activity(self, action, record_type, detail=""):
         self.exec(
             "INSERT INTO activity_log (user_email, user_role, action, record_type, record_detail) VALUES (%s,%s,%s,%s,%s)",
-            (self._current_user_email, self._current_user_role, action, record_type, detail)
+            (self._current_user_email, self._current_user_role, action, record_type, detail),
+            prepared=True,
         )
 
+    def archive_activity_log(self, days=LOG_RETENTION_DAYS, batch=LOG_ARCHIVE_BATCH):
+        """Move activity_log rows older than *days* to activity_log_archive.
+
+        Works in log_id ranges of *batch* rows, one transaction each, so the
+        log table is never locked for long. Returns the number of rows moved.
+        """
+        bounds = self.fetch(
+            "SELECT MIN(log_id) AS lo, MAX(log_id) AS hi FROM activity_log "
+            "WHERE created_at < NOW() - INTERVAL %s DAY", (days,), one=True)
+        if not bounds or bounds["lo"] is None:
+            return 0
+        moved, lo, hi = 0, bounds["lo"], bounds["hi"]
+        while lo <= hi:
+            top = min(lo + batch - 1, hi)
+            conn = None
+            try:
+                conn = self._get_connection()
+                with conn.cursor() as cur:
+                    cur.execute("INSERT IGNORE INTO activity_log_archive SELECT * FROM activity_log "
+                                "WHERE log_id BETWEEN %s AND %s", (lo, top))
+                    # count the DELETE alone: INSERT IGNORE skips rows already archived
+                    cur.execute("DELETE FROM activity_log WHERE log_id BETWEEN %s AND %s", (lo, top))
+                    deleted = cur.rowcount
+                    conn.commit()
+                moved += deleted
+            except Error:
+                try:
+                    if conn:
+                        conn.rollback()
+                except Exception:
+                    pass
+                break
+            finally:
+                if conn:
+                    self._release_connection(conn)
+            lo = top + 1
+        if moved:
+            self.invalidate_cache("activity_log", "activity_log_archive")
+        return moved
+
     def get_latest_log_id(self):
         """Return the current MAX(log_id) from activity_log - lightweight check."""
         row = self.fetch("SELECT COALESCE(MAX(log_id), 0) AS max_id FROM activity_log", one=True)
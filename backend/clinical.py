@@ -21,7 +21,7 @@ class ClinicalMixin:
             sql += " AND q.doctor_id = %s"
             params = (doctor_id,)
         sql += " ORDER BY q.queue_time"
-        return self.fetch(sql, params)
+        return self.fetch(sql, params, prepared=True)
 
     def get_queue_stats(self, doctor_id=None):
         sql = """
@@ -123,6 +123,7 @@ class ClinicalMixin:
                             (qe["appointment_id"],))
 
                 conn.commit()
+            self.invalidate_cache("invoices", "invoice_items", "appointments")
             self.log_activity("Created", "Invoice", f"Invoice #{inv_id} auto-created from queue #{queue_id}")
             return True
         except Exception as e:
@@ -139,19 +140,21 @@ class ClinicalMixin:
 
     def complete_appointment_from_queue(self, queue_id):
         """Mark the appointment linked to a queue entry as Completed."""
-        row = self.fetch("SELECT appointment_id FROM queue_entries WHERE queue_id=%s", (queue_id,), one=True)
-        if row and row.get("appointment_id"):
-            return self.exec("UPDATE appointments SET status='Completed' WHERE appointment_id=%s",
-                             (row["appointment_id"],))
-        return False
+        return self._transition_from_queue(queue_id, "Completed")
 
     def cancel_appointment_from_queue(self, queue_id):
         """Mark the appointment linked to a queue entry as Cancelled."""
-        row = self.fetch("SELECT appointment_id FROM queue_entries WHERE queue_id=%s", (queue_id,), one=True)
-        if row and row.get("appointment_id"):
-            return self.exec("UPDATE appointments SET status='Cancelled' WHERE appointment_id=%s",
-                             (row["appointment_id"],))
-        return False
+        return self._transition_from_queue(queue_id, "Cancelled")
+
+    def _transition_from_queue(self, queue_id, new_status):
+        """One UPDATE through the queue entry, guarded by STATUS_TRANSITIONS."""
+        allowed = self.STATUS_TRANSITIONS[new_status]
+        return self.exec(f"""
+            UPDATE appointments a
+            INNER JOIN queue_entries q ON q.appointment_id = a.appointment_id
+            SET a.status = %s
+            WHERE q.queue_id = %s AND a.status IN ({','.join(['%s'] * len(allowed))})
+        """, (new_status, queue_id, *allowed))
 
     def sync_today_appointments_to_queue(self):
         conn = None
@@ -165,13 +168,14 @@ class ClinicalMixin:
                       AND a.appointment_id NOT IN (SELECT COALESCE(appointment_id,0) FROM queue_entries WHERE created_at = CURDATE())
                 """)
                 rows = cur.fetchall()
-                for r in rows:
-                    cur.execute("""
-                        INSERT INTO queue_entries (patient_id, doctor_id, appointment_id, queue_time, purpose, status, created_at)
-                        VALUES (%s,%s,%s,%s,%s,'Waiting',CURDATE())
-                    """, (r["patient_id"], r["doctor_id"], r["appointment_id"], r["appointment_time"], r["service_name"]))
+                self._executemany(cur, """
+                    INSERT INTO queue_entries (patient_id, doctor_id, appointment_id, queue_time, purpose, status, created_at)
+                    VALUES (%s,%s,%s,%s,%s,'Waiting',CURDATE())
+                """, [(r["patient_id"], r["doctor_id"], r["appointment_id"], r["appointment_time"], r["service_name"])
+                      for r in rows])
                 conn.commit()
             if rows:
+                self.invalidate_cache("queue_entries")
                 self.log_activity("Created", "Queue", f"Synced {len(rows)} appointments to queue")
             return len(rows)
         except Exception as e:
@@ -215,6 +219,7 @@ class ClinicalMixin:
                         cur.execute("UPDATE queue_entries SET status='In Progress', updated_at=NOW() WHERE queue_id=%s",
                                     (entry["queue_id"],))
                     conn.commit()
+                    self.invalidate_cache("queue_entries")
             if entry:
                 self.log_activity("Edited", "Queue", f"Called next: {entry['patient_name']} (queue #{entry['queue_id']})")
             return entry or {}
@@ -303,10 +308,12 @@ class ClinicalMixin:
                 """, (pid, data.get("appointment_id") or None, data.get("method_id"),
                       effective_discount, grand_total, 0, "Unpaid", data.get("notes", "")))
                 inv_id = cur.lastrowid
-                for sid, qty, up, sub in line_items:
-                    cur.execute("INSERT INTO invoice_items (invoice_id, service_id, quantity, unit_price, subtotal) VALUES (%s,%s,%s,%s,%s)",
-                                (inv_id, sid, qty, up, sub))
+                self._executemany(
+                    cur,
+                    "INSERT INTO invoice_items (invoice_id, service_id, quantity, unit_price, subtotal) VALUES (%s,%s,%s,%s,%s)",
+                    [(inv_id, sid, qty, up, sub) for sid, qty, up, sub in line_items])
                 conn.commit()
+            self.invalidate_cache("invoices", "invoice_items")
             self.log_activity("Created", "Invoice", f"Invoice #{inv_id} for {data['patient_name']}")
             return True
         except Exception as e:
@@ -344,6 +351,7 @@ class ClinicalMixin:
                     p.append(method_id)
                 cur.execute(q + " WHERE invoice_id=%s", p + [invoice_id])
                 conn.commit()
+            self.invalidate_cache("invoices")
             self.log_activity("Edited", "Invoice", f"Payment added to invoice #{invoice_id}")
             return True
         except Exception as e:
@@ -395,7 +403,8 @@ class ClinicalMixin:
         """, (patient_name,))
 
     def get_payment_methods(self):
-        return self.fetch("SELECT method_id, method_name FROM payment_methods ORDER BY method_name")
+        return self.fetch("SELECT method_id, method_name FROM payment_methods ORDER BY method_name",
+                          cached=True)
 
     # ── Services ───────────────────────────────────────────────────────
     def add_service(self, name, price, category="General", departments=None):
@@ -410,12 +419,13 @@ class ClinicalMixin:
                 )
                 new_id = cur.lastrowid
                 if new_id and departments:
-                    for d_id in departments:
-                        cur.execute(
-                            "INSERT INTO service_departments (service_id, department_id) VALUES (%s, %s)",
-                            (new_id, d_id),
-                        )
+                    self._executemany(
+                        cur,
+                        "INSERT INTO service_departments (service_id, department_id) VALUES (%s, %s)",
+                        [(new_id, d_id) for d_id in departments],
+                    )
                 conn.commit()
+            self.invalidate_cache("services", "service_departments")
             self.log_activity("Created", "Service", name)
             return True
         except Exception as e:
@@ -442,12 +452,13 @@ class ClinicalMixin:
                 )
                 if departments is not None:
                     cur.execute("DELETE FROM service_departments WHERE service_id=%s", (service_id,))
-                    for d_id in departments:
-                        cur.execute(
-                            "INSERT INTO service_departments (service_id, department_id) VALUES (%s, %s)",
-                            (service_id, d_id),
-                        )
+                    self._executemany(
+                        cur,
+                        "INSERT INTO service_departments (service_id, department_id) VALUES (%s, %s)",
+                        [(service_id, d_id) for d_id in departments],
+                    )
                 conn.commit()
+            self.invalidate_cache("services", "service_departments")
             self.log_activity("Edited", "Service", name)
             return True
         except Exception as e:
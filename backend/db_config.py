@@ -9,3 +9,99 @@ DB_CONFIG = {
     "connection_timeout": 5,
     "use_pure": True,
 }
+
+# Set to True to use the mysql-connector C extension when it is installed.
+# Falls back to the pure-Python driver if the extension is missing.
+USE_C_EXTENSION = False
+
+# Server-side prepared statements kept per pooled connection (LRU).
+PREPARED_CACHE_SIZE = 32
+
+# Connection pool sizing. The pool opens POOL_MIN_SIZE connections up front
+# and grows to POOL_MAX_SIZE; when all are busy, callers wait up to
+# POOL_ACQUIRE_TIMEOUT seconds. POOL_UI_RESERVED connections are kept for
+# the UI thread so background workers can't exhaust the pool.
+POOL_MIN_SIZE = 2
+POOL_MAX_SIZE = 8
+POOL_ACQUIRE_TIMEOUT = 10
+POOL_UI_RESERVED = 1
+
+# Ping connections idle longer than this (seconds) before reuse, and recycle
+# connections older than POOL_MAX_LIFETIME. The keepalive thread checks idle
+# connections every POOL_KEEPALIVE seconds (0 = off).
+POOL_IDLE_CHECK = 30
+POOL_MAX_LIFETIME = 1800
+POOL_KEEPALIVE = 60
+
+# Reset session state when a connection goes back to the pool.
+# Resetting also drops prepared statements. Read-only checkouts (fetch)
+# skip the reset when POOL_SKIP_RESET_FOR_READS is on; any open read
+# transaction is rolled back instead.
+# Prepared writes (exec(prepared=True)) commit before release and always
+# skip it, so their statements stay prepared for the next call.
+POOL_RESET_SESSION = True
+POOL_SKIP_RESET_FOR_READS = True
+
+# Queries slower than this (ms) are written to the slow-query log,
+# along with any query that raised a database error.
+SLOW_QUERY_MS = 250
+SLOW_QUERY_LOG = "slow_queries.log"
+
+# Result cache for reference data (doctors, services, departments, roles,
+# tax rates, ...). Entries expire after QUERY_CACHE_TTL seconds, so changes
+# made from other workstations show up within that window.
+QUERY_CACHE_SIZE = 256
+QUERY_CACHE_TTL = 60
+
+# Appointment slot length (minutes) and the default number of appointments
+# a doctor takes per day. Used by the availability engine and the booking
+# dialog to decide which slots can still be booked.
+SLOT_MINUTES = 30
+DAILY_QUOTA = 20
+
+# Controlled overbooking driven by the no-show model. A doctor-day can take
+# up to OVERBOOK_MAX_PER_DAY extra bookings, never more than the expected
+# number of no-shows, and only on slots whose booked patient is less likely
+# than OVERBOOK_SHOW_THRESHOLD to show up. Until the model is fitted (it
+# needs NumPy and enough Completed / No-Show history) nothing is overbooked.
+OVERBOOK_ENABLED = True
+OVERBOOK_MAX_PER_DAY = 2
+OVERBOOK_SHOW_THRESHOLD = 0.6
+NOSHOW_RETRAIN_HOURS = 24
+
+# Batch payroll runs prorate each salary by attendance over the working days
+# of the pay period (0 = Monday ... 6 = Sunday). A Half-day counts as
+# PAYROLL_HALF_DAY of a day; Absent counts as nothing.
+PAYROLL_WORKDAYS = (0, 1, 2, 3, 4)
+PAYROLL_HALF_DAY = 0.5
+
+# Cluster-wide maintenance jobs (backend/scheduler.py). Every client checks
+# every SCHEDULER_TICK seconds; the one holding the MySQL lock
+# SCHEDULER_LOCK_NAME runs due jobs. Activity-log rows older than
+# LOG_RETENTION_DAYS are moved to activity_log_archive, LOG_ARCHIVE_BATCH
+# rows per transaction.
+SCHEDULER_ENABLED = True
+SCHEDULER_TICK = 30
+SCHEDULER_LOCK_NAME = "carecrud_scheduler"
+LOG_RETENTION_DAYS = 180
+LOG_ARCHIVE_BATCH = 5000
+
+# In-app notifications: each client checks for new ones every
+# NOTIFY_POLL_SECONDS with one lookup on the unread-notifications index.
+# Notifications written by this client are shown at once.
+NOTIFY_POLL_SECONDS = 30
+
+# PDF receipts and payslips (backend/documents.py). Batches of at least
+# DOCUMENT_POOL_MIN documents are rendered on DOCUMENT_WORKERS processes
+# (0 = one per CPU). The first (regular, bold) font pair in DOCUMENT_FONTS
+# that exists is used for the text; without one the peso sign is written
+# as "PHP".
+DOCUMENT_WORKERS = 0
+DOCUMENT_POOL_MIN = 8
+DOCUMENT_FONTS = (
+    ("C:/Windows/Fonts/segoeui.ttf", "C:/Windows/Fonts/segoeuib.ttf"),
+    ("C:/Windows/Fonts/arial.ttf", "C:/Windows/Fonts/arialbd.ttf"),
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+     "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+    ("/Library/Fonts/Arial Unicode.ttf", None),
+)
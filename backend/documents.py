@@ -0,0 +1,343 @@
+# Document rendering - receipts and payslips to PDF.
+# Templates are Markdown with $placeholders, converted to HTML once per
+# process and filled with string.Template. They are styled with
+# pdf-style.css plus the document rules below and rendered by xhtml2pdf.
+# The stylesheet and the body font (registered with ReportLab) are also
+# loaded once per process. Batches (a payroll run's payslips, a day's
+# receipts) fan out over a process pool and are written to a folder and/or
+# merged into one PDF.
+
+import html
+import io
+import multiprocessing
+import os
+import re
+import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from functools import lru_cache
+
+try:
+    import markdown
+    from xhtml2pdf import pisa, default as pisa_default
+    from reportlab.lib.fonts import addMapping
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+except ImportError:  # PDF export is unavailable without them
+    markdown = pisa = None
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # only needed to merge a batch into one file
+    PdfReader = PdfWriter = None
+
+from backend.db_config import DOCUMENT_FONTS, DOCUMENT_WORKERS, DOCUMENT_POOL_MIN
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_BODY_FONT = "DocBody"
+
+# Document rules on top of pdf-style.css
+_DOC_CSS = """
+h1 { font-size: 20px; margin: 0; color: #388087; }
+.sub { color: #7F8C8D; margin: 0 0 10px 0; }
+table.meta td { padding: 2px 6px; }
+table.items th { background-color: #F0F7F8; text-align: left; }
+table.items td, table.items th { border-bottom: 0.5px solid #BADFE7; }
+.num { text-align: right; }
+table.totals td { padding: 3px 6px; }
+tr.grand td { font-weight: bold; font-size: 12px; border-top: 1px solid #2C3E50; }
+.foot { text-align: center; color: #7F8C8D; margin-top: 16px; }
+"""
+
+_SOURCES = {
+    "receipt": """
+# CareCRUD
+
+<p class="sub">Healthcare Management System &middot; Official Receipt</p>
+
+<table class="meta">
+<tr><td>Invoice #</td><td>$invoice_id</td><td>Date</td><td>$date</td></tr>
+<tr><td>Patient</td><td>$patient_name</td><td>Phone</td><td>$phone</td></tr>
+<tr><td>Payment</td><td>$payment_method</td><td>Status</td><td>$status</td></tr>
+</table>
+
+<table class="items">
+<tr><th>Service</th><th class="num">Qty</th><th class="num">Unit Price</th><th class="num">Amount</th></tr>
+$item_rows
+</table>
+
+<table class="totals">
+$total_rows
+</table>
+
+<p class="foot">Thank you for choosing us!</p>
+""",
+    "payslip": """
+# CareCRUD
+
+<p class="sub">Payslip &middot; $period_from to $period_until</p>
+
+<table class="meta">
+<tr><td>Employee</td><td>$employee_name</td><td>Request #</td><td>$request_id</td></tr>
+<tr><td>Role</td><td>$role_name</td><td>Department</td><td>$department_name</td></tr>
+<tr><td>Status</td><td>$status</td><td>Disbursed</td><td>$disbursed_at</td></tr>
+</table>
+
+<table class="items">
+<tr><th>Earnings / Deductions</th><th class="num">Amount</th></tr>
+<tr><td>Gross pay</td><td class="num">$amount</td></tr>
+<tr><td>SSS (employee share)</td><td class="num">-$sss_deduction</td></tr>
+<tr><td>PhilHealth (employee share)</td><td class="num">-$philhealth_deduction</td></tr>
+<tr><td>Hospital share</td><td class="num">-$hospital_share</td></tr>
+<tr class="grand"><td>Net pay</td><td class="num">$net_amount</td></tr>
+</table>
+
+<p class="foot">Requested by $requested_by_name &middot; Approved by $decided_by_name</p>
+""",
+}
+
+
+# ── Per-process caches ────────────────────────────────────────────
+@lru_cache(maxsize=None)
+def _body_font():
+    """Register the first DOCUMENT_FONTS entry that exists.
+    Returns (font name, has peso glyph) or (None, False)."""
+    for regular, bold in DOCUMENT_FONTS:
+        if not os.path.exists(regular):
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont(_BODY_FONT, regular))
+            bold_name = _BODY_FONT
+            if bold and os.path.exists(bold):
+                bold_name = _BODY_FONT + "-Bold"
+                pdfmetrics.registerFont(TTFont(bold_name, bold))
+        except Exception:
+            continue
+        addMapping(_BODY_FONT, 0, 0, _BODY_FONT)
+        addMapping(_BODY_FONT, 1, 0, bold_name)
+        addMapping(_BODY_FONT, 0, 1, _BODY_FONT)
+        addMapping(_BODY_FONT, 1, 1, bold_name)
+        pisa_default.DEFAULT_FONT[_BODY_FONT.lower()] = _BODY_FONT
+        face = pdfmetrics.getFont(_BODY_FONT).face
+        return _BODY_FONT, 0x20B1 in face.charToGlyph
+    return None, False
+
+
+@lru_cache(maxsize=None)
+def _stylesheet():
+    try:
+        with open(os.path.join(_ROOT, "pdf-style.css"), encoding="utf-8") as f:
+            css = f.read()
+    except OSError:
+        css = ""
+    font, _ = _body_font()
+    if font:
+        css += f"\nbody {{ font-family: {font}; }}\n"
+    return css + _DOC_CSS
+
+
+@lru_cache(maxsize=None)
+def _template(kind):
+    """The compiled page template for *kind* ('receipt' or 'payslip')."""
+    body = markdown.markdown(_SOURCES[kind])
+    return string.Template(
+        "<html><head><meta charset=\"utf-8\"><style>" + _stylesheet().replace("$", "$$")
+        + "</style></head><body>" + body + "</body></html>")
+
+
+def warm_up():
+    """Load font, stylesheet and templates now (pool initializer)."""
+    if pisa is None:
+        return
+    for kind in _SOURCES:
+        _template(kind)
+
+
+# ── Rendering ─────────────────────────────────────────────────────
+def _money(value):
+    return f"₱{float(value or 0):,.2f}"
+
+
+def _esc(value, empty="—"):
+    return html.escape(str(value)) if value not in (None, "") else empty
+
+
+def safe_filename(text):
+    """*text* reduced to letters, digits, '.', '-' and '_' for use in a file name."""
+    return re.sub(r"[^\w.-]+", "_", str(text or "")).strip("._") or "unnamed"
+
+
+def receipt_context(detail):
+    """Template values for an invoice from get_invoice_detail()."""
+    info, items = detail["info"], detail["items"]
+    total = float(info.get("total_amount") or 0)
+    paid = float(info.get("amount_paid") or 0)
+    subtotal = sum(float(it.get("unit_price") or 0) * int(it.get("quantity") or 1) for it in items)
+    rows = "".join(
+        f"<tr><td>{_esc(it.get('service_name'))}</td><td class=\"num\">{int(it.get('quantity') or 1)}</td>"
+        f"<td class=\"num\">{_money(it.get('unit_price'))}</td>"
+        f"<td class=\"num\">{_money(it.get('subtotal'))}</td></tr>" for it in items)
+    totals = []
+    if subtotal - total > 0:
+        totals += [("Subtotal", _money(subtotal), False),
+                   ("Discount", "-" + _money(subtotal - total), False)]
+    totals += [("TOTAL", _money(total), True), ("Amount paid", _money(paid), False)]
+    if total - paid > 0:
+        totals.append(("Balance due", _money(total - paid), True))
+    return {
+        "invoice_id": _esc(info.get("invoice_id")),
+        "date": _esc(str(info.get("created_at") or "")[:19]),
+        "patient_name": _esc(info.get("patient_name")),
+        "phone": _esc(info.get("phone")),
+        "payment_method": _esc(info.get("payment_method")),
+        "status": _esc(info.get("status")),
+        "item_rows": rows,
+        "total_rows": "".join(
+            ("<tr class=\"grand\">" if grand else "<tr>")
+            + f"<td>{label}</td><td class=\"num\">{val}</td></tr>" for label, val, grand in totals),
+    }
+
+
+def payslip_context(req):
+    """Template values for one paycheck request row."""
+    ctx = {k: _esc(req.get(k)) for k in (
+        "request_id", "employee_name", "role_name", "department_name", "status",
+        "period_from", "period_until", "requested_by_name", "decided_by_name")}
+    ctx["disbursed_at"] = _esc(str(req.get("disbursed_at") or "")[:16])
+    for k in ("amount", "sss_deduction", "philhealth_deduction", "hospital_share", "net_amount"):
+        ctx[k] = _money(req.get(k))
+    return ctx
+
+
+def render_html(kind, ctx):
+    text = _template(kind).safe_substitute(ctx)
+    if not _body_font()[1]:
+        text = text.replace("₱", "PHP ")  # the built-in fonts have no peso sign
+    return text
+
+
+def render_pdf(kind, ctx):
+    """One document as PDF bytes."""
+    if pisa is None:
+        raise RuntimeError("PDF export needs the 'markdown', 'xhtml2pdf' and 'reportlab' packages.")
+    out = io.BytesIO()
+    result = pisa.CreatePDF(render_html(kind, ctx), dest=out, encoding="utf-8")
+    if result.err:
+        raise RuntimeError(f"Could not render {kind} ({result.err} error(s)).")
+    return out.getvalue()
+
+
+def _render_one(job):
+    """Pool task: render and optionally write one document."""
+    kind, ctx, path = job
+    data = render_pdf(kind, ctx)
+    if path:
+        with open(path, "wb") as f:
+            f.write(data)
+    return data
+
+
+def render_batch(kind, contexts, names=None, out_dir=None, merged_path=None, workers=None):
+    """Render many documents of one *kind*.
+
+    Each PDF goes to *out_dir* (as names[i] or '<kind>_<i>.pdf') and/or all
+    of them, in order, into one *merged_path*. Batches of DOCUMENT_POOL_MIN
+    or more use a process pool of *workers* (DOCUMENT_WORKERS, 0 = per CPU).
+
+    Returns {'count', 'files', 'merged', 'seconds', 'per_second', 'workers'}.
+    """
+    if merged_path and PdfWriter is None:
+        raise RuntimeError("Merging PDFs needs the 'pypdf' package.")
+    contexts = list(contexts)
+    start = time.perf_counter()
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    paths = [os.path.join(out_dir, names[i] if names else f"{kind}_{i + 1}.pdf") if out_dir else None
+             for i in range(len(contexts))]
+    jobs = [(kind, ctx, path) for ctx, path in zip(contexts, paths)]
+    workers = workers if workers is not None else (DOCUMENT_WORKERS or os.cpu_count() or 1)
+    if workers > 1 and len(jobs) >= DOCUMENT_POOL_MIN:
+        # spawn, not fork: callers may run this off a worker thread of a Qt
+        # process, and forking a threaded process can deadlock the children.
+        with ProcessPoolExecutor(max_workers=workers, initializer=warm_up,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            pdfs = list(pool.map(_render_one, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        workers = 1
+        pdfs = [_render_one(job) for job in jobs]
+    if merged_path:
+        writer = PdfWriter()
+        for data in pdfs:
+            for page in PdfReader(io.BytesIO(data)).pages:
+                writer.add_page(page)
+        with open(merged_path, "wb") as f:
+            writer.write(f)
+    elapsed = time.perf_counter() - start
+    return {"count": len(pdfs), "files": [p for p in paths if p], "merged": merged_path,
+            "seconds": round(elapsed, 3), "workers": workers,
+            "per_second": round(len(pdfs) / elapsed, 1) if elapsed else 0.0}
+
+
+class DocumentMixin:
+
+    def render_receipt(self, invoice_id, path):
+        """Write one invoice receipt to *path*. Returns path or an error string."""
+        detail = self.get_invoice_detail(invoice_id)
+        if not detail:
+            return "Could not load invoice details."
+        try:
+            _render_one(("receipt", receipt_context(detail), path))
+            return path
+        except Exception as e:
+            return str(e)
+
+    def render_day_receipts(self, day=None, out_dir=None, merged_path=None, workers=None):
+        """Receipts for every invoice created on *day* (default today).
+        Two queries for the whole day. Returns render_batch() stats or an error string."""
+        day = day or date.today()
+        if isinstance(day, str):
+            day = date.fromisoformat(day[:10])
+        infos = self.fetch("""
+            SELECT i.*, CONCAT(p.first_name,' ',p.last_name) AS patient_name,
+                   p.phone, p.email, COALESCE(pm.method_name,'—') AS payment_method
+            FROM invoices i INNER JOIN patients p ON i.patient_id = p.patient_id
+            LEFT JOIN payment_methods pm ON i.method_id = pm.method_id
+            WHERE i.created_at >= %s AND i.created_at < %s
+            ORDER BY i.invoice_id
+        """, (day, day + timedelta(days=1)))
+        if not infos:
+            return "No invoices on this day."
+        ids = [i["invoice_id"] for i in infos]
+        items = {}
+        for it in self.fetch(f"""
+            SELECT ii.invoice_id, s.service_name, ii.quantity, ii.unit_price, ii.subtotal
+            FROM invoice_items ii INNER JOIN services s ON ii.service_id = s.service_id
+            WHERE ii.invoice_id IN ({','.join(['%s'] * len(ids))})
+        """, ids):
+            items.setdefault(it["invoice_id"], []).append(it)
+        try:
+            return render_batch(
+                "receipt", [receipt_context({"info": i, "items": items.get(i["invoice_id"], [])})
+                            for i in infos],
+                names=[f"receipt_{i['invoice_id']}.pdf" for i in infos],
+                out_dir=out_dir, merged_path=merged_path, workers=workers)
+        except Exception as e:
+            return str(e)
+
+    def render_payroll_payslips(self, run_id, out_dir=None, merged_path=None, workers=None):
+        """Payslips for every paycheck of payroll run *run_id*, in one query.
+        Returns render_batch() stats or an error string."""
+        rows = self.fetch(self._PAYCHECK_SELECT + """
+            WHERE pr.run_id = %s ORDER BY d.department_name, employee_name
+        """, (run_id,))
+        if not rows:
+            return "No paychecks in this payroll run."
+        try:
+            return render_batch(
+                "payslip", [payslip_context(r) for r in rows],
+                names=[f"payslip_{r['request_id']}_{safe_filename(r['employee_name'])}.pdf"
+                       for r in rows],
+                out_dir=out_dir, merged_path=merged_path, workers=workers)
+        except Exception as e:
+            return str(e)
@@ -1,16 +1,111 @@
 # Employee CRUD + HR stuff (leave requests, salary, etc)
 
+import threading
+import time
 import traceback
+from calendar import monthrange
+from datetime import date, timedelta
+
+from backend.availability import _as_date
+from backend.db_config import QUERY_CACHE_TTL
+from backend.intervals import LeaveIndex
+from backend.payroll import count_workdays
+
+
+class HRSnapshot:
+    """Everything the HR overview shows, derived from one employees scan.
+
+    Kept until a write to employees, roles or departments (see invalidate())
+    or for *max_age* seconds, so edits from other workstations show up like
+    they do through the query cache.
+    """
+
+    _TABLES = {"employees", "roles", "departments"}
+
+    def __init__(self, backend, max_age=QUERY_CACHE_TTL):
+        self._backend = backend
+        self._lock = threading.Lock()
+        self._max_age = max_age
+        self._data = None
+        self._built_at = 0.0
+
+    def invalidate(self, tables):
+        if self._TABLES & {t.lower() for t in tables}:
+            self._data = None
+
+    def get(self):
+        with self._lock:
+            if self._data is None or time.monotonic() - self._built_at > self._max_age:
+                rows = self._backend.get_employees(detailed=True)
+                if rows or self._data is None:
+                    self._data = self._build(rows)
+                    # an empty result may be a failed query - retry on the next read
+                    self._built_at = time.monotonic() if rows else 0.0
+            data = self._data
+        # Copies, so a caller editing its rows can't change what others see
+        return {k: [dict(r) for r in v] if isinstance(v, list) else dict(v)
+                for k, v in data.items()}
+
+    @staticmethod
+    def _build(rows):
+        stats = {"total": len(rows), "doctors": 0, "active": 0, "on_leave": 0,
+                 "inactive": 0, "avg_salary": 0, "total_payroll": 0}
+        salaries, depts, types, on_leave = [], {}, {}, []
+        for e in rows:
+            status, salary = e["status"], e.get("salary")
+            if e["role_name"] == "Doctor":
+                stats["doctors"] += 1
+            if status == "Active":
+                stats["active"] += 1
+                stats["total_payroll"] += salary or 0
+                dept = depts.setdefault(e["department_name"], {
+                    "department_name": e["department_name"], "headcount": 0,
+                    "total_salary": 0, "paid": 0})
+                dept["headcount"] += 1
+                if salary is not None:
+                    dept["total_salary"] += salary
+                    dept["paid"] += 1
+                types[e["employment_type"]] = types.get(e["employment_type"], 0) + 1
+            elif status == "On Leave":
+                stats["on_leave"] += 1
+                on_leave.append(e)
+            elif status == "Inactive":
+                stats["inactive"] += 1
+            if salary is not None:
+                salaries.append(salary)
+        if salaries:
+            stats["avg_salary"] = sum(salaries) / len(salaries)
+        for dept in depts.values():
+            paid = dept.pop("paid")
+            dept["avg_salary"] = dept["total_salary"] / paid if paid else 0
+        # Same order as the per-widget queries: NULL leave_until first
+        on_leave.sort(key=lambda e: (e["leave_until"] is not None, e["leave_until"] or date.min))
+        return {
+            "employees": rows,
+            "stats": stats,
+            "payroll_by_department": sorted(depts.values(), key=lambda d: d["total_salary"],
+                                            reverse=True),
+            "employment_types": [{"employment_type": t, "cnt": n} for t, n in
+                                 sorted(types.items(), key=lambda kv: kv[1], reverse=True)],
+            "on_leave": on_leave,
+        }
 
 
 class EmployeeMixin:
 
+    ATTENDANCE_PAGE_SIZE = 100    # rows per get_attendance_window() page
+    ATTENDANCE_DEFAULT_DAYS = 31  # range when no start date is given
+    PAYCHECK_PAGE_SIZE = 100      # rows per get_paycheck_requests_page() page
+    _leave_index = None           # LeaveIndex, see get_leave_index()
+    _hr_snapshot = None           # HRSnapshot, see get_hr_snapshot()
+
     def _split_name(self, full_name):
         parts = full_name.split(None, 1)
         return parts[0], parts[1] if len(parts) > 1 else ""
 
     def _lookup_dept_id(self, dept_name):
-        row = self.fetch("SELECT department_id FROM departments WHERE department_name = %s", (dept_name,), one=True)
+        row = self.fetch("SELECT department_id FROM departments WHERE department_name = %s", (dept_name,),
+                         one=True, cached=True)
         return row["department_id"] if row else None
 
     def get_employees(self, detailed=False):
@@ -93,6 +188,20 @@ class EmployeeMixin:
             GROUP BY employment_type ORDER BY cnt DESC
         """)
 
+    def get_hr_snapshot(self):
+        """HR overview from one employees scan, cached until an employee write.
+
+        Returns {'employees', 'stats', 'payroll_by_department',
+        'employment_types', 'on_leave'}, each shaped like the result of
+        get_employees_detailed(), get_hr_stats(), get_payroll_summary(),
+        get_employment_type_counts() and get_leave_employees().
+        """
+        snap = EmployeeMixin._hr_snapshot
+        if snap is None:
+            snap = EmployeeMixin._hr_snapshot = HRSnapshot(self)
+            self.query_cache.add_listener(snap.invalidate)
+        return snap.get()
+
     def check_duplicate_phone(self, phone):
         """Return dict with employee_id & full_name if phone is already used, else None."""
         return self.fetch(
@@ -150,6 +259,7 @@ class EmployeeMixin:
                             "VALUES (%s,%s,%s,%s,1)",
                             (email, pw, data["name"], role_id))
                 conn.commit()
+            self.invalidate_cache("employees", "users")
             self.log_activity("Created", "Employee", data["name"])
             return True
         except Exception as e:
@@ -213,6 +323,7 @@ class EmployeeMixin:
                                 "VALUES (%s,%s,%s,%s,1)",
                                 (new_email, pw, data["name"], role_id))
                 conn.commit()
+            self.invalidate_cache("employees", "users")
             self.log_activity("Edited", "Employee", data["name"])
             return True
         except Exception as e:
@@ -248,7 +359,8 @@ class EmployeeMixin:
 
     def get_all_departments(self):
         """Return all departments ordered by name."""
-        return self.fetch("SELECT department_id, department_name FROM departments ORDER BY department_name")
+        return self.fetch("SELECT department_id, department_name FROM departments ORDER BY department_name",
+                          cached=True)
 
     def add_department(self, name):
         """Create a new department. Returns True on success."""
@@ -313,7 +425,7 @@ class EmployeeMixin:
                    SELECT full_name FROM users WHERE email = %s LIMIT 1
                )
             LIMIT 1
-        """, (email, email), one=True)
+        """, (email, email), one=True, prepared=True)
         return row["employee_id"] if row else None
 
     def submit_leave_request(self, employee_id, leave_from, leave_until, reason):
@@ -375,8 +487,28 @@ class EmployeeMixin:
             ORDER BY lr.created_at DESC
         """, (employee_id,))
 
+    def get_leave_index(self):
+        """Shared in-memory LeaveIndex of approved leave."""
+        idx = EmployeeMixin._leave_index
+        if idx is None:
+            idx = EmployeeMixin._leave_index = LeaveIndex(self)
+            self.query_cache.add_listener(idx.invalidate)
+        return idx
+
+    def get_employees_on_leave(self, day=None):
+        """{employee_id: (leave_from, leave_until)} for approved leave covering *day* (default today)."""
+        return self.get_leave_index().on_leave(day)
+
+    def find_leave_overlaps(self, employee_id, leave_from, leave_until, exclude_request_id=None):
+        """Approved leave of an employee that overlaps leave_from..leave_until."""
+        return self.get_leave_index().overlaps(employee_id, leave_from, leave_until,
+                                               exclude_request_id)
+
     def approve_leave_request(self, request_id, hr_employee_id):
-        """HR approves a leave request. Updates employee status to On Leave."""
+        """HR approves a leave request. Updates employee status to On Leave.
+
+        Refused when it overlaps leave the employee already has approved.
+        """
         try:
             conn = self._get_connection()
             with conn.cursor(dictionary=True) as cur:
@@ -387,6 +519,11 @@ class EmployeeMixin:
                 if not req:
                     return "Request not found or already decided."
                 emp_id = req["employee_id"]
+                clash = self.find_leave_overlaps(emp_id, req["leave_from"], req["leave_until"],
+                                                 exclude_request_id=request_id)
+                if clash:
+                    return "Overlaps approved leave " + ", ".join(
+                        f"{c['leave_from']} to {c['leave_until']}" for c in clash) + "."
                 # Update request
                 cur.execute(
                     "UPDATE leave_requests SET status='Approved', hr_decided_by=%s, "
@@ -408,10 +545,10 @@ class EmployeeMixin:
                 # Create notification for employee
                 msg = (f"Your leave request ({req['leave_from']} to {req['leave_until']}) "
                        f"has been approved.")
-                cur.execute(
-                    "INSERT INTO notifications (employee_id, message) VALUES (%s, %s)",
-                    (emp_id, msg))
+                notif = self._notify(cur, emp_id, msg)
                 conn.commit()
+            self.publish_notifications(notif)
+            self.invalidate_cache("employees", "leave_requests", "appointments")
             self.log_activity("Approved", "Leave",
                               f"Approved leave for {emp_name} ({req['leave_from']} to {req['leave_until']})")
             return True
@@ -442,10 +579,10 @@ class EmployeeMixin:
                 # Notification
                 msg = (f"Your leave request ({req['leave_from']} to {req['leave_until']}) "
                        f"has been declined. Reason: {hr_note}")
-                cur.execute(
-                    "INSERT INTO notifications (employee_id, message) VALUES (%s, %s)",
-                    (emp_id, msg))
+                notif = self._notify(cur, emp_id, msg)
                 conn.commit()
+            self.invalidate_cache("leave_requests")
+            self.publish_notifications(notif)
             self.log_activity("Declined", "Leave",
                               f"Declined leave for {emp_name}: {hr_note}")
             return True
@@ -457,20 +594,6 @@ class EmployeeMixin:
                 pass
             return str(e)
 
-    def get_unread_notifications(self, employee_id):
-        """Get unread notifications for an employee."""
-        return self.fetch(
-            "SELECT notification_id, message, created_at FROM notifications "
-            "WHERE employee_id=%s AND is_read=0 ORDER BY created_at DESC",
-            (employee_id,))
-
-    def mark_notifications_read(self, employee_id):
-        """Mark all notifications as read for an employee."""
-        ok = self.exec("UPDATE notifications SET is_read=1 WHERE employee_id=%s AND is_read=0",
-                       (employee_id,))
-        if ok:
-            self.log_activity("Edited", "Notification", f"Marked notifications read for employee #{employee_id}")
-
     # ── Leave Auto-Expiry ─────────────────────────────────────
 
     def auto_expire_leaves(self):
@@ -499,12 +622,13 @@ class EmployeeMixin:
             conn = self._get_connection()
             with conn.cursor() as cur:
                 cur.execute("DELETE FROM doctor_schedules WHERE doctor_id=%s", (doctor_id,))
-                for s in schedules:
-                    cur.execute(
-                        "INSERT INTO doctor_schedules (doctor_id, day_of_week, start_time, end_time) "
-                        "VALUES (%s,%s,%s,%s)",
-                        (doctor_id, s['day_of_week'], s['start_time'], s['end_time']))
+                self._executemany(
+                    cur,
+                    "INSERT INTO doctor_schedules (doctor_id, day_of_week, start_time, end_time) "
+                    "VALUES (%s,%s,%s,%s)",
+                    [(doctor_id, s['day_of_week'], s['start_time'], s['end_time']) for s in schedules])
                 conn.commit()
+            self.invalidate_cache("doctor_schedules")
             name = self._get_employee_name(doctor_id) or str(doctor_id)
             self.log_activity("Edited", "Schedule", f"Updated schedule for Dr. {name}")
             return True
@@ -554,52 +678,74 @@ class EmployeeMixin:
             traceback.print_exc()
             return str(e)
 
+    # Paycheck listings: requester and Finance decider resolved with one join each
+    _PAYCHECK_SELECT = """
+        SELECT pr.request_id, pr.employee_id,
+               CONCAT(e.first_name,' ',e.last_name) AS employee_name,
+               r.role_name, d.department_name, e.salary,
+               pr.amount, pr.sss_deduction, pr.philhealth_deduction,
+               pr.hospital_share, pr.net_amount,
+               pr.period_from, pr.period_until,
+               pr.status, pr.finance_note, pr.decided_at,
+               pr.disbursed_at, pr.created_at,
+               CONCAT(h.first_name,' ',h.last_name) AS requested_by_name,
+               CONCAT(f.first_name,' ',f.last_name) AS decided_by_name
+        FROM paycheck_requests pr
+        INNER JOIN employees e ON pr.employee_id = e.employee_id
+        INNER JOIN roles r ON e.role_id = r.role_id
+        INNER JOIN departments d ON e.department_id = d.department_id
+        INNER JOIN employees h ON pr.requested_by = h.employee_id
+        LEFT  JOIN employees f ON pr.finance_decided_by = f.employee_id
+    """
+
     def get_pending_paycheck_requests(self):
         """Finance: get all pending paycheck requests."""
-        return self.fetch("""
-            SELECT pr.request_id, pr.employee_id,
-                   CONCAT(e.first_name,' ',e.last_name) AS employee_name,
-                   r.role_name, d.department_name,
-                   e.salary,
-                   pr.amount, pr.sss_deduction, pr.philhealth_deduction,
-                   pr.hospital_share, pr.net_amount,
-                   pr.period_from, pr.period_until,
-                   pr.status, pr.created_at,
-                   CONCAT(h.first_name,' ',h.last_name) AS requested_by_name
-            FROM paycheck_requests pr
-            INNER JOIN employees e ON pr.employee_id = e.employee_id
-            INNER JOIN roles r ON e.role_id = r.role_id
-            INNER JOIN departments d ON e.department_id = d.department_id
-            INNER JOIN employees h ON pr.requested_by = h.employee_id
+        return self.fetch(self._PAYCHECK_SELECT + """
             WHERE pr.status = 'Pending'
-            ORDER BY pr.created_at ASC
+            ORDER BY pr.created_at ASC, pr.request_id ASC
         """)
 
-    def get_all_paycheck_requests(self):
-        """Get all paycheck requests (all statuses)."""
-        return self.fetch("""
-            SELECT pr.request_id, pr.employee_id,
-                   CONCAT(e.first_name,' ',e.last_name) AS employee_name,
-                   r.role_name, d.department_name,
-                   e.salary,
-                   pr.amount, pr.sss_deduction, pr.philhealth_deduction,
-                   pr.hospital_share, pr.net_amount,
-                   pr.period_from, pr.period_until,
-                   pr.status, pr.finance_note, pr.decided_at,
-                   pr.disbursed_at, pr.created_at,
-                   CONCAT(h.first_name,' ',h.last_name) AS requested_by_name,
-                   CASE WHEN pr.finance_decided_by IS NOT NULL
-                        THEN (SELECT CONCAT(f.first_name,' ',f.last_name)
-                              FROM employees f WHERE f.employee_id = pr.finance_decided_by)
-                        ELSE NULL END AS decided_by_name
-            FROM paycheck_requests pr
-            INNER JOIN employees e ON pr.employee_id = e.employee_id
-            INNER JOIN roles r ON e.role_id = r.role_id
-            INNER JOIN departments d ON e.department_id = d.department_id
-            INNER JOIN employees h ON pr.requested_by = h.employee_id
-            ORDER BY pr.created_at DESC
+    def get_all_paycheck_requests(self, status=None):
+        """Get all paycheck requests, optionally of one status, newest first."""
+        if status:
+            return self.fetch(self._PAYCHECK_SELECT + """
+                WHERE pr.status = %s ORDER BY pr.created_at DESC, pr.request_id DESC
+            """, (status,))
+        return self.fetch(self._PAYCHECK_SELECT + """
+            ORDER BY pr.created_at DESC, pr.request_id DESC
         """)
 
+    def get_paycheck_requests_page(self, status=None, employee_id=None, cursor=None,
+                                   limit=None, oldest_first=False):
+        """One page of paycheck requests, newest first (or oldest with *oldest_first*).
+
+        Keyset pagination on (created_at, request_id) within *status*, served
+        by idx_paycheck_requests_status_created (idx_paycheck_requests_created
+        without a status). *cursor* is the 'next_cursor' of the previous page.
+
+        Returns {'rows': [...], 'next_cursor': tuple or None}.
+        """
+        limit = limit or self.PAYCHECK_PAGE_SIZE
+        where, params = [], []
+        if status:
+            where.append("pr.status = %s"); params.append(status)
+        if employee_id:
+            where.append("pr.employee_id = %s"); params.append(employee_id)
+        order = "ASC" if oldest_first else "DESC"
+        if cursor:
+            where.append(f"(pr.created_at, pr.request_id) {'>' if oldest_first else '<'} (%s, %s)")
+            params += list(cursor)
+        rows = self.fetch(self._PAYCHECK_SELECT + f"""
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            ORDER BY pr.created_at {order}, pr.request_id {order}
+            LIMIT %s
+        """, (*params, limit + 1))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (str(rows[-1]["created_at"]), rows[-1]["request_id"])
+        return {"rows": rows, "next_cursor": next_cursor}
+
     def get_employee_activity_for_period(self, employee_id, from_date, to_date):
         """Return appointments and services for an employee during a period."""
         return self.fetch("""
@@ -631,10 +777,10 @@ class EmployeeMixin:
                 emp_name = self._get_employee_name(req["employee_id"]) or str(req["employee_id"])
                 # Notify the HR who requested
                 msg = f"Paycheck request for {emp_name} (₱{float(req['amount']):,.2f}) has been approved."
-                cur.execute(
-                    "INSERT INTO notifications (employee_id, message) VALUES (%s, %s)",
-                    (req["requested_by"], msg))
+                notif = self._notify(cur, req["requested_by"], msg)
                 conn.commit()
+            self.invalidate_cache("paycheck_requests")
+            self.publish_notifications(notif)
             self.log_activity("Approved", "Paycheck",
                               f"Approved paycheck for {emp_name}: ₱{float(req['amount']):,.2f}")
             return True
@@ -662,10 +808,10 @@ class EmployeeMixin:
                     (finance_employee_id, note, request_id))
                 emp_name = self._get_employee_name(req["employee_id"]) or str(req["employee_id"])
                 msg = f"Paycheck request for {emp_name} has been rejected. Reason: {note}"
-                cur.execute(
-                    "INSERT INTO notifications (employee_id, message) VALUES (%s, %s)",
-                    (req["requested_by"], msg))
+                notif = self._notify(cur, req["requested_by"], msg)
                 conn.commit()
+            self.invalidate_cache("paycheck_requests")
+            self.publish_notifications(notif)
             self.log_activity("Rejected", "Paycheck",
                               f"Rejected paycheck for {emp_name}: {note}")
             return True
@@ -694,10 +840,10 @@ class EmployeeMixin:
                 emp_name = self._get_employee_name(req["employee_id"]) or str(req["employee_id"])
                 # Notify the employee
                 msg = f"Your paycheck of ₱{float(req['amount']):,.2f} for period {req['period_from']} to {req['period_until']} has been disbursed."
-                cur.execute(
-                    "INSERT INTO notifications (employee_id, message) VALUES (%s, %s)",
-                    (req["employee_id"], msg))
+                notif = self._notify(cur, req["employee_id"], msg)
                 conn.commit()
+            self.invalidate_cache("paycheck_requests")
+            self.publish_notifications(notif)
             self.log_activity("Edited", "Paycheck",
                               f"Disbursed paycheck for {emp_name}: ₱{float(req['amount']):,.2f}")
             return True
@@ -711,27 +857,9 @@ class EmployeeMixin:
 
     def get_paycheck_history(self, employee_id):
         """Return all paycheck requests for a specific employee, newest first."""
-        return self.fetch("""
-            SELECT pr.request_id, pr.employee_id,
-                   CONCAT(e.first_name,' ',e.last_name) AS employee_name,
-                   r.role_name, d.department_name, e.salary,
-                   pr.amount, pr.sss_deduction, pr.philhealth_deduction,
-                   pr.hospital_share, pr.net_amount,
-                   pr.period_from, pr.period_until,
-                   pr.status, pr.finance_note, pr.decided_at,
-                   pr.disbursed_at, pr.created_at,
-                   CONCAT(h.first_name,' ',h.last_name) AS requested_by_name,
-                   CASE WHEN pr.finance_decided_by IS NOT NULL
-                        THEN (SELECT CONCAT(f.first_name,' ',f.last_name)
-                              FROM employees f WHERE f.employee_id = pr.finance_decided_by)
-                        ELSE NULL END AS decided_by_name
-            FROM paycheck_requests pr
-            INNER JOIN employees e ON pr.employee_id = e.employee_id
-            INNER JOIN roles r ON e.role_id = r.role_id
-            INNER JOIN departments d ON e.department_id = d.department_id
-            INNER JOIN employees h ON pr.requested_by = h.employee_id
+        return self.fetch(self._PAYCHECK_SELECT + """
             WHERE pr.employee_id = %s
-            ORDER BY pr.created_at DESC
+            ORDER BY pr.created_at DESC, pr.request_id DESC
         """, (employee_id,))
 
     def get_last_disbursed_paycheck(self, employee_id):
@@ -755,7 +883,7 @@ class EmployeeMixin:
     # ── Attendance System ──────────────────────────────────────────────────
 
     def get_all_attendance(self):
-        """Fetch all attendance records for HR."""
+        """Fetch all attendance records for HR. Unbounded - prefer get_attendance_window()."""
         return self.fetch("""
             SELECT a.attendance_id, a.employee_id, 
                    CONCAT(e.first_name, ' ', e.last_name) AS employee_name,
@@ -769,6 +897,70 @@ class EmployeeMixin:
             ORDER BY a.record_date DESC, a.time_in DESC
         """)
 
+    def get_attendance_window(self, date_from=None, date_to=None, employee_id=None,
+                              role_name=None, status=None, search=None, cursor=None, limit=None):
+        """One page of attendance records, newest first.
+
+        The range defaults to the ATTENDANCE_DEFAULT_DAYS up to *date_to*
+        (today), so the table is never scanned end to end. *cursor* is the
+        'next_cursor' of the previous page (keyset on record_date, id).
+
+        Returns {'rows': [...], 'next_cursor': tuple or None}.
+        """
+        date_to = _as_date(date_to) if date_to else date.today()
+        date_from = _as_date(date_from) if date_from else \
+            date_to - timedelta(days=self.ATTENDANCE_DEFAULT_DAYS - 1)
+        limit = limit or self.ATTENDANCE_PAGE_SIZE
+
+        where, params = ["a.record_date BETWEEN %s AND %s"], [date_from, date_to]
+        if employee_id:
+            where.append("a.employee_id = %s"); params.append(employee_id)
+        if role_name:
+            where.append("r.role_name = %s"); params.append(role_name)
+        if status:
+            where.append("a.status = %s"); params.append(status)
+        if search:
+            where.append("(CONCAT(e.first_name,' ',e.last_name) LIKE %s OR r.role_name LIKE %s)")
+            params += [f"%{search.strip()}%"] * 2
+        if cursor:
+            where.append("(a.record_date, a.attendance_id) < (%s, %s)")
+            params += list(cursor)
+        rows = self.fetch(f"""
+            SELECT a.attendance_id, a.employee_id,
+                   CONCAT(e.first_name, ' ', e.last_name) AS employee_name,
+                   r.role_name,
+                   a.record_date, a.time_in, a.time_out,
+                   a.break_start, a.break_end, a.break_reason,
+                   a.status, a.notes
+            FROM attendance a
+            INNER JOIN employees e ON a.employee_id = e.employee_id
+            INNER JOIN roles r ON e.role_id = r.role_id
+            WHERE {' AND '.join(where)}
+            ORDER BY a.record_date DESC, a.attendance_id DESC
+            LIMIT %s
+        """, (*params, limit + 1))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (str(rows[-1]["record_date"]), rows[-1]["attendance_id"])
+        return {"rows": rows, "next_cursor": next_cursor}
+
+    def get_attendance_summary(self, month=None, role_name=None, search=None):
+        """Monthly attendance per employee, from get_timesheets().
+
+        *month* is any date inside the month (default: this month).
+        Returns {'month': 'YYYY-MM', 'workdays': n, 'rows': [...]}, rows
+        sorted by employee name.
+        """
+        first = (_as_date(month) if month else date.today()).replace(day=1)
+        last = first.replace(day=monthrange(first.year, first.month)[1])
+        sheets = self.get_timesheets(first, last, role_name=role_name, search=search)
+        rows = [dict(sheet, employee_id=emp_id) for emp_id, sheet in sheets.items()]
+        rows.sort(key=lambda r: r["employee_name"].lower())
+        return {"month": first.strftime("%Y-%m"),
+                "workdays": count_workdays(first, last, self.PAYROLL_WORKDAYS),
+                "rows": rows}
+
     def get_employee_attendance(self, employee_id):
         return self.fetch("""
             SELECT attendance_id, record_date, time_in, time_out, break_start, break_end, break_reason, status, notes
@@ -778,63 +970,56 @@ class EmployeeMixin:
         """, (employee_id,))
 
     def get_today_attendance(self, employee_id):
-        """Check if an employee has an attendance record for today and include active break status."""
-        att = self.fetch("""
-            SELECT attendance_id, time_in, time_out, status
-            FROM attendance
-            WHERE employee_id = %s AND record_date = CURDATE()
+        """Today's attendance row for an employee, with the open break (if any)
+        joined in as break_start / break_end / break_reason. One query."""
+        return self.fetch("""
+            SELECT a.attendance_id, a.time_in, a.time_out, a.status,
+                   b.break_start, b.break_end, b.break_reason
+            FROM attendance a
+            LEFT JOIN attendance_breaks b ON b.break_id = (
+                SELECT MAX(ob.break_id) FROM attendance_breaks ob
+                WHERE ob.attendance_id = a.attendance_id AND ob.break_end IS NULL)
+            WHERE a.employee_id = %s AND a.record_date = CURDATE()
             LIMIT 1
-        """, (employee_id,), one=True)
-        if not att:
-            return None
-            
-        # Check for any active breaks
-        active_break = self.fetch("""
-            SELECT break_start, break_end, break_reason 
-            FROM attendance_breaks 
-            WHERE attendance_id = %s AND break_end IS NULL
-            ORDER BY break_id DESC LIMIT 1
-        """, (att["attendance_id"],), one=True)
-        
-        if active_break:
-            att["break_start"] = active_break["break_start"]
-            att["break_end"] = active_break["break_end"]
-            att["break_reason"] = active_break["break_reason"]
-        else:
-            att["break_start"] = None
-            att["break_end"] = None
-            att["break_reason"] = None
-            
-        return att
+        """, (employee_id,), one=True, prepared=True)
 
-    def clock_in(self, employee_id):
-        """Clock in an employee for today. Resumes shift if previously checked out."""
-        existing = self.get_today_attendance(employee_id)
-        if existing:
-            if existing['time_out'] is None:
-                return "Already checked in today."
-            else:
-                # Resume tracking if they were clocked out (e.g. app crash/accidental close)
-                try:
-                    self.exec("""
-                        UPDATE attendance
-                        SET time_out = NULL
-                        WHERE attendance_id = %s
-                    """, (existing["attendance_id"],))
-                    name = self._get_employee_name(employee_id) or str(employee_id)
-                    self.log_activity("Logged In", "Attendance", f"Resumed shift for {name}")
-                    return True
-                except Exception as e:
-                    traceback.print_exc()
-                    return str(e)
+    def _attendance_write(self, sql, params):
+        """Run one attendance write and return MySQL's affected-row count
+        (1 = inserted, 2 = upsert updated, 0 = nothing changed)."""
+        conn = self._get_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                affected = cur.rowcount
+                conn.commit()
+            self.invalidate_cache("attendance", "attendance_breaks")
+            return affected
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            conn.close()
 
+    def clock_in(self, employee_id):
+        """Clock in an employee for today. Resumes shift if previously checked out.
+        One upsert on uq_attendance: a new row is a clock-in, an updated row a resume."""
         try:
-            self.exec("""
+            affected = self._attendance_write("""
                 INSERT INTO attendance (employee_id, record_date, time_in, status)
                 VALUES (%s, CURDATE(), CURTIME(), 'Present')
+                ON DUPLICATE KEY UPDATE time_out = NULL
             """, (employee_id,))
+            if not affected:
+                return "Already checked in today."
             name = self._get_employee_name(employee_id) or str(employee_id)
-            self.log_activity("Logged In", "Attendance", f"Automated clock-in for {name}")
+            if affected == 1:
+                self.log_activity("Logged In", "Attendance", f"Automated clock-in for {name}")
+            else:
+                # Resume tracking if they were clocked out (e.g. app crash/accidental close)
+                self.log_activity("Logged In", "Attendance", f"Resumed shift for {name}")
             return True
         except Exception as e:
             traceback.print_exc()
@@ -842,19 +1027,17 @@ class EmployeeMixin:
 
     def clock_out(self, employee_id):
         """Clock out an employee for today."""
-        existing = self.get_today_attendance(employee_id)
-        if not existing:
-            # For automatic clock out on end-of-day or logout, if not clocked in, silently ignore.
-            return "No check-in found for today."
-        if existing['time_out']:
-            return "Already checked out today."
-
         try:
-            self.exec("""
+            affected = self._attendance_write("""
                 UPDATE attendance
                 SET time_out = CURTIME()
-                WHERE attendance_id = %s
-            """, (existing["attendance_id"],))
+                WHERE employee_id = %s AND record_date = CURDATE() AND time_out IS NULL
+            """, (employee_id,))
+            if not affected:
+                # For automatic clock out on end-of-day or logout, if not clocked in, silently ignore.
+                if self.get_today_attendance(employee_id):
+                    return "Already checked out today."
+                return "No check-in found for today."
             name = self._get_employee_name(employee_id) or str(employee_id)
             self.log_activity("Logged Out", "Attendance", f"Automated clock-out for {name}")
             return True
@@ -864,19 +1047,23 @@ class EmployeeMixin:
 
     def start_break(self, employee_id, reason):
         """Log a break start for a clocked-in employee."""
-        existing = self.get_today_attendance(employee_id)
-        if not existing:
-            return "Must be clocked in to take a break."
-        if existing['time_out']:
-            return "Cannot take a break after clocking out."
-        if existing.get('break_start') and not existing.get('break_end'):
-            return "Already on a break."
-
         try:
-            self.exec("""
+            affected = self._attendance_write("""
                 INSERT INTO attendance_breaks (attendance_id, break_start, break_reason)
-                VALUES (%s, CURTIME(), %s)
-            """, (existing["attendance_id"], reason))
+                SELECT a.attendance_id, CURTIME(), %s
+                FROM attendance a
+                WHERE a.employee_id = %s AND a.record_date = CURDATE() AND a.time_out IS NULL
+                  AND NOT EXISTS (SELECT 1 FROM attendance_breaks b
+                                  WHERE b.attendance_id = a.attendance_id AND b.break_end IS NULL)
+            """, (reason, employee_id))
+            if not affected:
+                # Work out which precondition failed
+                existing = self.get_today_attendance(employee_id)
+                if not existing:
+                    return "Must be clocked in to take a break."
+                if existing['time_out']:
+                    return "Cannot take a break after clocking out."
+                return "Already on a break."
             name = self._get_employee_name(employee_id) or str(employee_id)
             self.log_activity("Break", "Attendance", f"Started break ({reason}) for {name}")
             return True
@@ -886,25 +1073,22 @@ class EmployeeMixin:
 
     def end_break(self, employee_id):
         """End an ongoing break."""
-        existing = self.get_today_attendance(employee_id)
-        if not existing or not existing.get('break_start'):
-            return "Not currently on break."
-        if existing.get('break_end'):
-            return "Break already ended."
-
         try:
-            self.exec("""
-                UPDATE attendance_breaks
-                SET break_end = CURTIME()
-                WHERE attendance_id = %s AND break_end IS NULL
-            """, (existing["attendance_id"],))
+            affected = self._attendance_write("""
+                UPDATE attendance_breaks b
+                INNER JOIN attendance a ON a.attendance_id = b.attendance_id
+                SET b.break_end = CURTIME()
+                WHERE a.employee_id = %s AND a.record_date = CURDATE() AND b.break_end IS NULL
+            """, (employee_id,))
+            if not affected:
+                return "Not currently on break."
             name = self._get_employee_name(employee_id) or str(employee_id)
             self.log_activity("Resumed Work", "Attendance", f"Ended break for {name}")
             return True
         except Exception as e:
             traceback.print_exc()
             return str(e)
-            
+
     def update_attendance(self, attendance_id, status, notes=""):
         """HR manually update an attendance status/note."""
         try:
@@ -917,3 +1101,78 @@ class EmployeeMixin:
         except Exception as e:
             traceback.print_exc()
             return str(e)
+
+    # ── Timesheets ───────────────────────────────────────────────
+
+    def get_timesheets(self, period_from, period_until, employee_ids=None, role_name=None,
+                       search=None):
+        """Attendance totals per employee for a period, from one grouped query.
+
+        Returns {employee_id: {employee_name, role_name, records, full_days,
+        half_days, late_days, absent_days, worked_days, gross_hours,
+        break_hours, net_hours}}.
+        worked_days counts a Half-day as PAYROLL_HALF_DAY; net hours are
+        time in to time out minus every logged break.
+        """
+        where, params = ["a.record_date BETWEEN %s AND %s"], [period_from, period_until]
+        if employee_ids:
+            where.append(f"a.employee_id IN ({','.join(['%s'] * len(employee_ids))})")
+            params.extend(employee_ids)
+        if role_name:
+            where.append("r.role_name = %s"); params.append(role_name)
+        if search:
+            where.append("CONCAT(e.first_name,' ',e.last_name) LIKE %s")
+            params.append(f"%{search.strip()}%")
+        rows = self.fetch(f"""
+            SELECT a.employee_id,
+                   CONCAT(e.first_name,' ',e.last_name) AS employee_name, r.role_name,
+                   COUNT(*) AS records,
+                   SUM(a.status IN ('Present','Late')) AS full_days,
+                   SUM(a.status = 'Half-day') AS half_days,
+                   SUM(a.status = 'Late') AS late_days,
+                   SUM(a.status = 'Absent') AS absent_days,
+                   SUM(CASE WHEN a.time_out > a.time_in
+                            THEN TIME_TO_SEC(TIMEDIFF(a.time_out, a.time_in)) ELSE 0 END) AS gross_sec,
+                   COALESCE(SUM(b.break_sec), 0) AS break_sec
+            FROM attendance a
+            INNER JOIN employees e ON a.employee_id = e.employee_id
+            INNER JOIN roles r ON e.role_id = r.role_id
+            LEFT JOIN (
+                SELECT ab.attendance_id,
+                       SUM(TIME_TO_SEC(TIMEDIFF(ab.break_end, ab.break_start))) AS break_sec
+                FROM attendance_breaks ab
+                INNER JOIN attendance x ON x.attendance_id = ab.attendance_id
+                WHERE x.record_date BETWEEN %s AND %s
+                  AND ab.break_end > ab.break_start
+                GROUP BY ab.attendance_id
+            ) b ON b.attendance_id = a.attendance_id
+            WHERE {' AND '.join(where)}
+            GROUP BY a.employee_id, e.first_name, e.last_name, r.role_name
+        """, (period_from, period_until, *params))
+        out = {}
+        for r in rows or []:
+            gross, brk = float(r["gross_sec"] or 0), float(r["break_sec"] or 0)
+            full, half = int(r["full_days"] or 0), int(r["half_days"] or 0)
+            out[r["employee_id"]] = {
+                "employee_name": r["employee_name"],
+                "role_name": r["role_name"],
+                "records": int(r["records"]),
+                "full_days": full,
+                "half_days": half,
+                "late_days": int(r["late_days"] or 0),
+                "absent_days": int(r["absent_days"] or 0),
+                "worked_days": full + half * self.PAYROLL_HALF_DAY,
+                "gross_hours": round(gross / 3600, 2),
+                "break_hours": round(brk / 3600, 2),
+                "net_hours": round(max(gross - brk, 0) / 3600, 2),
+            }
+        return out
+
+    def get_employee_timesheet(self, employee_id, period_from, period_until):
+        """get_timesheets() for one employee (zeros when nothing was logged),
+        plus 'workdays' - the working days in the period."""
+        sheet = self.get_timesheets(period_from, period_until, [employee_id]).get(employee_id) or {
+            "employee_name": "", "role_name": "", "records": 0, "full_days": 0, "half_days": 0, "late_days": 0, "absent_days": 0,
+            "worked_days": 0, "gross_hours": 0.0, "break_hours": 0.0, "net_hours": 0.0}
+        sheet["workdays"] = count_workdays(period_from, period_until, self.PAYROLL_WORKDAYS)
+        return sheet
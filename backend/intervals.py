@@ -0,0 +1,118 @@
+# Interval index over approved leave.
+# IntervalTree is a static, array-backed interval tree (sorted by start,
+# each node keeps the max end of its subtree), rebuilt whenever leave
+# changes. LeaveIndex keeps one for all approved leave requests and answers
+# "who is on leave on day X / during R" and overlap checks without a query.
+
+import threading
+import time
+from datetime import date
+
+from backend.availability import _as_date
+from backend.db_config import QUERY_CACHE_TTL
+
+
+class IntervalTree:
+    """Closed [start, end] intervals with O(log n + k) stabbing / overlap queries.
+
+    *items* are (start, end, payload) tuples; any mutually comparable
+    start/end values work (dates here).
+    """
+
+    def __init__(self, items=()):
+        self._items = sorted(items, key=lambda it: (it[0], it[1]))
+        self._max_end = [None] * len(self._items)
+        self._build(0, len(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def _build(self, lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        best = self._items[mid][1]
+        for child in (self._build(lo, mid), self._build(mid + 1, hi)):
+            if child is not None and child > best:
+                best = child
+        self._max_end[mid] = best
+        return best
+
+    def overlapping(self, start, end):
+        """Every item whose interval shares at least one point with [start, end]."""
+        out = []
+        self._query(0, len(self._items), start, end, out)
+        return out
+
+    def at(self, point):
+        """Every item whose interval contains *point*."""
+        return self.overlapping(point, point)
+
+    def _query(self, lo, hi, start, end, out):
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._max_end[mid] < start:
+                return  # nothing in this subtree reaches start
+            self._query(lo, mid, start, end, out)
+            item = self._items[mid]
+            if item[0] > end:
+                return  # this node and everything right of it starts too late
+            if item[1] >= start:
+                out.append(item)
+            lo = mid + 1
+
+
+class LeaveIndex:
+    """Approved leave requests in an IntervalTree, shared by all pages.
+
+    Loaded with one query on first use. Writes to leave_requests drop it
+    (see invalidate()), and it is reloaded after *max_age* seconds so
+    approvals made on other workstations show up, like the query cache.
+    Payloads are (request_id, employee_id).
+    """
+
+    def __init__(self, backend, max_age=QUERY_CACHE_TTL):
+        self._backend = backend
+        self._lock = threading.Lock()
+        self._max_age = max_age
+        self._tree = None
+        self._loaded_at = 0.0
+
+    def invalidate(self, tables):
+        if "leave_requests" in {t.lower() for t in tables}:
+            self._tree = None
+
+    def _ensure(self):
+        with self._lock:
+            if self._tree is None or time.monotonic() - self._loaded_at > self._max_age:
+                rows = self._backend.fetch("""
+                    SELECT request_id, employee_id, leave_from, leave_until
+                    FROM leave_requests WHERE status = 'Approved'
+                """)
+                if rows is None and self._tree is not None:
+                    return self._tree  # keep the old tree if the reload failed
+                self._tree = IntervalTree(
+                    (_as_date(r["leave_from"]), _as_date(r["leave_until"]),
+                     (r["request_id"], r["employee_id"]))
+                    for r in rows or [])
+                self._loaded_at = time.monotonic()
+            return self._tree
+
+    def on_leave(self, day=None):
+        """{employee_id: (leave_from, leave_until)} for everyone on leave on *day*."""
+        day = _as_date(day or date.today())
+        return {emp: (s, e) for s, e, (_, emp) in self._ensure().at(day)}
+
+    def in_range(self, start, end, employee_ids=None):
+        """(leave_from, leave_until, employee_id) for leave overlapping [start, end]."""
+        wanted = set(employee_ids) if employee_ids is not None else None
+        hits = self._ensure().overlapping(_as_date(start), _as_date(end))
+        return [(s, e, emp) for s, e, (_, emp) in hits if wanted is None or emp in wanted]
+
+    def overlaps(self, employee_id, start, end, exclude_request_id=None):
+        """Approved leave of *employee_id* overlapping [start, end], as
+        [{'request_id', 'leave_from', 'leave_until'}]."""
+        hits = self._ensure().overlapping(_as_date(start), _as_date(end))
+        return [{"request_id": rid, "leave_from": s, "leave_until": e}
+                for s, e, (rid, emp) in hits if emp == employee_id and rid != exclude_request_id]
+
@@ -0,0 +1,243 @@
+# Query instrumentation - per-call-site latency histograms, row counts and errors.
+# Export as JSON or Prometheus text, to a file or a small local HTTP endpoint.
+
+import json
+import logging
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (ms) of the latency buckets; anything slower lands in +Inf
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_WS_RE = re.compile(r"\s+")
+
+
+class _SiteStats:
+    """Counters for one (call site, operation) pair, owned by one thread."""
+
+    __slots__ = ("calls", "errors", "rows", "round_trips", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.round_trips = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms, rows, error, round_trips):
+        self.calls += 1
+        self.rows += rows
+        self.round_trips += round_trips
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        if error:
+            self.errors += 1
+        for i, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+
+class QueryMetrics:
+    """Collects query timings without locking on the hot path.
+
+    Every thread writes into its own shard; snapshot() merges the shards.
+    The lock is only taken the first time a thread records something.
+    """
+
+    def __init__(self, slow_ms=250, log_path=None):
+        self.slow_ms = slow_ms
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        self._server = None
+        self._gauges = {}  # prefix -> callable returning {name: number}
+        self.log = logging.getLogger("carecrud.db")
+        if log_path and not self.log.handlers:
+            handler = logging.FileHandler(log_path, delay=True, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+            self.log.addHandler(handler)
+            self.log.setLevel(logging.INFO)
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def record(self, site, op, elapsed_ms, rows=0, error=None, round_trips=1, sql=""):
+        """Add one call. Slow calls and errors also go to the slow-query log."""
+        shard = self._shard()
+        stats = shard.get((site, op))
+        if stats is None:
+            stats = shard[(site, op)] = _SiteStats()
+        stats.add(elapsed_ms, rows, error, round_trips)
+        if error is not None:
+            self.log.warning("%s %s failed after %.1f ms: %s | %s",
+                             op, site, elapsed_ms, error, _compact(sql))
+        elif elapsed_ms >= self.slow_ms:
+            self.log.info("SLOW %s %s %.1f ms rows=%d | %s",
+                          op, site, elapsed_ms, rows, _compact(sql))
+
+    def register_gauges(self, prefix, source):
+        """Include *source()* ({name: number}) as gauges in Prometheus/JSON exports."""
+        self._gauges[prefix] = source
+
+    def gauges(self):
+        out = {}
+        for prefix, source in list(self._gauges.items()):
+            try:
+                values = source() or {}
+            except Exception:
+                continue
+            for name, value in values.items():
+                if isinstance(value, (int, float)):
+                    out[f"{prefix}_{name}"] = value
+        return out
+
+    # ── Reading ────────────────────────────────────────────────────
+    def snapshot(self):
+        """Merge all thread shards. Returns {(site, op): dict}."""
+        merged = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key, st in _stable_items(shard):
+                m = merged.get(key)
+                if m is None:
+                    m = merged[key] = {"calls": 0, "errors": 0, "rows": 0, "round_trips": 0,
+                                       "total_ms": 0.0, "max_ms": 0.0,
+                                       "buckets": [0] * (len(BUCKETS_MS) + 1)}
+                m["calls"] += st.calls
+                m["errors"] += st.errors
+                m["rows"] += st.rows
+                m["round_trips"] += st.round_trips
+                m["total_ms"] += st.total_ms
+                m["max_ms"] = max(m["max_ms"], st.max_ms)
+                for i, n in enumerate(st.buckets):
+                    m["buckets"][i] += n
+        return merged
+
+    def summary(self, op=None):
+        """List of per-site dicts, slowest total time first."""
+        out = []
+        for (site, kind), m in self.snapshot().items():
+            if op and kind != op:
+                continue
+            calls = m["calls"]
+            out.append({
+                "site": site, "op": kind, "calls": calls, "errors": m["errors"],
+                "rows": m["rows"], "round_trips": m["round_trips"],
+                "avg_ms": round(m["total_ms"] / calls, 3) if calls else 0,
+                "p95_ms": _percentile(m["buckets"], calls, 0.95),
+                "max_ms": round(m["max_ms"], 3),
+                "total_ms": round(m["total_ms"], 3),
+            })
+        out.sort(key=lambda r: r["total_ms"], reverse=True)
+        return out
+
+    def reset(self):
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+    # ── Export ─────────────────────────────────────────────────────
+    def to_json(self):
+        return json.dumps({"buckets_ms": list(BUCKETS_MS), "sites": self.summary(),
+                           "gauges": self.gauges(), "generated_at": time.time()}, indent=2)
+
+    def to_prometheus(self):
+        lines = [
+            "# TYPE carecrud_query_duration_ms histogram",
+        ]
+        counters = []
+        for (site, op), m in sorted(self.snapshot().items()):
+            labels = f'site="{site}",op="{op}"'
+            running = 0
+            for bound, n in zip(BUCKETS_MS, m["buckets"]):
+                running += n
+                lines.append(f'carecrud_query_duration_ms_bucket{{{labels},le="{bound}"}} {running}')
+            lines.append(f'carecrud_query_duration_ms_bucket{{{labels},le="+Inf"}} {m["calls"]}')
+            lines.append(f'carecrud_query_duration_ms_sum{{{labels}}} {m["total_ms"]:.3f}')
+            lines.append(f'carecrud_query_duration_ms_count{{{labels}}} {m["calls"]}')
+            counters.append((labels, m))
+        for name, key in (("errors", "errors"), ("rows", "rows"), ("round_trips", "round_trips")):
+            lines.append(f"# TYPE carecrud_query_{name}_total counter")
+            for labels, m in counters:
+                lines.append(f"carecrud_query_{name}_total{{{labels}}} {m[key]}")
+        for name, value in sorted(self.gauges().items()):
+            lines.append(f"# TYPE carecrud_{name} gauge")
+            lines.append(f"carecrud_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, fmt="json"):
+        """Write the current metrics to *path* as 'json' or 'prometheus'."""
+        text = self.to_prometheus() if fmt == "prometheus" else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """Serve /metrics (Prometheus) and /metrics.json on a daemon thread."""
+        if self._server is not None:
+            return self._server.server_address[1]
+        metrics = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, ctype = metrics.to_json(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, ctype = metrics.to_prometheus(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address[1]
+
+
+def _stable_items(d):
+    """Copy a dict another thread may be inserting into."""
+    while True:
+        try:
+            return list(d.items())
+        except RuntimeError:  # dict changed size during iteration
+            continue
+
+
+def _percentile(buckets, total, q):
+    """Upper bucket bound holding the q-th percentile (None if in +Inf)."""
+    if not total:
+        return 0
+    target = total * q
+    running = 0
+    for bound, n in zip(BUCKETS_MS, buckets):
+        running += n
+        if running >= target:
+            return bound
+    return None
+
+
+def _compact(sql):
+    return _WS_RE.sub(" ", sql or "").strip()[:300]
@@ -0,0 +1,145 @@
+# No-show model - logistic regression on appointment history.
+# Predicts the chance a booked patient actually shows up, from lead time,
+# weekday, hour, service and the patient's past no-shows / cancellations.
+# Fitting needs NumPy; without it the model only knows the overall show rate
+# and is never marked fitted, so it doesn't drive overbooking.
+
+import math
+from datetime import date, datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Terminal statuses the model learns from: showed vs. didn't
+_OUTCOMES = ("Completed", "No-Show")
+
+
+def _day(d):
+    if isinstance(d, datetime):
+        return d.date()
+    if isinstance(d, date):
+        return d
+    return datetime.strptime(str(d)[:10], "%Y-%m-%d").date()
+
+
+def _hour(t):
+    if t is None:
+        return 12
+    if hasattr(t, "total_seconds"):
+        return int(t.total_seconds()) // 3600
+    if hasattr(t, "hour"):
+        return t.hour
+    return int(str(t).split(":")[0])
+
+
+class NoShowModel:
+    """P(show) for an appointment row.
+
+    Rows are dicts with patient_id, service_id, appointment_date,
+    appointment_time, created_at (and status when training).
+    """
+
+    MIN_SERVICE_ROWS = 20  # services with fewer samples share the baseline
+
+    def __init__(self, l2=1.0, epochs=400, learning_rate=0.2):
+        self.l2 = l2
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.weights = None
+        self.base_rate = 1.0
+        self.services = {}   # service_id -> one-hot column
+        self.patients = {}   # patient_id -> [visits, no_shows, cancels]
+        self.samples = 0
+        self.trained_at = None
+
+    @property
+    def fitted(self):
+        return self.weights is not None
+
+    # ── Features ───────────────────────────────────────────────────
+    def _encode(self, row, history):
+        visits, no_shows, cancels = history
+        seen = visits + cancels
+        lead = (_day(row["appointment_date"]) - _day(row.get("created_at") or row["appointment_date"])).days
+        x = [1.0,
+             min(max(lead, 0), 90) / 30.0,
+             (_hour(row.get("appointment_time")) - 12) / 4.0,
+             no_shows / visits if visits else 0.0,
+             cancels / seen if seen else 0.0,
+             math.log1p(visits)]
+        weekday = [0.0] * 7
+        weekday[_day(row["appointment_date"]).weekday()] = 1.0
+        service = [0.0] * len(self.services)
+        col = self.services.get(row.get("service_id"))
+        if col is not None:
+            service[col] = 1.0
+        return x + weekday + service
+
+    # ── Training ───────────────────────────────────────────────────
+    def fit(self, rows):
+        """Fit on past appointments ordered by date (oldest first).
+
+        Only closed-out visits are samples: Completed (showed) against
+        No-Show. Cancellations feed the patient history; Pending or
+        Confirmed rows nobody closed out say nothing either way.
+        """
+        counts = {}
+        for r in rows:
+            if r["status"] in _OUTCOMES:
+                counts[r["service_id"]] = counts.get(r["service_id"], 0) + 1
+        self.services = {sid: i for i, sid in enumerate(
+            sorted(s for s, n in counts.items() if n >= self.MIN_SERVICE_ROWS))}
+
+        # Walk history in order so each sample only sees the patient's past
+        self.patients = {}
+        X, y = [], []
+        for r in rows:
+            hist = self.patients.setdefault(r["patient_id"], [0, 0, 0])
+            if r["status"] == "Cancelled":
+                hist[2] += 1
+                continue
+            if r["status"] not in _OUTCOMES:
+                continue
+            showed = r["status"] == "Completed"
+            X.append(self._encode(r, hist))
+            y.append(1.0 if showed else 0.0)
+            hist[0] += 1
+            if not showed:
+                hist[1] += 1
+
+        self.samples = len(y)
+        self.base_rate = sum(y) / len(y) if y else 1.0
+        self.weights = None
+        if np is not None and len(y) >= 50 and 0 < sum(y) < len(y):
+            self.weights = self._gradient_descent(np.asarray(X), np.asarray(y))
+        self.trained_at = datetime.now()
+        return self
+
+    def _gradient_descent(self, X, y):
+        w = np.zeros(X.shape[1])
+        w[0] = math.log(self.base_rate / (1 - self.base_rate))
+        n = len(y)
+        reg = np.full(X.shape[1], self.l2 / n)
+        reg[0] = 0.0  # don't shrink the intercept
+        for _ in range(self.epochs):
+            p = 1.0 / (1.0 + np.exp(-(X @ w)))
+            w -= self.learning_rate * ((X.T @ (p - y)) / n + reg * w)
+        return w
+
+    # ── Prediction ─────────────────────────────────────────────────
+    def predict(self, rows):
+        """Show probability for each row (upcoming appointments)."""
+        if not rows:
+            return []
+        if not self.fitted:
+            return [self.base_rate] * len(rows)
+        X = np.asarray([self._encode(r, self.patients.get(r.get("patient_id"), (0, 0, 0)))
+                        for r in rows])
+        return [float(p) for p in 1.0 / (1.0 + np.exp(-(X @ self.weights)))]
+
+    def summary(self):
+        return {"fitted": self.fitted, "numpy": np is not None, "samples": self.samples,
+                "base_show_rate": round(self.base_rate, 3),
+                "trained_at": self.trained_at.isoformat(timespec="seconds") if self.trained_at else None}
@@ -0,0 +1,167 @@
+# Notification delivery - in-app messages for leave and paycheck decisions.
+# One NotificationBroker per process stands in for a push service: writes
+# made here are pushed to local subscribers right after commit, and
+# notifications written by other workstations are picked up by poll().
+# Each poll is one query over idx_notifications_unread (the unread rows of
+# the watched employees) no matter how many employees this client watches.
+# It selects by is_read rather than by id, because ids are handed out
+# before commit - a row can become visible below ids already seen.
+
+import threading
+
+from backend.db_config import NOTIFY_POLL_SECONDS
+
+
+class NotificationBroker:
+    """Unread-row notification fan-out for the employees watched here.
+
+    watch() registers an employee; their unread rows arrive through
+    publish() (local writes) or poll() (everything else). take() hands out
+    what arrived since the employee's last take(), and wait() is the
+    long-poll form of it. Rows already handed out are remembered until they
+    are marked read, so they are not delivered twice.
+    """
+
+    def __init__(self, backend):
+        self._backend = backend
+        self._cond = threading.Condition()
+        self._inbox = {}       # employee_id -> [rows not yet taken]
+        self._taken = {}       # employee_id -> ids handed out and still unread
+
+    def watch(self, employee_id):
+        """Start tracking *employee_id*; queues their current unread backlog."""
+        with self._cond:
+            if employee_id in self._inbox:
+                return
+            self._inbox[employee_id] = []
+            self._taken[employee_id] = set()
+        self.poll([employee_id])
+
+    def unwatch(self, employee_id):
+        with self._cond:
+            self._inbox.pop(employee_id, None)
+            self._taken.pop(employee_id, None)
+
+    def _deliver(self, rows):
+        with self._cond:
+            for r in rows or []:
+                emp = r["employee_id"]
+                nid = r["notification_id"]
+                if emp in self._inbox and nid not in self._taken[emp]:
+                    if all(q["notification_id"] != nid for q in self._inbox[emp]):
+                        self._inbox[emp].append(r)
+            self._cond.notify_all()
+
+    def publish(self, notification_id, employee_id, message):
+        """Push a notification committed by this process to local subscribers."""
+        self._deliver([{"notification_id": notification_id, "employee_id": employee_id,
+                        "message": message, "created_at": None}])
+
+    def poll(self, employee_ids=None):
+        """Pick up unread notifications written elsewhere. Returns how many were new."""
+        with self._cond:
+            watched = [e for e in (employee_ids or self._inbox) if e in self._inbox]
+        if not watched:
+            return 0
+        marks = ",".join(["%s"] * len(watched))
+        rows = self._backend.fetch(f"""
+            SELECT notification_id, employee_id, message, created_at FROM notifications
+            WHERE employee_id IN ({marks}) AND is_read = 0
+            ORDER BY notification_id
+        """, watched)
+        if rows is None:
+            return 0
+        with self._cond:
+            before = {e: len(self._inbox.get(e, ())) for e in watched}
+            # taken ids that are no longer unread were marked read - forget them
+            unread = {}
+            for r in rows:
+                unread.setdefault(r["employee_id"], set()).add(r["notification_id"])
+            for emp in watched:
+                if emp in self._taken:
+                    self._taken[emp] &= unread.get(emp, set())
+        self._deliver(rows)
+        with self._cond:
+            return sum(len(self._inbox.get(e, ())) - n for e, n in before.items())
+
+    def take(self, employee_id):
+        """Notifications for *employee_id* since the last take(), oldest first."""
+        with self._cond:
+            rows = self._inbox.get(employee_id) or []
+            if rows:
+                self._inbox[employee_id] = []
+                self._taken[employee_id].update(r["notification_id"] for r in rows)
+            return sorted(rows, key=lambda r: r["notification_id"])
+
+    def wait(self, employee_id, timeout=NOTIFY_POLL_SECONDS):
+        """Long-poll: block until *employee_id* has notifications or *timeout* passes."""
+        self.poll()
+        with self._cond:
+            self._cond.wait_for(lambda: self._inbox.get(employee_id), timeout)
+        return self.take(employee_id)
+
+
+class NotificationMixin:
+
+    NOTIFY_POLL_SECONDS = NOTIFY_POLL_SECONDS
+    _notify_broker = None  # NotificationBroker, see get_notification_broker()
+
+    def get_notification_broker(self):
+        """Shared NotificationBroker for this process."""
+        broker = NotificationMixin._notify_broker
+        if broker is None:
+            broker = NotificationMixin._notify_broker = NotificationBroker(self)
+        return broker
+
+    def _notify(self, cur, employee_id, message):
+        """INSERT a notification on an open cursor. Pass the result to
+        publish_notifications() once the transaction has committed."""
+        cur.execute("INSERT INTO notifications (employee_id, message) VALUES (%s, %s)",
+                    (employee_id, message))
+        return cur.lastrowid, employee_id, message
+
+    def publish_notifications(self, *notes):
+        """Push committed _notify() results to subscribers in this process."""
+        broker = self.get_notification_broker()
+        for note in notes:
+            broker.publish(*note)
+
+    def watch_notifications(self, employee_id):
+        """Track *employee_id*; their unread backlog is returned by the next check."""
+        self.get_notification_broker().watch(employee_id)
+
+    def unwatch_notifications(self, employee_id):
+        """Stop tracking *employee_id* (on logout)."""
+        self.get_notification_broker().unwatch(employee_id)
+
+    def check_notifications(self, employee_id):
+        """New notifications for a watched employee since the last check."""
+        broker = self.get_notification_broker()
+        broker.poll()
+        return broker.take(employee_id)
+
+    def get_unread_notifications(self, employee_id):
+        """Get unread notifications for an employee."""
+        return self.fetch(
+            "SELECT notification_id, message, created_at FROM notifications "
+            "WHERE employee_id=%s AND is_read=0 ORDER BY created_at DESC",
+            (employee_id,))
+
+    def mark_notifications_read(self, employee_id, ids=None):
+        """Mark an employee's notifications read, all of them or just *ids*.
+
+        One UPDATE for the whole batch; notifications that were not shown
+        (including ones that commit while this runs) stay unread.
+        """
+        sql = "UPDATE notifications SET is_read=1 WHERE employee_id=%s AND is_read=0"
+        params = [employee_id]
+        if ids is not None:
+            ids = list(ids)
+            if not ids:
+                return 0
+            sql += f" AND notification_id IN ({','.join(['%s'] * len(ids))})"
+            params += ids
+        ok = self.exec(sql, params)
+        if ok:
+            self.log_activity("Edited", "Notification", f"Marked notifications read for employee #{employee_id}")
+        return ok
@@ -75,8 +75,9 @@ class PatientMixin:
     def _save_conditions(self, cur, patient_id, conditions_str):
         cur.execute("DELETE FROM patient_conditions WHERE patient_id=%s", (patient_id,))
         if conditions_str:
-            for c in [c.strip() for c in conditions_str.split(",") if c.strip()]:
-                cur.execute("INSERT INTO patient_conditions (patient_id, condition_name) VALUES (%s,%s)", (patient_id, c))
+            self._executemany(
+                cur, "INSERT INTO patient_conditions (patient_id, condition_name) VALUES (%s,%s)",
+                [(patient_id, c.strip()) for c in conditions_str.split(",") if c.strip()])
 
     def _handle_id_proof(self, source_path):
         if not source_path:
@@ -130,6 +131,7 @@ class PatientMixin:
                 pid = cur.lastrowid
                 self._save_conditions(cur, pid, data.get("conditions",""))
                 conn.commit()
+            self.invalidate_cache("patients", "patient_conditions")
             self.log_activity("Created", "Patient", f"{data['first_name']} {data['last_name']}")
             return True
         except Exception:
@@ -163,6 +165,7 @@ class PatientMixin:
                       data.get("status","Active"), data.get("notes",""), patient_id))
                 self._save_conditions(cur, patient_id, data.get("conditions",""))
                 conn.commit()
+            self.invalidate_cache("patients", "patient_conditions")
             self.log_activity("Edited", "Patient", f"{data['first_name']} {data['last_name']}")
             return True
         except Exception:
@@ -0,0 +1,169 @@
+# Payroll runs - paycheck requests for a whole pay period in one go.
+# Employees (with an existing-paycheck flag) and their timesheets for the
+# period come back in two queries; deductions use one read of the tax rates.
+# Every request is inserted in a single transaction under a payroll_runs
+# header row.
+
+import traceback
+
+from backend.availability import _as_date
+from backend.db_config import PAYROLL_WORKDAYS, PAYROLL_HALF_DAY
+
+
+def count_workdays(date_from, date_to, workdays=PAYROLL_WORKDAYS):
+    """Working days from date_from to date_to, both inclusive."""
+    d0, d1 = _as_date(date_from), _as_date(date_to)
+    if d1 < d0:
+        return 0
+    weeks, extra = divmod((d1 - d0).days + 1, 7)
+    first = d0.weekday()
+    return weeks * len(workdays) + sum(1 for i in range(extra) if (first + i) % 7 in workdays)
+
+
+class PayrollMixin:
+
+    PAYROLL_WORKDAYS = PAYROLL_WORKDAYS
+    PAYROLL_HALF_DAY = PAYROLL_HALF_DAY
+
+    def _payroll_candidates(self, period_from, period_until, department_id=None,
+                            role_name=None, employee_ids=None):
+        """Active employees with salary and an existing-paycheck flag."""
+        where = ["e.status = 'Active'"]
+        params = [period_until, period_from]
+        if department_id:
+            where.append("e.department_id = %s"); params.append(department_id)
+        if role_name:
+            where.append("r.role_name = %s"); params.append(role_name)
+        if employee_ids:
+            where.append(f"e.employee_id IN ({','.join(['%s'] * len(employee_ids))})")
+            params.extend(employee_ids)
+        return self.fetch(f"""
+            SELECT e.employee_id,
+                   CONCAT(e.first_name,' ',e.last_name) AS employee_name,
+                   r.role_name, d.department_name, e.salary,
+                   EXISTS(SELECT 1 FROM paycheck_requests pr
+                          WHERE pr.employee_id = e.employee_id AND pr.status <> 'Rejected'
+                            AND pr.period_from <= %s AND pr.period_until >= %s) AS has_paycheck
+            FROM employees e
+            INNER JOIN roles r ON e.role_id = r.role_id
+            INNER JOIN departments d ON e.department_id = d.department_id
+            WHERE {' AND '.join(where)}
+            ORDER BY d.department_name, e.last_name, e.first_name
+        """, tuple(params))
+
+    def preview_payroll_run(self, period_from, period_until, department_id=None,
+                            role_name=None, employee_ids=None, prorate=True):
+        """Compute every paycheck of a run without saving anything.
+
+        Gross is the monthly salary, prorated by days attended over the
+        period's working days when *prorate* is on. Employees with no
+        salary, no attendance, or a paycheck already covering part of the
+        period are listed under 'skipped' with the reason.
+
+        Returns {'lines': [...], 'skipped': [...], 'totals': {...}, 'workdays': n}.
+        """
+        workdays = count_workdays(period_from, period_until, self.PAYROLL_WORKDAYS)
+        rates = self.get_tax_rates()
+        sheets = self.get_timesheets(period_from, period_until, employee_ids) if prorate else {}
+        lines, skipped = [], []
+        for emp in self._payroll_candidates(period_from, period_until, department_id,
+                                            role_name, employee_ids) or []:
+            salary = float(emp["salary"] or 0)
+            sheet = sheets.get(emp["employee_id"]) or {}
+            days = min(sheet.get("worked_days", 0), workdays)
+            reason = None
+            if emp["has_paycheck"]:
+                reason = "Already has a paycheck for this period"
+            elif salary <= 0:
+                reason = "No base salary set"
+            elif prorate and days <= 0:
+                reason = "No attendance in period"
+            if reason:
+                skipped.append({"employee_id": emp["employee_id"],
+                                "employee_name": emp["employee_name"], "reason": reason})
+                continue
+            gross = round(salary * days / workdays, 2) if prorate and workdays else salary
+            ded = self.calculate_deductions(gross, rates)
+            lines.append({
+                "employee_id": emp["employee_id"], "employee_name": emp["employee_name"],
+                "role_name": emp["role_name"], "department_name": emp["department_name"],
+                "salary": salary, "days_worked": days, "workdays": workdays,
+                "late_days": sheet.get("late_days", 0), "net_hours": sheet.get("net_hours", 0.0),
+                "amount": gross,
+                "sss_deduction": ded["sss_deduction"],
+                "philhealth_deduction": ded["philhealth_deduction"],
+                "hospital_share": ded["hospital_share"],
+                "net_amount": ded["net_amount"],
+            })
+        gross = round(sum(l["amount"] for l in lines), 2)
+        net = round(sum(l["net_amount"] for l in lines), 2)
+        return {"lines": lines, "skipped": skipped, "workdays": workdays,
+                "totals": {"employees": len(lines), "gross": gross, "net": net,
+                           "deductions": round(gross - net, 2)}}
+
+    def create_payroll_run(self, period_from, period_until, requested_by_id, department_id=None,
+                           role_name=None, employee_ids=None, prorate=True, filters=""):
+        """Submit a paycheck request for every line of preview_payroll_run().
+
+        The run header and all requests are written in one transaction;
+        requests start as Pending like a manual request. *filters* is a
+        human-readable description kept on the header.
+        Returns {'run_id', 'created', 'skipped', 'totals'} or an error string.
+        """
+        plan = self.preview_payroll_run(period_from, period_until, department_id,
+                                        role_name, employee_ids, prorate)
+        lines, totals = plan["lines"], plan["totals"]
+        if not lines:
+            return "No employees to pay for this period."
+        conn = None
+        try:
+            conn = self._get_connection()
+            with conn.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO payroll_runs (period_from, period_until, filters, prorated, "
+                    "employee_count, total_gross, total_deductions, total_net, created_by) "
+                    "VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)",
+                    (period_from, period_until, filters or None, 1 if prorate else 0,
+                     totals["employees"], totals["gross"], totals["deductions"], totals["net"],
+                     requested_by_id))
+                run_id = cur.lastrowid
+                self._executemany(
+                    cur,
+                    "INSERT INTO paycheck_requests "
+                    "(employee_id, amount, sss_deduction, philhealth_deduction, "
+                    "hospital_share, net_amount, period_from, period_until, requested_by, run_id) "
+                    "VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)",
+                    [(l["employee_id"], l["amount"], l["sss_deduction"], l["philhealth_deduction"],
+                      l["hospital_share"], l["net_amount"], period_from, period_until,
+                      requested_by_id, run_id) for l in lines])
+                conn.commit()
+            self.invalidate_cache("payroll_runs", "paycheck_requests")
+            self.log_activity("Created", "Payroll Run",
+                              f"Payroll run #{run_id}: {totals['employees']} paychecks, "
+                              f"Gross ₱{totals['gross']:,.2f} → Net ₱{totals['net']:,.2f} "
+                              f"({period_from} to {period_until})")
+            return {"run_id": run_id, "created": len(lines),
+                    "skipped": plan["skipped"], "totals": totals}
+        except Exception as e:
+            traceback.print_exc()
+            try:
+                if conn:
+                    conn.rollback()
+            except Exception:
+                pass
+            return str(e)
+        finally:
+            if conn:
+                conn.close()
+
+    def get_payroll_runs(self, limit=50):
+        """Recent payroll runs, newest first, with who ran them."""
+        return self.fetch("""
+            SELECT pr.run_id, pr.period_from, pr.period_until, pr.filters, pr.prorated,
+                   pr.employee_count, pr.total_gross, pr.total_deductions, pr.total_net,
+                   pr.created_at, CONCAT(e.first_name,' ',e.last_name) AS created_by_name
+            FROM payroll_runs pr
+            INNER JOIN employees e ON pr.created_by = e.employee_id
+            ORDER BY pr.created_at DESC
+            LIMIT %s
+        """, (limit,))
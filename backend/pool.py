@@ -0,0 +1,262 @@
+# Managed connection pool - min/max sizing, blocking acquire with timeout,
+# idle validation, connection recycling and utilization / wait-time stats.
+
+import threading
+import time
+
+import mysql.connector
+from mysql.connector.errors import Error, PoolError
+
+from backend.stmt_cache import discard_cache
+
+
+class PooledConnection:
+    """Checked-out connection. close() hands it back to the pool instead of closing.
+    Everything else (cursor, commit, rollback, ...) goes to the real connection."""
+
+    def __init__(self, pool, cnx, read_only, keep_session=False):
+        self._pool = pool
+        self._cnx = cnx
+        self._read_only = read_only
+        self._keep_session = keep_session
+
+    def __getattr__(self, attr):
+        return getattr(self._cnx, attr)
+
+    def close(self):
+        if self._cnx is not None:
+            cnx, self._cnx = self._cnx, None
+            self._pool.release(cnx, self._read_only, self._keep_session)
+
+    def __del__(self):
+        # Safety net for callers that never call close()
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ManagedPool:
+    """Thread-safe MySQL pool that waits for a free connection instead of failing.
+
+    - keeps at least *min_size* connections open, never more than *max_size*
+    - acquire() blocks up to *timeout* seconds, then raises PoolError
+    - connections idle longer than *idle_check* seconds are pinged first
+    - connections older than *max_lifetime* seconds are closed and replaced
+    - *ui_reserved* connections are only handed to the main (UI) thread,
+      so background workers can't take the whole pool
+    - read-only checkouts can skip the session reset on release, and
+      keep_session checkouts (cached prepared writes) always skip it, so
+      their server-side statements survive for the next checkout
+    """
+
+    def __init__(self, config, min_size=2, max_size=8, timeout=10.0,
+                 idle_check=30.0, max_lifetime=1800.0, ui_reserved=1,
+                 reset_session=True, skip_reset_for_reads=True, keepalive=60.0):
+        self._config = dict(config)
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self.idle_check = idle_check
+        self.max_lifetime = max_lifetime
+        self.ui_reserved = max(0, min(ui_reserved, self.max_size - 1))
+        self.reset_session = reset_session
+        self.skip_reset_for_reads = skip_reset_for_reads
+
+        self._cond = threading.Condition()
+        self._idle = []      # [(cnx, created_at, last_used)] - most recently used last
+        self._created = {}   # id(cnx) -> created_at, for checked-out connections
+        self._in_use = 0
+        self._closed = False
+        self._stats = {"acquired": 0, "waits": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0,
+                       "timeouts": 0, "recycled": 0, "validation_failures": 0, "in_use_peak": 0}
+
+        for _ in range(self.min_size):
+            cnx = self._connect()
+            self._idle.append((cnx, time.monotonic(), time.monotonic()))
+
+        self._keepalive = None
+        if keepalive:
+            self._keepalive = threading.Thread(target=self._keepalive_loop, args=(keepalive,),
+                                               name="carecrud-pool-keepalive", daemon=True)
+            self._keepalive.start()
+
+    def _connect(self):
+        return mysql.connector.connect(**self._config)
+
+    def _size(self):
+        return len(self._idle) + self._in_use
+
+    def _limit_for_caller(self):
+        if threading.current_thread() is threading.main_thread():
+            return self.max_size
+        return self.max_size - self.ui_reserved
+
+    # ── Checkout / return ──────────────────────────────────────────
+    def acquire(self, read_only=False, timeout=None, keep_session=False):
+        """Return a PooledConnection, waiting up to *timeout* seconds for one.
+        keep_session=True is for checkouts that leave no session state behind
+        (committed prepared statements); release() then skips the reset."""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        limit = self._limit_for_caller()
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                if self._in_use < limit and self._idle:
+                    cnx, created, last_used = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < limit and self._size() < self.max_size:
+                    cnx, created, last_used = None, None, None
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolError(
+                        f"No connection available within {timeout:.1f}s "
+                        f"({self._in_use}/{self.max_size} in use)")
+                waited = True
+                self._cond.wait(remaining)
+            self._note_acquire(start, waited)
+
+        try:
+            cnx, created = self._checkout(cnx, created, last_used)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created[id(cnx)] = created
+        return PooledConnection(self, cnx, read_only, keep_session)
+
+    def _note_acquire(self, start, waited):
+        st = self._stats
+        st["acquired"] += 1
+        st["in_use_peak"] = max(st["in_use_peak"], self._in_use)
+        if waited:
+            wait_ms = (time.monotonic() - start) * 1000
+            st["waits"] += 1
+            st["wait_ms_total"] += wait_ms
+            st["wait_ms_max"] = max(st["wait_ms_max"], wait_ms)
+
+    def _count(self, stat):
+        """Bump a counter from outside the lock."""
+        with self._cond:
+            self._stats[stat] += 1
+
+    def _checkout(self, cnx, created, last_used):
+        """Validate / recycle outside the lock. Returns (cnx, created_at)."""
+        now = time.monotonic()
+        if cnx is not None and now - created > self.max_lifetime:
+            self._close_quietly(cnx)
+            self._count("recycled")
+            cnx = None
+        elif cnx is not None and now - last_used > self.idle_check:
+            try:
+                cnx.ping(reconnect=False)
+            except Error:
+                self._close_quietly(cnx)
+                self._count("validation_failures")
+                cnx = None
+        if cnx is None:
+            cnx, created = self._connect(), now
+        return cnx, created
+
+    def release(self, cnx, read_only=False, keep_session=False):
+        """Give *cnx* back. Resets the session unless it was a read-only or
+        keep_session checkout."""
+        keep = True
+        try:
+            if (self.reset_session and not keep_session
+                    and not (read_only and self.skip_reset_for_reads)):
+                cnx.reset_session()
+                discard_cache(cnx)  # reset deallocates prepared statements
+            elif cnx.in_transaction:
+                cnx.rollback()  # don't carry a read snapshot into the next checkout
+        except Error:
+            keep = False
+        with self._cond:
+            self._in_use -= 1
+            created = self._created.pop(id(cnx), time.monotonic())
+            if keep and not self._closed:
+                self._idle.append((cnx, created, time.monotonic()))
+            else:
+                self._close_quietly(cnx)
+            # notify_all: a woken background waiter may not be allowed the UI slot
+            self._cond.notify_all()
+
+    # ── Maintenance ────────────────────────────────────────────────
+    def _keepalive_loop(self, interval):
+        while not self._closed:
+            time.sleep(interval)
+            self.keepalive()
+
+    def keepalive(self):
+        """Ping idle connections, drop dead or expired ones and top back up to min_size."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._in_use += len(idle)  # hold their slots while we check them
+        now = time.monotonic()
+        alive = []
+        for cnx, created, last_used in idle:
+            if now - created > self.max_lifetime:
+                self._close_quietly(cnx)
+                self._count("recycled")
+                continue
+            if now - last_used > self.idle_check:
+                try:
+                    cnx.ping(reconnect=False)
+                    last_used = now
+                except Error:
+                    self._close_quietly(cnx)
+                    self._count("validation_failures")
+                    continue
+            alive.append((cnx, created, last_used))
+        with self._cond:
+            self._in_use -= len(idle)
+            self._idle = alive + self._idle
+            missing = self.min_size - self._size()
+            self._cond.notify_all()
+        for _ in range(max(0, missing)):
+            try:
+                cnx = self._connect()
+            except Error:
+                break
+            with self._cond:
+                self._idle.insert(0, (cnx, time.monotonic(), time.monotonic()))
+                self._cond.notify()
+
+    def close(self):
+        """Close every idle connection; checked-out ones close when returned."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for cnx, _, _ in idle:
+            self._close_quietly(cnx)
+
+    @staticmethod
+    def _close_quietly(cnx):
+        try:
+            cnx.close()
+        except Exception:
+            pass
+
+    # ── Metrics ────────────────────────────────────────────────────
+    def stats(self):
+        """Utilization and wait-time numbers for dashboards / exports."""
+        with self._cond:
+            st = dict(self._stats)
+            st.update(size=self._size(), in_use=self._in_use, idle=len(self._idle),
+                      min_size=self.min_size, max_size=self.max_size)
+        st["utilization"] = round(st["in_use"] / self.max_size, 3)
+        st["wait_ms_avg"] = round(st["wait_ms_total"] / st["waits"], 3) if st["waits"] else 0
+        st["wait_ms_total"] = round(st["wait_ms_total"], 3)
+        st["wait_ms_max"] = round(st["wait_ms_max"], 3)
+        return st
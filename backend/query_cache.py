@@ -0,0 +1,110 @@
+# Read-through cache for SELECT results, keyed by SQL + params.
+# Entries expire after a TTL, the oldest are evicted past max_entries, and
+# writes invalidate every entry that reads from a table they touch.
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Table names after FROM / JOIN / INTO / UPDATE / TABLE (subqueries are skipped)
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE|TABLE)\s+`?(\w+)`?", re.IGNORECASE)
+
+
+def tables_in(sql):
+    """Lower-cased set of table names referenced by *sql*."""
+    return {t.lower() for t in _TABLE_RE.findall(sql or "")}
+
+
+class QueryCache:
+    """Thread-safe TTL + LRU result cache with table-scoped invalidation."""
+
+    def __init__(self, max_entries=256, default_ttl=60):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, tables, rows)
+        self._by_table = {}            # table -> set(keys)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self._listeners = []  # callables(tables) told about every invalidation
+
+    def add_listener(self, fn):
+        """Call *fn(tables)* whenever tables are invalidated (for other caches)."""
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    @staticmethod
+    def key(sql, params):
+        return (sql, tuple(params) if params else ())
+
+    def get(self, key):
+        """Return a copy of the cached rows, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                rows = entry[2]
+            else:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+        # callers sometimes mutate returned rows, so never hand out the cached ones
+        return [dict(r) for r in rows]
+
+    def put(self, key, rows, ttl=None):
+        tables = tables_in(key[0])
+        expires = time.monotonic() + (ttl or self.default_ttl)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (expires, tables, [dict(r) for r in rows])
+            for t in tables:
+                self._by_table.setdefault(t, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tables):
+        """Drop every entry that reads from any of *tables*."""
+        with self._lock:
+            for t in tables:
+                keys = self._by_table.pop(t.lower(), None)
+                if not keys:
+                    continue
+                for key in list(keys):
+                    if key in self._entries:
+                        self._drop(key)
+                        self.invalidations += 1
+        for fn in self._listeners:
+            fn(tables)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+
+    def _drop(self, key):
+        _, tables, _ = self._entries.pop(key)
+        for t in tables:
+            keys = self._by_table.get(t)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[t]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
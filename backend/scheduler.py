@@ -0,0 +1,188 @@
+# Cluster-wide maintenance jobs (leave expiry, queue sync, log archival).
+# Every client starts a JobScheduler thread, but only the one holding the
+# MySQL advisory lock SCHEDULER_LOCK_NAME runs jobs. The lock is taken with
+# GET_LOCK on a dedicated connection outside the pool, so it goes away with
+# the leader's session and another client picks it up on its next tick.
+# Due times live in scheduled_jobs (database clock) and are claimed with a
+# conditional UPDATE, so each job runs once per interval even across a
+# leader change. Every run is recorded in job_runs and in the query metrics.
+
+import socket
+import threading
+import time
+import traceback
+
+import mysql.connector
+
+from backend.db_config import (
+    SCHEDULER_ENABLED, SCHEDULER_TICK, SCHEDULER_LOCK_NAME,
+)
+
+
+class JobScheduler(threading.Thread):
+    """Background thread: elect a leader each tick, run due jobs if leader."""
+
+    def __init__(self, backend, jobs, tick=SCHEDULER_TICK, lock_name=SCHEDULER_LOCK_NAME):
+        super().__init__(name="carecrud-scheduler", daemon=True)
+        self._backend = backend
+        self._jobs = jobs
+        self._tick = tick
+        self._lock_name = lock_name
+        self._stop_event = threading.Event()
+        self._conn = None           # lock session, outside the pool
+        self.host = socket.gethostname()
+        self.is_leader = False
+
+    # ── Leader election ───────────────────────────────────────────
+    def _lock_query(self, sql):
+        with self._conn.cursor() as cur:
+            cur.execute(sql, (self._lock_name,))
+            return cur.fetchone()[0]
+
+    def _check_leader(self):
+        """Keep or try to take the lock. Returns True while this client leads."""
+        try:
+            if self._conn is None:
+                self._conn = mysql.connector.connect(**self._backend._connection_config())
+                self._conn.autocommit = True
+            if self.is_leader:
+                # Still ours? The server drops it if the session was lost.
+                self.is_leader = self._lock_query("SELECT IS_USED_LOCK(%s) = CONNECTION_ID()") == 1
+            else:
+                self.is_leader = self._lock_query("SELECT GET_LOCK(%s, 0)") == 1
+        except Exception:
+            self.is_leader = False
+            self._disconnect()
+        return self.is_leader
+
+    def _disconnect(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    # ── Loop ──────────────────────────────────────────────────────
+    def run(self):
+        seeded = False
+        while not self._stop_event.is_set():
+            try:
+                if self._check_leader():
+                    if not seeded:
+                        seeded = self._backend._seed_jobs(self._jobs)
+                    for name, method, every in self._jobs:
+                        if self._stop_event.is_set():
+                            break
+                        if self._backend._claim_job(name, every, self.host):
+                            self._backend._run_job(name, method, self.host)
+            except Exception:
+                traceback.print_exc()
+            self._stop_event.wait(self._tick)
+        if self.is_leader:
+            try:
+                self._lock_query("SELECT RELEASE_LOCK(%s)")
+            except Exception:
+                pass
+        self._disconnect()
+
+    def stop(self, timeout=5):
+        self._stop_event.set()
+        self.join(timeout)
+
+
+class SchedulerMixin:
+
+    # (job name, backend method, interval in seconds or 'daily').
+    # Daily jobs run once per calendar day, just after midnight.
+    SCHEDULED_JOBS = [
+        ("leave_expiry", "auto_expire_leaves", "daily"),
+        ("queue_sync", "sync_today_appointments_to_queue", "daily"),
+        ("log_archive", "archive_activity_log", "daily"),
+    ]
+    _scheduler = None  # JobScheduler, see start_scheduler()
+
+    def start_scheduler(self):
+        """Start the shared job scheduler thread (once per process)."""
+        if not SCHEDULER_ENABLED:
+            return None
+        sched = SchedulerMixin._scheduler
+        if sched is None or not sched.is_alive():
+            sched = SchedulerMixin._scheduler = JobScheduler(self, list(self.SCHEDULED_JOBS))
+            sched.start()
+        return sched
+
+    def stop_scheduler(self):
+        """Stop the scheduler and release leadership."""
+        sched, SchedulerMixin._scheduler = SchedulerMixin._scheduler, None
+        if sched is not None:
+            sched.stop()
+
+    @staticmethod
+    def _next_run_sql(every):
+        return ("CURDATE() + INTERVAL 1 DAY" if every == "daily"
+                else f"NOW() + INTERVAL {int(every)} SECOND")
+
+    def _seed_jobs(self, jobs):
+        """Add a scheduled_jobs row (due now) for any job that has none."""
+        return self.exec_many([
+            ("INSERT IGNORE INTO scheduled_jobs (job_name, next_run_at) VALUES (%s, NOW())",
+             (name,)) for name, _, _ in jobs]) is not False
+
+    def _claim_job(self, name, every, host):
+        """Move a due job's next_run_at forward. True if this call claimed it."""
+        return self.exec(f"""
+            UPDATE scheduled_jobs SET next_run_at = {self._next_run_sql(every)},
+                   last_started_at = NOW(), last_host = %s
+            WHERE job_name = %s AND next_run_at <= NOW()
+        """, (host, name)) == 1
+
+    def _run_job(self, name, method, host):
+        """Run one job and record it in job_runs / scheduled_jobs / metrics."""
+        start = time.perf_counter()
+        err, result = None, None
+        try:
+            result = getattr(self, method)()
+        except Exception as e:
+            traceback.print_exc()
+            err = e
+        elapsed = (time.perf_counter() - start) * 1000
+        status = "Failed" if err is not None or result is False else "OK"
+        detail = str(err if err is not None else result)[:255]
+        self.metrics.record(f"job:{name}", "job", elapsed,
+                            result if type(result) is int else 0, err)
+        self.exec_many([
+            ("INSERT INTO job_runs (job_name, host, started_at, finished_at, duration_ms, "
+             "status, result) SELECT job_name, %s, last_started_at, NOW(), %s, %s, %s "
+             "FROM scheduled_jobs WHERE job_name = %s",
+             (host, int(elapsed), status, detail, name)),
+            ("UPDATE scheduled_jobs SET last_finished_at = NOW(), last_status = %s, "
+             "last_duration_ms = %s, run_count = run_count + 1, "
+             "fail_count = fail_count + %s WHERE job_name = %s",
+             (status, int(elapsed), 1 if status == "Failed" else 0, name)),
+        ])
+        return status
+
+    def get_scheduler_status(self):
+        """Leader flag for this client plus the schedule of every job."""
+        sched = SchedulerMixin._scheduler
+        return {
+            "running": bool(sched and sched.is_alive()),
+            "leader": bool(sched and sched.is_leader),
+            "jobs": self.fetch("""
+                SELECT job_name, next_run_at, last_started_at, last_finished_at,
+                       last_status, last_duration_ms, last_host, run_count, fail_count
+                FROM scheduled_jobs ORDER BY job_name
+            """),
+        }
+
+    def get_job_runs(self, job_name=None, limit=50):
+        """Recent job runs, newest first."""
+        where, params = "", []
+        if job_name:
+            where, params = "WHERE job_name = %s", [job_name]
+        params.append(limit)
+        return self.fetch(f"""
+            SELECT run_id, job_name, host, started_at, duration_ms, status, result
+            FROM job_runs {where} ORDER BY run_id DESC LIMIT %s
+        """, params)
@@ -10,7 +10,8 @@ class SettingsMixin:
             "employees", "users", "services",
             "departments", "roles", "payment_methods",
             "activity_log", "standard_conditions", "discount_types",
-            "paycheck_requests", "tax_settings",
+            "paycheck_requests", "payroll_runs", "tax_settings",
+            "activity_log_archive", "job_runs",
         ]
         results = []
         conn = None
@@ -51,6 +52,7 @@ class SettingsMixin:
                             (status,) + params)
                 removed = cur.rowcount
                 conn.commit()
+            self.invalidate_cache("invoice_items", "invoices", "queue_entries", "appointments")
             self.log_activity("Deleted", "Appointment", f"Cleaned {removed} {status.lower()} appts")
             return removed
         except Exception:
@@ -86,6 +88,8 @@ class SettingsMixin:
                 cur.execute("DELETE FROM patients WHERE status='Inactive'")
                 removed = cur.rowcount
                 conn.commit()
+            self.invalidate_cache("invoice_items", "invoices", "queue_entries", "appointments",
+                                  "patient_conditions", "patients")
             self.log_activity("Deleted", "Patient", f"Cleaned {removed} inactive patients")
             return removed
         except Exception:
@@ -111,6 +115,7 @@ class SettingsMixin:
                 for _ in cur:
                     pass
                 conn.commit()
+            self.invalidate_cache(table_name)
             self.log_activity("Deleted", "System", f"Truncated table {table_name}")
             return True
         except Exception:
@@ -145,7 +150,7 @@ class SettingsMixin:
         if active_only:
             sql += " WHERE is_active = 1"
         sql += " ORDER BY type_name"
-        return self.fetch(sql)
+        return self.fetch(sql, cached=True)
 
     def add_discount_type(self, name, percent, legal_basis="", requires_id_proof=0):
         ok = self.exec(
@@ -190,7 +195,7 @@ class SettingsMixin:
         """Return all tax settings as a list of dicts."""
         return self.fetch(
             "SELECT setting_id, setting_key, value, description, updated_at "
-            "FROM tax_settings ORDER BY setting_id")
+            "FROM tax_settings ORDER BY setting_id", cached=True)
 
     def get_tax_rates(self):
         """Return a convenient dict: {'sss_rate': 4.5, 'philhealth_rate': 2.5, ...}."""
@@ -207,10 +212,12 @@ class SettingsMixin:
                               f"{setting_key} → {value}%")
         return ok
 
-    def calculate_deductions(self, gross_amount):
+    def calculate_deductions(self, gross_amount, rates=None):
         """Calculate SSS, PhilHealth, Hospital deductions from gross amount.
-        Returns dict with sss, philhealth, hospital_share, total_deductions, net."""
-        rates = self.get_tax_rates()
+        Returns dict with sss, philhealth, hospital_share, total_deductions, net.
+        Pass *rates* (from get_tax_rates) to reuse them across many calls."""
+        if rates is None:
+            rates = self.get_tax_rates()
         sss_rate = rates.get("sss_rate", 4.5)
         phil_rate = rates.get("philhealth_rate", 2.5)
         hosp_rate = rates.get("hospital_share_rate", 10.0)
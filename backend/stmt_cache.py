@@ -0,0 +1,63 @@
+# Per-connection cache of server-side prepared statements (LRU, keyed by SQL text)
+
+from collections import OrderedDict
+
+
+class PreparedStatementCache:
+    """Keeps one prepared cursor per SQL string on a single connection.
+
+    MySQLCursorPrepared only re-prepares when it is handed a *different*
+    statement object, so each entry stores the SQL string it was prepared
+    with and callers execute through that exact object.
+    """
+
+    def __init__(self, cnx, max_size=32):
+        self._cnx = cnx
+        self._max_size = max_size
+        self._entries = OrderedDict()  # sql -> (cursor, sql)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sql):
+        """Return (cursor, sql) for *sql*, preparing it on first use."""
+        entry = self._entries.get(sql)
+        if entry is not None:
+            self._entries.move_to_end(sql)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = (self._cnx.cursor(prepared=True), sql)
+        self._entries[sql] = entry
+        if len(self._entries) > self._max_size:
+            _, (old_cur, _) = self._entries.popitem(last=False)
+            try:
+                old_cur.close()  # sends COM_STMT_CLOSE for the evicted statement
+            except Exception:
+                pass
+        return entry
+
+    def discard(self):
+        """Forget every entry without talking to the server.
+        Use after a session reset, which already deallocated the statements."""
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def cache_for(conn, max_size):
+    """Return the statement cache attached to *conn*'s physical connection."""
+    cnx = getattr(conn, "_cnx", None) or conn  # unwrap PooledMySQLConnection
+    cache = getattr(cnx, "_stmt_cache", None)
+    if cache is None:
+        cache = PreparedStatementCache(cnx, max_size)
+        cnx._stmt_cache = cache
+    return cache
+
+
+def discard_cache(conn):
+    """Drop the cache attached to *conn* (if any)."""
+    cnx = getattr(conn, "_cnx", None) or conn
+    cache = getattr(cnx, "_stmt_cache", None)
+    if cache is not None:
+        cache.discard()
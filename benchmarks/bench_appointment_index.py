@@ -0,0 +1,138 @@
+# Benchmark: booking-validation latency vs. appointments table size.
+# Fills a scratch copy of the appointments table in steps (10k ... 5M rows)
+# and times the conflict / daily-quota checks with and without the
+# doctor-day indexes from DatabaseBase.MANAGED_INDEXES.
+#
+#   python benchmarks/bench_appointment_index.py [max_rows] [iterations]
+#
+# Uses its own table (bench_appointments) - the real data is not touched.
+
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector
+from backend.base import DatabaseBase
+from backend.db_config import DB_CONFIG
+
+TABLE = "bench_appointments"
+SIZES = (10_000, 100_000, 1_000_000, 5_000_000)
+DOCTORS = 50
+DAYS = 3650
+BATCH = 5000
+
+CHECKS = [
+    ("check_appointment_conflict",
+     f"SELECT COUNT(*) FROM {TABLE} WHERE doctor_id=%s AND appointment_date=%s "
+     "AND appointment_time=%s AND status NOT IN ('Cancelled')"),
+    ("check_daily_quota",
+     f"SELECT COUNT(*) FROM {TABLE} WHERE doctor_id=%s AND appointment_date=%s "
+     "AND status NOT IN ('Cancelled')"),
+    ("today_count_by_doctor",
+     f"SELECT doctor_id, COUNT(*) FROM {TABLE} WHERE appointment_date=%s "
+     "AND status <> 'Cancelled' GROUP BY doctor_id"),
+]
+
+_INDEXES = [(name, cols) for table, name, cols in DatabaseBase.MANAGED_INDEXES
+            if table == "appointments"]
+
+
+def _create_table(cur):
+    cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cur.execute(f"""
+        CREATE TABLE {TABLE} (
+            appointment_id   INT AUTO_INCREMENT PRIMARY KEY,
+            patient_id       INT  NOT NULL,
+            doctor_id        INT  NOT NULL,
+            service_id       INT  NOT NULL,
+            appointment_date DATE NOT NULL,
+            appointment_time TIME NOT NULL,
+            status ENUM('Pending','Confirmed','Cancelled','Completed') NOT NULL DEFAULT 'Pending',
+            KEY idx_doctor (doctor_id)
+        )
+    """)
+
+
+def _fill(cnx, cur, count, rng):
+    start = date.today() - timedelta(days=DAYS // 2)
+    statuses = ("Confirmed", "Completed", "Completed", "Cancelled", "Pending")
+    sql = (f"INSERT INTO {TABLE} (patient_id, doctor_id, service_id, appointment_date, "
+           "appointment_time, status) VALUES (%s,%s,%s,%s,%s,%s)")
+    done = 0
+    while done < count:
+        n = min(BATCH, count - done)
+        rows = [(rng.randint(1, 100_000), rng.randint(1, DOCTORS), rng.randint(1, 20),
+                 start + timedelta(days=rng.randrange(DAYS)),
+                 f"{rng.randint(8, 16):02d}:{rng.choice((0, 30)):02d}:00", rng.choice(statuses))
+                for _ in range(n)]
+        cur.executemany(sql, rows)
+        cnx.commit()
+        done += n
+
+
+def _set_indexes(cur, enabled):
+    for name, cols in _INDEXES:
+        cur.execute(f"SHOW INDEX FROM {TABLE} WHERE Key_name = %s", (name,))
+        exists = bool(cur.fetchall())
+        if enabled and not exists:
+            cur.execute(f"CREATE INDEX {name} ON {TABLE} ({cols})")
+        elif not enabled and exists:
+            cur.execute(f"DROP INDEX {name} ON {TABLE}")
+
+
+def _time_checks(cur, iterations, rng):
+    today = date.today()
+    out = {}
+    for name, sql in CHECKS:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            day = today + timedelta(days=rng.randint(-30, 30))
+            if "appointment_time" in sql:
+                params = (rng.randint(1, DOCTORS), day, "09:00:00")
+            elif "doctor_id=%s" in sql:
+                params = (rng.randint(1, DOCTORS), day)
+            else:
+                params = (day,)
+            cur.execute(sql, params)
+            cur.fetchall()
+        out[name] = (time.perf_counter() - start) / iterations * 1000
+    return out
+
+
+def main():
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1]
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    sizes = [n for n in SIZES if n <= max_rows] or [max_rows]
+    rng = random.Random(42)
+
+    cnx = mysql.connector.connect(**DB_CONFIG)
+    try:
+        cur = cnx.cursor()
+        _create_table(cur)
+        print(f"{'rows':>10}  {'query':<28}{'no index':>12}{'indexed':>12}   (ms/call)")
+        filled = 0
+        for size in sizes:
+            _set_indexes(cur, False)  # bulk load is faster without the secondary indexes
+            _fill(cnx, cur, size - filled, rng)
+            filled = size
+            cur.execute(f"ANALYZE TABLE {TABLE}")
+            cur.fetchall()
+            plain = _time_checks(cur, iterations, rng)
+            _set_indexes(cur, True)
+            cur.execute(f"ANALYZE TABLE {TABLE}")
+            cur.fetchall()
+            indexed = _time_checks(cur, iterations, rng)
+            for name, _ in CHECKS:
+                print(f"{size:>10,}  {name:<28}{plain[name]:>12.3f}{indexed[name]:>12.3f}")
+        cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cur.close()
+    finally:
+        cnx.close()
+
+
+if __name__ == "__main__":
+    main()
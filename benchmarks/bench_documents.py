@@ -0,0 +1,70 @@
+# Benchmark: payslip PDF throughput.
+# Renders N synthetic payslips (no database needed) three ways - rebuilding
+# the template and stylesheet for every document, with the per-process
+# caches, and through the process pool - then times merging them into one PDF.
+#
+#   python benchmarks/bench_documents.py [documents] [workers]
+
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import documents
+
+
+def _contexts(n):
+    return [documents.payslip_context({
+        "request_id": i, "employee_name": f"Employee {i:04d}", "role_name": "Nurse",
+        "department_name": "Pediatrics", "status": "Approved",
+        "period_from": "2026-10-01", "period_until": "2026-10-15",
+        "requested_by_name": "HR Officer", "decided_by_name": "Finance Officer",
+        "amount": 25000 + i, "sss_deduction": 1125, "philhealth_deduction": 625,
+        "hospital_share": 2500, "net_amount": 20750 + i,
+    }) for i in range(1, n + 1)]
+
+
+def _cold(contexts):
+    start = time.perf_counter()
+    for ctx in contexts:
+        documents._template.cache_clear()
+        documents._stylesheet.cache_clear()
+        documents.render_pdf("payslip", ctx)
+    return time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    logging.getLogger("xhtml2pdf").setLevel(logging.ERROR)
+    contexts = _contexts(n)
+
+    documents.warm_up()
+    cold = _cold(contexts)
+    cached = documents.render_batch("payslip", contexts, workers=1)["seconds"]
+    pooled = documents.render_batch("payslip", contexts, workers=workers)
+
+    pdfs = [documents.render_pdf("payslip", ctx) for ctx in contexts[:50]]
+    start = time.perf_counter()
+    writer = documents.PdfWriter()
+    for data in pdfs:
+        for page in documents.PdfReader(io.BytesIO(data)).pages:
+            writer.add_page(page)
+    with tempfile.TemporaryFile() as f:
+        writer.write(f)
+    merge = (time.perf_counter() - start) / len(pdfs) * 1000
+
+    print(f"{n} payslips, {os.cpu_count()} CPU(s)\n")
+    print(f"{'mode':<28}{'seconds':>10}{'docs/s':>10}")
+    for label, secs in (("no template cache", cold), ("cached, serial", cached),
+                        (f"cached, pool x{pooled['workers']}", pooled["seconds"])):
+        print(f"{label:<28}{secs:>10.2f}{n / secs:>10.1f}")
+    print(f"\nmerge: {merge:.2f} ms/document")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Benchmark: pure-Python driver vs C extension vs server-side prepared statements.
+# Runs the hot backend queries N times on one connection and prints per-call latency.
+#
+#   python benchmarks/bench_prepared.py [iterations]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector
+from backend.db_config import DB_CONFIG
+
+HOT_QUERIES = [
+    ("get_today_attendance",
+     "SELECT attendance_id, time_in, time_out, status FROM attendance "
+     "WHERE employee_id = %s AND record_date = CURDATE() LIMIT 1", (1,)),
+    ("check_appointment_conflict",
+     "SELECT COUNT(*) AS cnt FROM appointments WHERE doctor_id=%s AND appointment_date=CURDATE() "
+     "AND appointment_time=%s AND status NOT IN ('Cancelled')", (1, "09:00:00")),
+    ("get_queue_entries",
+     "SELECT q.queue_id, q.queue_time, q.status FROM queue_entries q "
+     "WHERE q.created_at = CURDATE() AND q.doctor_id = %s ORDER BY q.queue_time", (1,)),
+    ("get_employee_id_by_email",
+     "SELECT e.employee_id FROM employees e WHERE e.email = %s LIMIT 1", ("admin@carecrud.com",)),
+]
+
+
+def _run(cnx, iterations, prepared):
+    results = {}
+    for name, sql, params in HOT_QUERIES:
+        cur = cnx.cursor(prepared=True) if prepared else cnx.cursor()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            cur.execute(sql, params)
+            cur.fetchall()
+        results[name] = (time.perf_counter() - start) / iterations * 1000
+        cur.close()
+    return results
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    modes = [("pure", True, False), ("pure+prepared", True, True)]
+    if mysql.connector.HAVE_CEXT:
+        modes += [("cext", False, False), ("cext+prepared", False, True)]
+    else:
+        print("C extension not available - skipping cext modes\n")
+
+    table = {}
+    for label, use_pure, prepared in modes:
+        cfg = dict(DB_CONFIG, use_pure=use_pure)
+        cnx = mysql.connector.connect(**cfg)
+        try:
+            table[label] = _run(cnx, iterations, prepared)
+        finally:
+            cnx.close()
+
+    labels = [m[0] for m in modes]
+    print(f"{'query':<28}" + "".join(f"{l:>16}" for l in labels) + "   (ms/call)")
+    for name, _, _ in HOT_QUERIES:
+        print(f"{name:<28}" + "".join(f"{table[l][name]:>16.3f}" for l in labels))
+
+
+if __name__ == "__main__":
+    main()
@@ -156,7 +156,7 @@ CREATE TABLE appointments (
     service_id         INT  NOT NULL,
     appointment_date   DATE NOT NULL,
     appointment_time   TIME NOT NULL,
-    status             ENUM('Pending', 'Confirmed', 'Cancelled', 'Completed') NOT NULL DEFAULT 'Pending',
+    status             ENUM('Pending', 'Confirmed', 'Cancelled', 'Completed', 'No-Show') NOT NULL DEFAULT 'Pending',
     notes              TEXT,
     cancellation_reason TEXT,
     reschedule_reason  TEXT,
@@ -290,11 +290,53 @@ CREATE TABLE paycheck_requests (
     decided_at           DATETIME DEFAULT NULL,
     disbursed_at         DATETIME DEFAULT NULL,
     created_at           DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    run_id               INT DEFAULT NULL,
     FOREIGN KEY (employee_id) REFERENCES employees(employee_id),
     FOREIGN KEY (requested_by) REFERENCES employees(employee_id),
     FOREIGN KEY (finance_decided_by) REFERENCES employees(employee_id)
 );
 
+-- Payroll runs (one header per batch of paycheck requests)
+CREATE TABLE payroll_runs (
+    run_id           INT AUTO_INCREMENT PRIMARY KEY,
+    period_from      DATE NOT NULL,
+    period_until     DATE NOT NULL,
+    filters          VARCHAR(255) DEFAULT NULL,
+    prorated         TINYINT(1) NOT NULL DEFAULT 1,
+    employee_count   INT NOT NULL DEFAULT 0,
+    total_gross      DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    total_deductions DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    total_net        DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    created_by       INT NOT NULL,
+    created_at       DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (created_by) REFERENCES employees(employee_id)
+);
+
+-- Maintenance job schedule (one row per job) and run history
+CREATE TABLE scheduled_jobs (
+    job_name         VARCHAR(50) PRIMARY KEY,
+    next_run_at      DATETIME NOT NULL,
+    last_started_at  DATETIME DEFAULT NULL,
+    last_finished_at DATETIME DEFAULT NULL,
+    last_status      VARCHAR(10) DEFAULT NULL,
+    last_duration_ms INT DEFAULT NULL,
+    last_host        VARCHAR(100) DEFAULT NULL,
+    run_count        INT NOT NULL DEFAULT 0,
+    fail_count       INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE job_runs (
+    run_id      INT AUTO_INCREMENT PRIMARY KEY,
+    job_name    VARCHAR(50) NOT NULL,
+    host        VARCHAR(100) DEFAULT NULL,
+    started_at  DATETIME DEFAULT NULL,
+    finished_at DATETIME NOT NULL,
+    duration_ms INT NOT NULL DEFAULT 0,
+    status      VARCHAR(10) NOT NULL,
+    result      VARCHAR(255) DEFAULT NULL,
+    INDEX idx_job_runs_job (job_name, run_id)
+);
+
 -- Attendance (Employee clock-in/out records)
 CREATE TABLE attendance (
     attendance_id INT AUTO_INCREMENT PRIMARY KEY,
@@ -331,6 +373,8 @@ CREATE INDEX idx_appointments_date     ON appointments(appointment_date);
 CREATE INDEX idx_appointments_doctor   ON appointments(doctor_id);
 CREATE INDEX idx_appointments_patient  ON appointments(patient_id);
 CREATE INDEX idx_appointments_status   ON appointments(status);
+CREATE INDEX idx_appointments_doctor_day   ON appointments(doctor_id, appointment_date, appointment_time, status);
+CREATE INDEX idx_appointments_date_status  ON appointments(appointment_date, status);
 CREATE INDEX idx_invoices_patient      ON invoices(patient_id);
 CREATE INDEX idx_invoices_status       ON invoices(status);
 CREATE INDEX idx_invoices_appointment  ON invoices(appointment_id);
@@ -349,6 +393,14 @@ CREATE INDEX idx_notifications_employee  ON notifications(employee_id);
 CREATE INDEX idx_notifications_read      ON notifications(is_read);
 CREATE INDEX idx_paycheck_requests_emp    ON paycheck_requests(employee_id);
 CREATE INDEX idx_paycheck_requests_status ON paycheck_requests(status);
+CREATE INDEX idx_paycheck_requests_run    ON paycheck_requests(run_id);
+CREATE INDEX idx_paycheck_requests_status_created ON paycheck_requests(status, created_at);
+CREATE INDEX idx_paycheck_requests_created ON paycheck_requests(created_at);
+CREATE INDEX idx_attendance_date          ON attendance(record_date, employee_id, status);
+CREATE INDEX idx_notifications_unread    ON notifications(employee_id, is_read, notification_id);
+
+-- Old activity_log rows, moved by the log_archive maintenance job
+CREATE TABLE activity_log_archive LIKE activity_log;
 
 
 -- ============================================================
@@ -71,6 +71,9 @@ class App:
             self.main_win = MainWindow(user_email=email, user_role=role, user_name=full_name)
             self.main_win.logout_requested.connect(self._on_logout)
             self.main_win.showMaximized()
+            # Leave expiry, queue sync and log archival - runs on whichever
+            # client currently holds the scheduler lock
+            self._backend.start_scheduler()
         except Exception as e:
             traceback.print_exc()
             QMessageBox.critical(None, "Startup Error", str(e))
@@ -96,6 +99,7 @@ class App:
             self.main_win = None
 
     def _on_app_quit(self):
+        self._backend.stop_scheduler()
         # Ensure they are clocked out if they just close the app window
         if hasattr(self, 'current_user_email') and self.current_user_email:
             self._backend.set_current_user(self.current_user_email, getattr(self, 'current_user_role', ''))
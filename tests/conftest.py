@@ -0,0 +1,7 @@
+# Unit tests for the backend's pure logic - no database needed.
+# Run from the repository root:  python -m pytest -q
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,188 @@
+from datetime import date, timedelta
+
+import pytest
+
+from backend.appointments import AppointmentMixin, booking_window_end, tab_window
+from backend.availability import DaySlots
+
+
+def test_tab_window():
+    today = date(2026, 10, 7)  # a Wednesday
+    assert tab_window("today", today) == (today, today, False)
+    assert tab_window("tomorrow", today) == (date(2026, 10, 8), date(2026, 10, 8), False)
+    assert tab_window("This Week", today) == (date(2026, 10, 5), date(2026, 10, 11), False)
+    assert tab_window("month", today) == (date(2026, 10, 1), date(2026, 10, 31), False)
+    assert tab_window("upcoming", today) == (today, None, False)
+    assert tab_window("past", today) == (None, date(2026, 10, 6), True)
+    assert tab_window(None, today) == (None, None, True)
+
+
+@pytest.mark.parametrize("today, last", [
+    (date(2026, 1, 31), date(2026, 2, 28)),
+    (date(2026, 11, 30), date(2026, 12, 31)),
+    (date(2026, 12, 1), date(2027, 1, 31)),
+    (date(2028, 1, 15), date(2028, 2, 29)),
+])
+def test_booking_window_end(today, last):
+    assert booking_window_end(today) == last
+
+
+class FakeAppointments(AppointmentMixin):
+    """Just enough backend for the pure parts of AppointmentMixin."""
+
+    def __init__(self, rows=(), statuses=None):
+        self.rows = list(rows)
+        self.statuses = dict(statuses or {})
+        self.fetched = []
+        self.logged = []
+        self.avail_calls = []
+        self.free_days = {}
+
+    def fetch(self, sql, params=None, **kwargs):
+        self.fetched.append((sql, params))
+        return [dict(r) for r in self.rows]
+
+    def get_slot_availability(self, date_from, date_to=None, doctor_id=None, **kwargs):
+        self.avail_calls.append((date_from, date_to))
+        return {doctor_id: {d: s for d, s in self.free_days.items() if date_from <= d <= date_to}}
+
+    def invalidate_cache(self, *tables):
+        pass
+
+    def log_activity(self, action, record_type, detail=""):
+        self.logged.append(detail)
+
+    def _get_connection(self, **kwargs):
+        return FakeConnection(self.statuses)
+
+
+class FakeCursor:
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        params = list(params)
+        if sql.startswith("SELECT"):
+            self._rows = [{"appointment_id": i, "status": self.statuses[i]}
+                          for i in params if i in self.statuses]
+        else:
+            new_status = params[0]
+            for i in params[1 + sql.count("cancellation_reason"):]:
+                self.statuses[i] = new_status
+
+    def fetchall(self):
+        return self._rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, statuses):
+        self.statuses = statuses
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.statuses)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_transition_follows_status_table():
+    backend = FakeAppointments(statuses={1: "Pending", 2: "Confirmed", 3: "Completed", 4: "Cancelled"})
+    res = backend.transition_appointments([1, 2, 3, 4, 99], "Cancelled", " no reason ")
+    assert res == {"updated": [1, 2], "skipped": [(3, "Completed"), (4, "Cancelled"), (99, "Missing")]}
+    assert backend.statuses[1] == backend.statuses[2] == "Cancelled"
+    assert len(backend.logged) == 1 and "(reason: no reason)" in backend.logged[0]
+
+    res = backend.transition_appointments([1], "Confirmed")
+    assert res == {"updated": [], "skipped": [(1, "Cancelled")]}
+
+
+def test_transition_rejects_unknown_status_and_empty_input():
+    backend = FakeAppointments()
+    assert backend.transition_appointments([1], "Rescheduled") == "Unknown status 'Rescheduled'."
+    assert backend.transition_appointments([], "Confirmed") == {"updated": [], "skipped": []}
+    for new, allowed in AppointmentMixin.STATUS_TRANSITIONS.items():
+        assert new not in allowed
+
+
+def test_appointments_window_keyset_cursor():
+    rows = [{"appointment_id": i, "appointment_date": date(2026, 10, 1),
+             "appointment_time": timedelta(hours=9, minutes=i)} for i in range(1, 4)]
+    backend = FakeAppointments(rows)
+    page = backend.get_appointments_window(tab="all", limit=2)
+    assert [r["appointment_id"] for r in page["rows"]] == [1, 2]
+    assert page["next_cursor"] == ("2026-10-01", "9:02:00", 2)
+    assert backend.fetched[-1][1][-1] == 3  # asks for one extra row
+
+    backend.rows = rows[2:]
+    page = backend.get_appointments_window(tab="all", limit=2, cursor=page["next_cursor"])
+    sql, params = backend.fetched[-1]
+    assert "(a.appointment_date, a.appointment_time, a.appointment_id) < (%s, %s, %s)" in sql
+    assert list(params[:3]) == ["2026-10-01", "9:02:00", 2]
+    assert page["next_cursor"] is None
+
+
+def test_plan_recurring_checks_each_occurrence():
+    backend = FakeAppointments()
+    today = date.today()
+    start = today + timedelta(days=1)
+    ok_day = DaySlots(start, 9 * 60, 12 * 60, 30, quota=10)
+    taken = DaySlots(start + timedelta(days=7), 9 * 60, 12 * 60, 30, quota=10)
+    taken.take(10 * 60)
+    leave = DaySlots(start + timedelta(days=14), 9 * 60, 12 * 60, 30, quota=10)
+    leave.on_leave = True
+    backend.free_days = {ok_day.day: ok_day, taken.day: taken, leave.day: leave}
+
+    plan = backend.plan_recurring_appointments(
+        {"date": start.isoformat(), "doctor_id": 1, "time": "10:00:00"}, every=1, unit="weeks", count=4)
+    assert [p["date"] for p in plan] == [(start + timedelta(days=7 * i)).isoformat() for i in range(4)]
+    assert [p["ok"] for p in plan[:3]] == [True, False, False]
+    assert plan[1]["reason"] == "Time slot taken"
+    assert plan[2]["reason"] == "Doctor on approved leave"
+    assert plan[3]["reason"] == "Doctor has no schedule on this day"
+
+
+def test_plan_recurring_respects_booking_window():
+    backend = FakeAppointments()
+    last = booking_window_end()
+    start = last - timedelta(days=1)
+    plan = backend.plan_recurring_appointments(
+        {"date": start.isoformat(), "doctor_id": 1, "time": "10:00:00"}, every=1, unit="days", count=5)
+    assert len(plan) == 5
+    assert all(p["reason"].startswith("Beyond the booking window") for p in plan[2:])
+    assert backend.avail_calls == [(start, last)]  # the query stops at the window
+
+    plan = backend.plan_recurring_appointments(
+        {"date": (last + timedelta(days=1)).isoformat(), "doctor_id": 1, "time": "10:00:00"}, count=2)
+    assert not any(p["ok"] for p in plan)
+    assert len(backend.avail_calls) == 1  # nothing inside the window to check
+
+
+def test_plan_recurring_caps_occurrences():
+    backend = FakeAppointments()
+    data = {"date": date.today().isoformat(), "doctor_id": 1, "time": "10:00:00"}
+    assert len(backend.plan_recurring_appointments(data, unit="days", count=500)) == \
+        AppointmentMixin.RECURRING_MAX_OCCURRENCES
+    assert backend.plan_recurring_appointments(data, every=0) == []
+    until = date.today() + timedelta(days=2)
+    assert len(backend.plan_recurring_appointments(data, unit="days", until=until)) == 3
+
+
+def test_recurring_series_requires_patient_id():
+    backend = FakeAppointments()
+    day = date.today().isoformat()
+    data = {"patient_name": "Ana Reyes", "doctor_id": 1, "service_id": 1, "time": "10:00:00"}
+    assert backend.add_recurring_appointments(data, [day]) is False
+    assert backend.fetched == []  # no name lookup
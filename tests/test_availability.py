@@ -0,0 +1,87 @@
+from datetime import date, datetime, timedelta
+
+from backend.availability import AvailabilityMixin, DaySlots
+from backend.intervals import LeaveIndex
+
+DAY = date(2026, 10, 5)  # a Monday
+
+
+def test_day_slots_bitmap():
+    slots = DaySlots(DAY, 9 * 60, 10 * 60, 15, quota=10)
+    assert slots.slot_count == 4
+    assert slots.free_times() == ["09:00:00", "09:15:00", "09:30:00", "09:45:00"]
+    slots.take(9 * 60 + 20)   # inside the 09:15 slot
+    assert not slots.is_free(9 * 60 + 15)
+    assert slots.is_free(9 * 60)
+    assert slots.booked == 1
+    slots.take(9 * 60)
+    assert slots.first_free() == 9 * 60 + 30
+
+
+def test_day_slots_bounds_and_full():
+    slots = DaySlots(DAY, 9 * 60, 10 * 60, 15, quota=1)
+    assert slots.index_of(8 * 60) is None
+    assert slots.index_of(10 * 60) is None
+    assert not slots.is_free(10 * 60)
+    slots.take(17 * 60)  # outside hours still counts against the quota
+    assert slots.full
+    assert slots.free_minutes() == []
+    assert slots.first_free() is None
+    assert slots.as_dict()["bits"] == 0
+
+    leave = DaySlots(DAY, 9 * 60, 10 * 60, 15, quota=5)
+    leave.on_leave = True
+    assert leave.full and leave.free_times() == []
+
+
+class FakeAvailability(AvailabilityMixin):
+    OVERBOOK_ENABLED = False
+    SLOT_MINUTES = 30
+    DAILY_QUOTA = 10
+
+    def __init__(self, schedules, appointments, leave):
+        self._schedules = schedules
+        self._appointments = appointments
+        self._leave = LeaveIndex(self)
+        self._leave_rows = leave
+
+    def fetch(self, sql, params=None, **kwargs):
+        if "FROM doctor_schedules" in sql:
+            return self._schedules
+        if "FROM leave_requests" in sql:
+            return self._leave_rows
+        return self._appointments
+
+    def get_leave_index(self):
+        return self._leave
+
+
+def test_slot_availability_folds_schedule_leave_and_bookings():
+    backend = FakeAvailability(
+        schedules=[
+            {"doctor_id": 1, "day_of_week": "Monday", "start_time": "09:00:00", "end_time": "11:00:00"},
+            {"doctor_id": 1, "day_of_week": "Tuesday", "start_time": timedelta(hours=13),
+             "end_time": timedelta(hours=14)},
+        ],
+        appointments=[
+            {"doctor_id": 1, "appointment_date": DAY, "appointment_time": timedelta(hours=9, minutes=30)},
+        ],
+        leave=[{"request_id": 5, "employee_id": 1, "leave_from": DAY + timedelta(days=1),
+                "leave_until": DAY + timedelta(days=1)}],
+    )
+    result = backend.get_slot_availability(DAY, DAY + timedelta(days=2),
+                                           now=datetime(2026, 10, 1, 8, 0))
+    per_day = result[1]
+    assert sorted(per_day) == [DAY, DAY + timedelta(days=1)]  # no Wednesday schedule
+    monday = per_day[DAY]
+    assert monday.free_times() == ["09:00:00", "10:00:00", "10:30:00"]
+    assert per_day[DAY + timedelta(days=1)].on_leave
+
+
+def test_slot_availability_masks_past_slots_today():
+    backend = FakeAvailability(
+        schedules=[{"doctor_id": 1, "day_of_week": "Monday",
+                    "start_time": "09:00:00", "end_time": "11:00:00"}],
+        appointments=[], leave=[])
+    slots = backend.get_slot_availability(DAY, now=datetime(2026, 10, 5, 10, 0))[1][DAY]
+    assert slots.free_times() == ["10:30:00"]
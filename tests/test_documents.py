@@ -0,0 +1,67 @@
+import pytest
+
+from backend import documents
+from backend.documents import payslip_context, receipt_context, safe_filename
+
+DETAIL = {
+    "info": {"invoice_id": 42, "created_at": "2026-10-05 09:30:00.123", "patient_name": "Ana <Reyes>",
+             "phone": None, "payment_method": "Cash", "status": "Partial",
+             "total_amount": 900, "amount_paid": 500},
+    "items": [
+        {"service_name": "Consultation", "quantity": 1, "unit_price": 500, "subtotal": 500},
+        {"service_name": "X-Ray", "quantity": 1, "unit_price": 500, "subtotal": 500},
+    ],
+}
+
+
+def test_receipt_context():
+    ctx = receipt_context(DETAIL)
+    assert ctx["invoice_id"] == "42"
+    assert ctx["date"] == "2026-10-05 09:30:00"
+    assert ctx["patient_name"] == "Ana &lt;Reyes&gt;"
+    assert ctx["phone"] == "—"
+    assert ctx["item_rows"].count("<tr>") == 2
+    totals = ctx["total_rows"]
+    # discount line because the items add up to more than the total
+    assert "Subtotal" in totals and "-₱100.00" in totals
+    assert "Balance due" in totals and "₱400.00" in totals
+    assert totals.count('<tr class="grand">') == 2
+
+
+def test_receipt_context_paid_in_full_without_discount():
+    detail = {"info": dict(DETAIL["info"], total_amount=1000, amount_paid=1000), "items": DETAIL["items"]}
+    totals = receipt_context(detail)["total_rows"]
+    assert "Subtotal" not in totals and "Balance due" not in totals
+    assert "₱1,000.00" in totals
+
+
+def test_payslip_context():
+    ctx = payslip_context({"request_id": 7, "employee_name": "Juan Cruz", "status": "Disbursed",
+                           "disbursed_at": "2026-10-16 14:05:59", "amount": 20000,
+                           "sss_deduction": 900.5, "net_amount": None})
+    assert ctx["employee_name"] == "Juan Cruz"
+    assert ctx["decided_by_name"] == "—"
+    assert ctx["disbursed_at"] == "2026-10-16 14:05"
+    assert ctx["amount"] == "₱20,000.00"
+    assert ctx["sss_deduction"] == "₱900.50"
+    assert ctx["net_amount"] == "₱0.00"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Juan Dela Cruz", "Juan_Dela_Cruz"),
+    ("../../etc/passwd", "etc_passwd"),
+    ('a\\b:c*d?"e<f>g|h', "a_b_c_d_e_f_g_h"),
+    ("José Rizal", "José_Rizal"),
+    ("", "unnamed"),
+    (None, "unnamed"),
+])
+def test_safe_filename(text, expected):
+    assert safe_filename(text) == expected
+
+
+def test_render_html_fills_every_placeholder():
+    if documents.markdown is None:
+        pytest.skip("markdown / xhtml2pdf not installed")
+    page = documents.render_html("receipt", receipt_context(DETAIL))
+    assert "$" not in page.split("</style>", 1)[1]
+    assert "Ana &lt;Reyes&gt;" in page
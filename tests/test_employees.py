@@ -0,0 +1,46 @@
+from datetime import date
+
+from backend.employees import EmployeeMixin, HRSnapshot
+
+
+class FakeBackend:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get_employees(self, detailed=False):
+        return [dict(r) for r in self.rows]
+
+
+def test_hr_snapshot_returns_copies():
+    snap = HRSnapshot(FakeBackend([
+        {"employee_id": 1, "role_name": "Doctor", "status": "Active", "salary": 50000,
+         "department_name": "OPD", "employment_type": "Full-time", "leave_until": None},
+        {"employee_id": 2, "role_name": "Nurse", "status": "On Leave", "salary": 30000,
+         "department_name": "ER", "employment_type": "Full-time", "leave_until": date(2026, 11, 2)},
+    ]))
+    first = snap.get()
+    first["employees"][0]["status"] = "Inactive"
+    first["on_leave"].clear()
+    first["stats"]["total"] = 0
+    second = snap.get()
+    assert second["employees"][0]["status"] == "Active"
+    assert [e["employee_id"] for e in second["on_leave"]] == [2]
+    assert second["stats"]["total"] == 2 and second["stats"]["doctors"] == 1
+
+
+class FakeAttendance(EmployeeMixin):
+    def __init__(self):
+        self.fetched = []
+
+    def fetch(self, sql, params=None, **kwargs):
+        self.fetched.append((sql, params))
+        return []
+
+
+def test_attendance_search_matches_name_or_role():
+    backend = FakeAttendance()
+    page = backend.get_attendance_window(date_from="2026-10-01", date_to="2026-10-07", search=" nurse ")
+    assert page == {"rows": [], "next_cursor": None}
+    sql, params = backend.fetched[-1]
+    assert "LIKE %s OR r.role_name LIKE %s" in sql
+    assert params[2:4] == ("%nurse%", "%nurse%")
@@ -0,0 +1,89 @@
+import random
+from datetime import date, timedelta
+
+from backend.intervals import IntervalTree, LeaveIndex
+
+
+def _brute(items, start, end):
+    return sorted(it for it in items if it[0] <= end and it[1] >= start)
+
+
+def test_interval_tree_matches_brute_force():
+    rng = random.Random(7)
+    items = []
+    for n in range(300):
+        s = rng.randint(0, 500)
+        items.append((s, s + rng.randint(0, 40), n))
+    tree = IntervalTree(items)
+    assert len(tree) == len(items)
+    for _ in range(500):
+        a = rng.randint(-10, 560)
+        b = a + rng.randint(0, 30)
+        assert sorted(tree.overlapping(a, b)) == _brute(items, a, b)
+        assert sorted(tree.at(a)) == _brute(items, a, a)
+
+
+def test_interval_tree_empty_and_closed_bounds():
+    assert IntervalTree().overlapping(0, 10) == []
+    tree = IntervalTree([(5, 10, "x")])
+    assert tree.at(5) == [(5, 10, "x")]
+    assert tree.at(10) == [(5, 10, "x")]
+    assert tree.at(11) == []
+    assert tree.overlapping(0, 4) == []
+
+
+class FakeBackend:
+    def __init__(self, rows):
+        self.rows = rows
+        self.fetches = 0
+
+    def fetch(self, sql, params=None, **kwargs):
+        self.fetches += 1
+        return list(self.rows)
+
+
+D = date(2026, 10, 5)
+ROWS = [
+    {"request_id": 1, "employee_id": 10, "leave_from": D, "leave_until": D + timedelta(days=4)},
+    {"request_id": 2, "employee_id": 11, "leave_from": "2026-10-08", "leave_until": "2026-10-09"},
+    {"request_id": 3, "employee_id": 10, "leave_from": D + timedelta(days=20),
+     "leave_until": D + timedelta(days=21)},
+]
+
+
+def test_leave_index_queries():
+    idx = LeaveIndex(FakeBackend(ROWS))
+    assert idx.on_leave(D) == {10: (D, D + timedelta(days=4))}
+    assert set(idx.on_leave("2026-10-08")) == {10, 11}
+    assert idx.on_leave(D - timedelta(days=1)) == {}
+
+    hits = idx.in_range(D + timedelta(days=3), D + timedelta(days=30))
+    assert sorted(emp for _, _, emp in hits) == [10, 10, 11]
+    assert [emp for _, _, emp in idx.in_range(D, D + timedelta(days=30), [11])] == [11]
+
+    clash = idx.overlaps(10, D + timedelta(days=2), D + timedelta(days=2))
+    assert [c["request_id"] for c in clash] == [1]
+    assert idx.overlaps(10, D, D + timedelta(days=30), exclude_request_id=1)[0]["request_id"] == 3
+    assert idx.overlaps(12, D, D + timedelta(days=30)) == []
+
+
+def test_leave_index_loads_once_and_reloads_on_invalidate():
+    backend = FakeBackend(ROWS)
+    idx = LeaveIndex(backend)
+    idx.on_leave(D)
+    idx.in_range(D, D)
+    assert backend.fetches == 1
+    idx.invalidate(["appointments"])
+    idx.on_leave(D)
+    assert backend.fetches == 1
+    idx.invalidate(["LEAVE_REQUESTS"])
+    idx.on_leave(D)
+    assert backend.fetches == 2
+
+
+def test_leave_index_reloads_after_max_age():
+    backend = FakeBackend(ROWS)
+    idx = LeaveIndex(backend, max_age=-1)
+    idx.on_leave(D)
+    idx.on_leave(D)
+    assert backend.fetches == 2
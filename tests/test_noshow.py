@@ -0,0 +1,38 @@
+from datetime import date, timedelta
+
+from backend.availability import AvailabilityMixin, DaySlots
+from backend.noshow import NoShowModel
+
+START = date(2026, 1, 5)
+
+
+def _row(i, status, patient=1):
+    d = START + timedelta(days=i)
+    return {"patient_id": patient, "service_id": 1, "appointment_date": d,
+            "appointment_time": "09:00:00", "created_at": d - timedelta(days=3), "status": status}
+
+
+def test_fit_learns_only_from_closed_out_visits():
+    rows = ([_row(0, "Completed"), _row(1, "No-Show"), _row(2, "Completed"), _row(3, "Cancelled")]
+            + [_row(4 + i, s) for i, s in enumerate(["Pending", "Confirmed"] * 5)])
+    model = NoShowModel().fit(rows)
+    assert model.samples == 3
+    assert model.base_rate == 2 / 3
+    assert model.patients[1] == [3, 1, 1]  # visits, no-shows, cancels
+
+
+def test_unfitted_model_does_not_overbook():
+    class Backend(AvailabilityMixin):
+        def get_noshow_model(self, refresh=False):
+            model = NoShowModel().fit([_row(0, "No-Show"), _row(1, "Completed")])
+            assert not model.fitted and model.base_rate < 0.6
+            return model
+
+    slots = DaySlots(START, 9 * 60, 12 * 60, 30, quota=2)
+    bookings = []
+    for i in range(2):
+        slots.take(9 * 60 + 30 * i)
+        bookings.append(dict(_row(0, "Confirmed", patient=i), appointment_time=f"09:{30 * i:02d}:00"))
+    bits, quota = slots.bits, slots.quota
+    Backend()._apply_overbooking({slots: bookings})
+    assert (slots.bits, slots.quota, slots.overbooked) == (bits, quota, 0)
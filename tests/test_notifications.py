@@ -0,0 +1,84 @@
+from backend.notifications import NotificationBroker
+
+
+class FakeBackend:
+    """notifications table in memory; fetch() answers the broker's unread query."""
+
+    def __init__(self):
+        self.rows = []
+
+    def add(self, nid, emp, msg="x"):
+        self.rows.append({"notification_id": nid, "employee_id": emp, "message": msg,
+                          "created_at": None, "is_read": 0})
+
+    def mark_read(self):
+        for r in self.rows:
+            r["is_read"] = 1
+
+    def fetch(self, sql, params=None, **kwargs):
+        wanted = set(params)
+        return [{k: v for k, v in r.items() if k != "is_read"}
+                for r in sorted(self.rows, key=lambda r: r["notification_id"])
+                if r["employee_id"] in wanted and not r["is_read"]]
+
+
+def _ids(rows):
+    return [r["notification_id"] for r in rows]
+
+
+def test_watch_queues_unread_backlog():
+    db = FakeBackend()
+    db.add(1, 7); db.add(2, 8)
+    broker = NotificationBroker(db)
+    broker.watch(7)
+    assert _ids(broker.take(7)) == [1]
+    assert broker.take(7) == []
+
+
+def test_late_committed_row_below_seen_ids_is_delivered():
+    db = FakeBackend()
+    broker = NotificationBroker(db)
+    broker.watch(7)
+    db.add(3, 7)
+    assert broker.poll() == 1
+    assert _ids(broker.take(7)) == [3]
+    db.add(2, 7)  # allocated earlier, committed later
+    assert broker.poll() == 1
+    assert _ids(broker.take(7)) == [2]
+    assert broker.poll() == 0
+
+
+def test_taken_ids_are_forgotten_once_read():
+    db = FakeBackend()
+    broker = NotificationBroker(db)
+    broker.watch(7)
+    db.add(1, 7)
+    broker.poll()
+    broker.take(7)
+    assert broker._taken[7] == {1}
+    db.mark_read()
+    broker.poll()
+    assert broker._taken[7] == set()
+
+
+def test_publish_is_not_delivered_twice():
+    db = FakeBackend()
+    broker = NotificationBroker(db)
+    broker.watch(7)
+    db.add(5, 7)
+    broker.publish(5, 7, "x")
+    broker.poll()
+    assert _ids(broker.take(7)) == [5]
+    broker.poll()
+    assert broker.take(7) == []
+
+
+def test_unwatch_stops_delivery():
+    db = FakeBackend()
+    broker = NotificationBroker(db)
+    broker.watch(7)
+    broker.unwatch(7)
+    db.add(1, 7)
+    broker.publish(1, 7, "x")
+    assert broker.poll() == 0
+    assert broker.take(7) == []
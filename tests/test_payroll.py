@@ -0,0 +1,124 @@
+from datetime import date, datetime
+
+import pytest
+
+from backend.employees import EmployeeMixin
+from backend.payroll import PayrollMixin, count_workdays
+from backend.settings import SettingsMixin
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    ("2026-10-05", "2026-10-09", 5),    # Monday..Friday
+    ("2026-10-05", "2026-10-11", 5),    # full week
+    ("2026-10-10", "2026-10-11", 0),    # weekend only
+    ("2026-10-01", "2026-10-31", 22),
+    ("2026-10-09", "2026-10-12", 2),    # Friday..Monday
+    ("2026-10-09", "2026-10-08", 0),    # reversed
+])
+def test_count_workdays(start, end, expected):
+    assert count_workdays(start, end) == expected
+
+
+def test_count_workdays_custom_week():
+    assert count_workdays(date(2026, 10, 5), date(2026, 10, 11), workdays=(0, 1, 2, 3, 4, 5)) == 6
+
+
+RATES = {"sss_rate": 5.0, "philhealth_rate": 2.0, "hospital_share_rate": 10.0}
+
+
+def test_calculate_deductions_with_rates():
+    ded = SettingsMixin().calculate_deductions(20000, RATES)
+    assert ded["sss_deduction"] == 1000.0
+    assert ded["philhealth_deduction"] == 400.0
+    assert ded["hospital_share"] == 2000.0
+    assert ded["total_deductions"] == 3400.0
+    assert ded["net_amount"] == 16600.0
+
+
+def test_calculate_deductions_defaults_and_rounding():
+    ded = SettingsMixin().calculate_deductions("1000.555", {})
+    assert (ded["sss_rate"], ded["philhealth_rate"], ded["hospital_share_rate"]) == (4.5, 2.5, 10.0)
+    assert ded["sss_deduction"] == 45.02
+    assert ded["net_amount"] == round(1000.555 - ded["total_deductions"], 2)
+
+
+class FakePayroll(PayrollMixin, SettingsMixin):
+
+    def __init__(self, employees, sheets):
+        self.employees = employees
+        self.sheets = sheets
+
+    def get_tax_rates(self):
+        return RATES
+
+    def get_timesheets(self, period_from, period_until, employee_ids=None):
+        return self.sheets
+
+    def _payroll_candidates(self, *args, **kwargs):
+        return self.employees
+
+
+EMPLOYEES = [
+    {"employee_id": 1, "employee_name": "A", "role_name": "Nurse", "department_name": "ER",
+     "salary": 22000, "has_paycheck": 0},
+    {"employee_id": 2, "employee_name": "B", "role_name": "Nurse", "department_name": "ER",
+     "salary": 30000, "has_paycheck": 1},
+    {"employee_id": 3, "employee_name": "C", "role_name": "HR", "department_name": "Admin",
+     "salary": None, "has_paycheck": 0},
+    {"employee_id": 4, "employee_name": "D", "role_name": "HR", "department_name": "Admin",
+     "salary": 15000, "has_paycheck": 0},
+]
+
+
+def test_preview_payroll_run_prorates_and_skips():
+    backend = FakePayroll(EMPLOYEES, {1: {"worked_days": 11, "late_days": 2, "net_hours": 80.0}})
+    plan = backend.preview_payroll_run("2026-10-01", "2026-10-31")
+    assert plan["workdays"] == 22
+    assert [l["employee_id"] for l in plan["lines"]] == [1]
+    line = plan["lines"][0]
+    assert line["amount"] == 11000.0 and line["days_worked"] == 11
+    assert line["net_amount"] == 11000.0 - 550.0 - 220.0 - 1100.0
+    assert {s["employee_id"]: s["reason"] for s in plan["skipped"]} == {
+        2: "Already has a paycheck for this period",
+        3: "No base salary set",
+        4: "No attendance in period",
+    }
+    assert plan["totals"] == {"employees": 1, "gross": 11000.0, "net": line["net_amount"],
+                              "deductions": round(11000.0 - line["net_amount"], 2)}
+
+
+def test_preview_payroll_run_without_proration_pays_full_salary():
+    backend = FakePayroll(EMPLOYEES, {})
+    plan = backend.preview_payroll_run("2026-10-01", "2026-10-15", prorate=False)
+    assert {l["employee_id"]: l["amount"] for l in plan["lines"]} == {1: 22000, 4: 15000}
+
+
+class FakePaychecks(EmployeeMixin):
+    PAYCHECK_PAGE_SIZE = 2
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.fetched = []
+
+    def fetch(self, sql, params=None, **kwargs):
+        self.fetched.append((sql, params))
+        return list(self.rows)
+
+
+def test_paycheck_page_keyset_cursor():
+    rows = [{"request_id": i, "created_at": datetime(2026, 10, i, 8, 0)} for i in (3, 2, 1)]
+    backend = FakePaychecks(rows)
+    page = backend.get_paycheck_requests_page(status="Pending")
+    assert [r["request_id"] for r in page["rows"]] == [3, 2]
+    assert page["next_cursor"] == ("2026-10-02 08:00:00", 2)
+    sql, params = backend.fetched[-1]
+    assert "pr.status = %s" in sql and "DESC" in sql
+    assert params == ("Pending", 3)
+
+    backend.rows = rows[2:]
+    page = backend.get_paycheck_requests_page(status="Pending", cursor=page["next_cursor"],
+                                              oldest_first=True)
+    sql, params = backend.fetched[-1]
+    assert "(pr.created_at, pr.request_id) > (%s, %s)" in sql and "ASC" in sql
+    assert params == ("Pending", "2026-10-02 08:00:00", 2, 3)
+    assert page["next_cursor"] is None
@@ -0,0 +1,89 @@
+import pytest
+
+from backend.base import DatabaseBase
+from backend.pool import ManagedPool
+
+
+class FakeCursor:
+    def __init__(self, cnx):
+        self._cnx = cnx
+        self.lastrowid = 0
+        self.rowcount = 1
+
+    def execute(self, sql, params=None):
+        self._cnx.executed.append(sql)
+        self.lastrowid = len(self._cnx.executed)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+        self.prepares = 0
+        self.resets = 0
+        self.in_transaction = False
+
+    def cursor(self, prepared=False, **kwargs):
+        if prepared:
+            self.prepares += 1
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def reset_session(self):
+        self.resets += 1
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakePool(ManagedPool):
+    def _connect(self):
+        return FakeConnection()
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    pool = FakePool({}, min_size=1, max_size=1, keepalive=0)
+    monkeypatch.setattr(DatabaseBase, "_pool", pool)
+    return DatabaseBase.__new__(DatabaseBase), pool
+
+
+def _only_connection(pool):
+    assert len(pool._idle) == 1
+    return pool._idle[0][0]
+
+
+def test_prepared_write_reuses_statement_across_checkouts(backend):
+    db, pool = backend
+    sql = "INSERT INTO activity_log (action) VALUES (%s)"
+    assert db.exec(sql, ("Added",), prepared=True)
+    assert db.exec(sql, ("Edited",), prepared=True)
+    cnx = _only_connection(pool)
+    assert cnx.prepares == 1
+    assert cnx.resets == 0
+    assert cnx._stmt_cache.hits == 1
+
+
+def test_plain_write_still_resets_and_drops_statements(backend):
+    db, pool = backend
+    db.exec("INSERT INTO activity_log (action) VALUES (%s)", ("Added",), prepared=True)
+    db.exec("UPDATE patients SET status = %s", ("Active",))
+    cnx = _only_connection(pool)
+    assert cnx.resets == 1
+    assert len(cnx._stmt_cache) == 0
@@ -111,20 +111,13 @@ class MainWindow(QMainWindow):
         # ── Notification check for leave request decisions ────────
         self._employee_id = self._backend.get_employee_id_by_email(self._user)
         if self._employee_id and self._role not in ("Admin", "HR"):
-            # Check immediately, then every 15 seconds
+            # Unread backlog shortly after startup, then an unread-index
+            # check every NOTIFY_POLL_SECONDS (see backend/notifications.py)
+            self._backend.watch_notifications(self._employee_id)
             QTimer.singleShot(1500, self._check_notifications)
             self._notif_timer = QTimer(self)
             self._notif_timer.timeout.connect(self._check_notifications)
-            self._notif_timer.start(60_000)
-
-        # ── Auto-expire leaves past their end date ────────────────────
-        try:
-            self._backend.auto_expire_leaves()
-        except Exception:
-            pass
-        self._leave_timer = QTimer(self)
-        self._leave_timer.timeout.connect(lambda: self._backend.auto_expire_leaves())
-        self._leave_timer.start(300_000)  # check every 5 minutes
+            self._notif_timer.start(self._backend.NOTIFY_POLL_SECONDS * 1000)
 
     # ── Sidebar ────────────────────────────────────────────────────────
     def _build_sidebar(self) -> QWidget:
@@ -406,17 +399,25 @@ class MainWindow(QMainWindow):
             self._dashboard_page._user_name = new_name
 
     # ── Notification check ──────────────────────────────────────────
+    def closeEvent(self, event):
+        # Logout and quit both close the window - stop watching this employee
+        if getattr(self, "_notif_timer", None):
+            self._notif_timer.stop()
+            self._backend.unwatch_notifications(self._employee_id)
+        super().closeEvent(event)
+
     def _check_notifications(self):
         """Check for unread notifications and display them."""
         if not self._employee_id:
             return
         try:
-            notifs = self._backend.get_unread_notifications(self._employee_id) or []
+            notifs = self._backend.check_notifications(self._employee_id)
             if notifs:
                 messages = []
                 for n in notifs:
                     messages.append(f"• {n.get('message', '')}")
-                self._backend.mark_notifications_read(self._employee_id)
+                self._backend.mark_notifications_read(
+                    self._employee_id, [n["notification_id"] for n in notifs])
                 msg_box = QMessageBox(self)
                 msg_box.setWindowTitle("System Notification")
                 
@@ -7,7 +7,7 @@ from PyQt6.QtWidgets import (
     QLabel, QTimeEdit, QDateEdit, QScrollArea, QSizePolicy,
     QMessageBox, QCompleter, QHBoxLayout, QVBoxLayout,
     QWidget, QFrame, QTableWidget, QTableWidgetItem, QHeaderView,
-    QPushButton,
+    QPushButton, QSpinBox,
 )
 from PyQt6.QtCore import Qt, QDate, QTime, QTimer
 from PyQt6.QtGui import QColor, QFont
@@ -105,6 +105,9 @@ class AppointmentDialog(QDialog):
         self._user_role = user_role
         self._is_edit = data is not None
         self._original_date = data.get("date", "") if data else ""
+        self._exclude_id = data.get("appointment_id") if data else None
+        self._day_slots = None
+        self._heat_doctor = None
 
         self._sched_start_hhmm: str | None = None
         self._sched_end_hhmm: str | None = None
@@ -251,6 +254,19 @@ class AppointmentDialog(QDialog):
         self.time_edit.setDisplayFormat("hh:mm AP")
         self.time_edit.setMinimumHeight(38)
 
+        # Free slots from the availability engine; replaces the free-form
+        # time editor whenever the doctor has a schedule for the day.
+        self.slot_combo = QComboBox()
+        self.slot_combo.setObjectName("formCombo")
+        self.slot_combo.setMinimumHeight(38)
+        self.slot_combo.setVisible(False)
+        self.slot_combo.currentIndexChanged.connect(self._on_slot_changed)
+        time_row = QWidget()
+        time_lay = QHBoxLayout(time_row)
+        time_lay.setContentsMargins(0, 0, 0, 0)
+        time_lay.addWidget(self.time_edit)
+        time_lay.addWidget(self.slot_combo)
+
         self._no_slots_label = QLabel()
         self._no_slots_label.setStyleSheet(
             "font-size: 12px; font-weight: bold; color: #D9534F;"
@@ -269,6 +285,32 @@ class AppointmentDialog(QDialog):
         self.notes_edit.setMaximumHeight(60)
         self.notes_edit.setPlaceholderText("Optional notes\u2026")
 
+        # Recurrence (new bookings only): every N days/weeks, C visits
+        self.repeat_combo = QComboBox()
+        self.repeat_combo.setObjectName("formCombo")
+        self.repeat_combo.setMinimumHeight(38)
+        self.repeat_combo.addItem("Does not repeat", None)
+        self.repeat_combo.addItem("Every N days", "days")
+        self.repeat_combo.addItem("Every N weeks", "weeks")
+        self.repeat_every = QSpinBox()
+        self.repeat_every.setRange(1, 12)
+        self.repeat_every.setPrefix("every ")
+        self.repeat_every.setMinimumHeight(38)
+        self.repeat_count = QSpinBox()
+        self.repeat_count.setRange(2, 26)
+        self.repeat_count.setValue(4)
+        self.repeat_count.setSuffix(" visits")
+        self.repeat_count.setMinimumHeight(38)
+        repeat_row = QWidget()
+        repeat_lay = QHBoxLayout(repeat_row)
+        repeat_lay.setContentsMargins(0, 0, 0, 0)
+        repeat_lay.addWidget(self.repeat_combo, 2)
+        repeat_lay.addWidget(self.repeat_every, 1)
+        repeat_lay.addWidget(self.repeat_count, 1)
+        self.repeat_combo.currentIndexChanged.connect(
+            self._on_repeat_changed)
+        self._on_repeat_changed()
+
         self._cancel_reason_label = QLabel("Cancel Reason")
         self.cancel_reason = QLineEdit()
         self.cancel_reason.setStyleSheet(self._INPUT_STYLE)
@@ -282,7 +324,7 @@ class AppointmentDialog(QDialog):
         self.status_combo = QComboBox()
         self.status_combo.setObjectName("formCombo")
         self.status_combo.addItems(
-            ["Confirmed", "Cancelled", "Completed"])
+            ["Confirmed", "Cancelled", "Completed", "No-Show"])
         self.status_combo.setMinimumHeight(38)
         self.status_combo.currentTextChanged.connect(
             self._on_status_changed)
@@ -290,10 +332,12 @@ class AppointmentDialog(QDialog):
         form.addRow("Date",    self.date_edit)
         form.addRow("Patient", self.patient_combo)
         form.addRow("Doctor",  self.doctor_combo)
-        form.addRow("Time",    self.time_edit)
+        form.addRow("Time",    time_row)
         form.addRow("",        self._no_slots_label)
         form.addRow("Service", self.purpose_combo)
         form.addRow("Notes",   self.notes_edit)
+        if not self._is_edit:
+            form.addRow("Repeat", repeat_row)
         if self._is_edit:
             form.addRow("Status", self.status_combo)
             form.addRow(self._cancel_reason_label,
@@ -470,6 +514,14 @@ class AppointmentDialog(QDialog):
         if not doc_id or not self._backend:
             self._sched_panel.setVisible(False); return
 
+        cal = self.date_edit.calendarWidget()
+        if (doc_id != self._heat_doctor and hasattr(cal, 'set_heatmap_source')
+                and hasattr(self._backend, 'get_calendar_heatmap')):
+            self._heat_doctor = doc_id
+            cal.set_heatmap_source(
+                lambda first, d=doc_id:
+                self._backend.get_calendar_heatmap(first, d))
+
         if hasattr(self._backend, 'get_services_for_doctor'):
             filtered = (
                 self._backend.get_services_for_doctor(doc_id) or [])
@@ -513,6 +565,60 @@ class AppointmentDialog(QDialog):
         self._sched_end_hhmm = today_end
         self._apply_time_range(
             appt_d, target_day, today_start, today_end)
+        self._apply_slots(appt_d)
+
+    def _apply_slots(self, appt_d):
+        """Offer only bookable slots when the doctor is scheduled that day."""
+        doc_id = self.doctor_combo.currentData()
+        self._day_slots = None
+        if (doc_id and self._backend
+                and hasattr(self._backend, 'get_available_slots')):
+            self._day_slots = self._backend.get_available_slots(
+                doc_id, appt_d, self._exclude_id)
+        if self._day_slots is None:
+            self.slot_combo.setVisible(False)
+            self.time_edit.setVisible(True)
+            return
+
+        current = self.time_edit.time().toString("HH:mm:ss")
+        times = self._day_slots.free_times()
+        if (self._is_edit and appt_d.isoformat() == self._original_date
+                and current not in times):
+            times = sorted(times + [current])
+
+        self.slot_combo.blockSignals(True)
+        self.slot_combo.clear()
+        for t in times:
+            self.slot_combo.addItem(
+                _format_time_display(t[:5]), t)
+        idx = self.slot_combo.findData(current)
+        self.slot_combo.setCurrentIndex(max(idx, 0))
+        self.slot_combo.blockSignals(False)
+        self.time_edit.setVisible(False)
+        self.slot_combo.setVisible(True)
+
+        if not times:
+            slots = self._day_slots
+            if slots.on_leave:
+                msg = "The doctor is on approved leave on this day."
+            elif slots.booked >= slots.quota:
+                msg = (f"The doctor's daily quota of {slots.quota}"
+                       " appointments is reached.")
+            else:
+                msg = "All time slots on this day are booked or have passed."
+            self.slot_combo.setEnabled(False)
+            self._no_slots_label.setText(
+                msg + " Please select another date.")
+            self._no_slots_label.setVisible(True)
+            return
+        self.slot_combo.setEnabled(True)
+        self._no_slots_label.setVisible(False)
+        self._on_slot_changed(self.slot_combo.currentIndex())
+
+    def _on_slot_changed(self, index):
+        t = self.slot_combo.itemData(index)
+        if t:
+            self.time_edit.setTime(QTime.fromString(t, "HH:mm:ss"))
 
     def _apply_time_range(self, appt_d, target_day,
                           today_start, today_end):
@@ -608,6 +714,12 @@ class AppointmentDialog(QDialog):
             self._apply_time_range(
                 appt_d, target_day,
                 self._sched_start_hhmm, self._sched_end_hhmm)
+            self._apply_slots(appt_d)
+
+    def _on_repeat_changed(self, _=None):
+        repeats = self.repeat_combo.currentData() is not None
+        self.repeat_every.setEnabled(repeats)
+        self.repeat_count.setEnabled(repeats)
 
     def _on_status_changed(self, status_text):
         is_cancelled = status_text == "Cancelled"
@@ -749,10 +861,47 @@ class AppointmentDialog(QDialog):
                     self.time_edit.setFocus()
                     return
 
+        if (self._backend and doc_id
+                and hasattr(self._backend, 'get_available_slots')):
+            # Re-check against fresh data: someone may have booked meanwhile
+            slots = self._backend.get_available_slots(
+                doc_id, appt_d, self._exclude_id)
+            if slots is not None:
+                tm_min = selected_time.hour() * 60 + selected_time.minute()
+                unchanged = (self._is_edit
+                             and appt_date == self._original_date)
+                if slots.on_leave and not unchanged:
+                    QMessageBox.warning(
+                        self, "Doctor On Leave",
+                        "The doctor is on approved leave on this day.\n"
+                        "Please select another date.")
+                    return
+                if slots.booked >= slots.quota:
+                    reply = QMessageBox.warning(
+                        self, "Daily Quota Reached",
+                        f"This doctor already has {slots.booked} appointments on this day, reaching the recommended daily quota of {slots.quota}.\nSave anyway?",
+                        QMessageBox.StandardButton.Yes
+                        | QMessageBox.StandardButton.No)
+                    if reply != QMessageBox.StandardButton.Yes:
+                        return
+                elif (not slots.is_free(tm_min) and not unchanged
+                        and slots.index_of(tm_min) is not None):
+                    reply = QMessageBox.warning(
+                        self, "Slot Taken",
+                        "This time slot is no longer available.\n"
+                        "Save anyway?",
+                        QMessageBox.StandardButton.Yes
+                        | QMessageBox.StandardButton.No)
+                    if reply != QMessageBox.StandardButton.Yes:
+                        self._apply_slots(appt_d)
+                        return
+                self.accept()
+                return
+
         if self._backend and doc_id:
             dt = appt_date
             tm = selected_time.toString("HH:mm:ss")
-            exclude_id = None
+            exclude_id = self._exclude_id
             if self._backend.check_appointment_conflict(
                     doc_id, dt, tm, exclude_id):
                 reply = QMessageBox.warning(
@@ -787,13 +936,25 @@ class AppointmentDialog(QDialog):
                 current_date=self.date_edit.date(),
                 min_date=self.date_edit.minimumDate(),
                 max_date=self.date_edit.maximumDate(),
-                parent=self
+                parent=self,
+                heatmap=self._calendar_heatmap(),
             )
             if dlg.exec() == QDialog.DialogCode.Accepted:
                 self.date_edit.setDate(dlg.selected_date)
             return True
         return super().eventFilter(obj, event)
 
+    def _calendar_heatmap(self):
+        """Load per day for the selected doctor over the picker's months."""
+        if not self._backend or not hasattr(self._backend, 'get_calendar_heatmap'):
+            return {}
+        from ui.shared.modern_calendar import ContinuousCalendarWidget
+        today = date.today()
+        first = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
+        return self._backend.get_calendar_heatmap(
+            first, self.doctor_combo.currentData(),
+            months=ContinuousCalendarWidget.MONTHS_SHOWN)
+
     def get_data(self) -> dict:
         doc_text = self.doctor_combo.currentText()
         if "  (" in doc_text:
@@ -812,8 +973,16 @@ class AppointmentDialog(QDialog):
             "notes":        self.notes_edit.toPlainText(),
             "cancellation_reason": (self.cancel_reason.text() if self._is_edit else ""),
             "reschedule_reason": "",
+            "repeat": self._repeat_data(),
         }
 
+    def _repeat_data(self):
+        unit = self.repeat_combo.currentData()
+        if self._is_edit or unit is None:
+            return None
+        return {"every": self.repeat_every.value(), "unit": unit,
+                "count": self.repeat_count.value()}
+
 # ══════════════════════════════════════════════════════════════════════
 #  Appointment Details Dialog (Modern read-only view)
 # ══════════════════════════════════════════════════════════════════════
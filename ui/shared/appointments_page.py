@@ -1,6 +1,6 @@
 # Appointments page - scheduling table with date tabs
 
-from datetime import date, datetime, timedelta
+from datetime import datetime
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
@@ -36,10 +36,16 @@ class AppointmentsPage(QWidget):
         self._tab_buttons: dict[str, QPushButton] = {}
         self._all_appointments: list[dict] = []
         self._appointment_ids: list[int] = []
+        self._next_cursor = None
+        self._prefetched = None  # (cursor, page) fetched ahead of "Load more"
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(300)
+        self._search_timer.timeout.connect(self._load_from_db)
         self._build()
-        # Auto-refresh data every 10 seconds
+        # Auto-refresh every 5 minutes, keeping the pages already loaded
         self._refresh_timer = QTimer(self)
-        self._refresh_timer.timeout.connect(self._load_from_db)
+        self._refresh_timer.timeout.connect(self._on_auto_refresh)
         self._refresh_timer.start(300_000)
 
     def set_patient_names(self, names: list[str]):
@@ -53,36 +59,123 @@ class AppointmentsPage(QWidget):
             return
         if not self._backend:
             self._all_appointments = []; return
-        # Doctor sees only their own appointments
-        if self._role == "Doctor" and self._user_email:
-            self._all_appointments = self._backend.get_appointments_for_doctor(self._user_email) or []
-        else:
-            self._all_appointments = self._backend.get_appointments() or []
-        for appt in self._all_appointments:
-            d = appt.get("appointment_date")
-            if hasattr(d, "strftime"): appt["appointment_date"] = d.strftime("%Y-%m-%d")
-            elif d is not None: appt["appointment_date"] = str(d)
-            t = appt.get("appointment_time")
-            appt["appointment_time"] = format_timedelta(t) + ":00" if hasattr(t, "total_seconds") else (
-                t.strftime("%H:%M:%S") if hasattr(t, "strftime") else str(t) if t else "")
         self._update_doctor_filter()
+        page = self._fetch_page(None)
+        self._all_appointments = page["rows"]
+        self._next_cursor = page["next_cursor"]
+        self._prefetched = None
         self._refresh_table()
+        QTimer.singleShot(0, self._prefetch_next)
         # Also refresh doctor availability if that view is active
         if hasattr(self, '_stack') and self._stack.currentIndex() == 1:
             self._load_avail_data()
 
+    def _on_auto_refresh(self):
+        """Re-read every row already shown (one query sized to what "Load more"
+        has loaded) and keep the scroll position, instead of dropping back to
+        the first page."""
+        if not self.isVisible() or not self._backend:
+            return
+        limit = max(len(self._all_appointments), self._backend.APPOINTMENT_PAGE_SIZE)
+        bars = [self.table.verticalScrollBar(), self._page_scroll.verticalScrollBar()]
+        positions = [bar.value() for bar in bars]
+        self._update_doctor_filter()
+        page = self._fetch_page(None, limit=limit)
+        self._all_appointments = page["rows"]
+        self._next_cursor = page["next_cursor"]
+        self._prefetched = None
+        self._refresh_table()
+        for bar, pos in zip(bars, positions):
+            bar.setValue(pos)
+        QTimer.singleShot(0, self._prefetch_next)
+        if hasattr(self, '_stack') and self._stack.currentIndex() == 1:
+            self._load_avail_data()
+
+    def _window_filters(self) -> dict:
+        """Current tab + filter bar as get_appointments_window() arguments."""
+        status = self.status_filter.currentText()
+        filters = {
+            "tab": self._active_tab,
+            "status": None if status == "All Status" else status,
+            "doctor_id": self.doc_filter.currentData(),
+            "search": self.search.text().strip() or None,
+        }
+        # Doctor sees only their own appointments
+        if self._role == "Doctor" and self._user_email:
+            filters["doctor_email"] = self._user_email
+        return filters
+
+    def _fetch_page(self, cursor, limit=None) -> dict:
+        page = self._backend.get_appointments_window(cursor=cursor, limit=limit,
+                                                     **self._window_filters())
+        for appt in page["rows"]:
+            self._normalize_row(appt)
+        return page
+
+    @staticmethod
+    def _normalize_row(appt: dict) -> dict:
+        """Date / time columns as the strings the table and dialogs expect."""
+        d = appt.get("appointment_date")
+        if hasattr(d, "strftime"): appt["appointment_date"] = d.strftime("%Y-%m-%d")
+        elif d is not None: appt["appointment_date"] = str(d)
+        t = appt.get("appointment_time")
+        appt["appointment_time"] = format_timedelta(t) + ":00" if hasattr(t, "total_seconds") else (
+            t.strftime("%H:%M:%S") if hasattr(t, "strftime") else str(t) if t else "")
+        return appt
+
+    def _patch_row(self, row: dict) -> bool:
+        """Swap an edited row in place when its position in the list can't change.
+
+        Returns False when a reload is needed (date, time or status moved,
+        which can shift the row within - or out of - the current window).
+        """
+        row = self._normalize_row(row)
+        for i, old in enumerate(self._all_appointments):
+            if old.get("appointment_id") != row["appointment_id"]:
+                continue
+            if any(old.get(k) != row.get(k) for k in ("appointment_date", "appointment_time", "status")):
+                return False
+            self._all_appointments[i] = row
+            self._refresh_table()
+            return True
+        return False
+
+    def _prefetch_next(self):
+        """Fetch the page after the visible one so "Load more" is instant."""
+        cursor = self._next_cursor
+        if cursor and self._backend and (not self._prefetched or self._prefetched[0] != cursor):
+            self._prefetched = (cursor, self._fetch_page(cursor))
+
+    def _on_load_more(self):
+        cursor = self._next_cursor
+        if not cursor or not self._backend:
+            return
+        if self._prefetched and self._prefetched[0] == cursor:
+            page = self._prefetched[1]
+        else:
+            page = self._fetch_page(cursor)
+        self._all_appointments.extend(page["rows"])
+        self._next_cursor = page["next_cursor"]
+        self._refresh_table()
+        QTimer.singleShot(0, self._prefetch_next)
+
+    def _on_filters_changed(self, _=None):
+        self._search_timer.start()
+
     def _update_doctor_filter(self):
-        current = self.doc_filter.currentText()
+        current = self.doc_filter.currentData()
         self.doc_filter.blockSignals(True); self.doc_filter.clear()
-        self.doc_filter.addItem("All Doctors")
-        doc_names = sorted({a.get("doctor_name","") for a in self._all_appointments if a.get("doctor_name")})
-        self.doc_filter.addItems(doc_names)
-        idx = self.doc_filter.findText(current)
+        self.doc_filter.addItem("All Doctors", None)
+        if self._role != "Doctor":
+            for doc in self._backend.get_doctors() or []:
+                self.doc_filter.addItem(doc["doctor_name"], doc["employee_id"])
+        idx = self.doc_filter.findData(current)
         if idx >= 0: self.doc_filter.setCurrentIndex(idx)
         self.doc_filter.blockSignals(False)
 
     def _build(self):
         scroll, lay = make_page_layout()
+        self._page_scroll = scroll
         lay.setSpacing(16)
 
         # ── Top-level view toggle (Appointments | Doctor Availability) ──
@@ -114,7 +207,7 @@ class AppointmentsPage(QWidget):
 
         # Quick-filter tabs
         tab_row = QHBoxLayout(); tab_row.setSpacing(8)
-        for label in ("Today", "Tomorrow", "This Week", "This Month", "All"):
+        for label in ("Today", "Tomorrow", "This Week", "This Month", "Upcoming", "Past", "All"):
             btn = QPushButton(label); btn.setCursor(Qt.CursorShape.PointingHandCursor); btn.setMinimumHeight(38)
             btn.clicked.connect(lambda checked, l=label: self._switch_tab(l))
             self._tab_buttons[label] = btn; tab_row.addWidget(btn)
@@ -128,15 +221,15 @@ class AppointmentsPage(QWidget):
         bar = QHBoxLayout(); bar.setSpacing(10)
         self.search = QLineEdit(); self.search.setObjectName("searchBar")
         self.search.setPlaceholderText("Search by patient, doctor, or service...")
-        self.search.setMinimumHeight(42); self.search.textChanged.connect(self._apply_filters)
+        self.search.setMinimumHeight(42); self.search.textChanged.connect(self._on_filters_changed)
         bar.addWidget(self.search)
         self.doc_filter = QComboBox(); self.doc_filter.setObjectName("formCombo")
         self.doc_filter.addItems(["All Doctors"]); self.doc_filter.setMinimumHeight(42); self.doc_filter.setMinimumWidth(150)
-        self.doc_filter.currentTextChanged.connect(self._apply_filters); bar.addWidget(self.doc_filter)
+        self.doc_filter.currentIndexChanged.connect(self._load_from_db); bar.addWidget(self.doc_filter)
         self.status_filter = QComboBox(); self.status_filter.setObjectName("formCombo")
-        self.status_filter.addItems(["All Status","Pending","Confirmed","Cancelled","Completed"])
+        self.status_filter.addItems(["All Status","Pending","Confirmed","Cancelled","Completed","No-Show"])
         self.status_filter.setMinimumHeight(42); self.status_filter.setMinimumWidth(140)
-        self.status_filter.currentTextChanged.connect(self._apply_filters); bar.addWidget(self.status_filter)
+        self.status_filter.currentTextChanged.connect(self._load_from_db); bar.addWidget(self.status_filter)
 
         appt_lay.addLayout(bar)
 
@@ -151,8 +244,32 @@ class AppointmentsPage(QWidget):
             self.table = make_read_only_table(cols)
         hdr = self.table.horizontalHeader()
         hdr.setSectionResizeMode(0, QHeaderView.ResizeMode.Interactive); self.table.setColumnWidth(0, 260)
+
+        # Bulk actions on the selected rows (Ctrl/Shift-click to select)
+        if self._role not in ("Nurse",):
+            self.table.setSelectionMode(QTableWidget.SelectionMode.ExtendedSelection)
+            self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+            self.table.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+            bulk = QHBoxLayout(); bulk.setSpacing(8)
+            self._bulk_label = QLabel(); self._bulk_label.setObjectName("mutedSummary")
+            bulk.addWidget(self._bulk_label); bulk.addStretch()
+            self._bulk_btns = []
+            for text, status in (("Confirm", "Confirmed"), ("Mark No-Show", "No-Show"), ("Cancel", "Cancelled")):
+                btn = make_table_btn_danger(text) if status == "Cancelled" else make_table_btn(text)
+                btn.clicked.connect(lambda checked, st=status: self._on_bulk_transition(st))
+                self._bulk_btns.append(btn); bulk.addWidget(btn)
+            appt_lay.addLayout(bulk)
+            self.table.itemSelectionChanged.connect(self._update_bulk_bar)
+            self._update_bulk_bar()
         appt_lay.addWidget(self.table)
 
+        self._more_btn = QPushButton("Load more")
+        self._more_btn.setCursor(Qt.CursorShape.PointingHandCursor); self._more_btn.setMinimumHeight(38)
+        self._more_btn.setStyleSheet(TAB_INACTIVE)
+        self._more_btn.clicked.connect(self._on_load_more); self._more_btn.setVisible(False)
+        more_row = QHBoxLayout(); more_row.addStretch(); more_row.addWidget(self._more_btn); more_row.addStretch()
+        appt_lay.addLayout(more_row)
+
         appt_lay.addStretch()
         self._stack.addWidget(self._appt_page)  # index 0
 
@@ -192,7 +309,6 @@ class AppointmentsPage(QWidget):
             self._stack.addWidget(self._avail_page)  # index 1
 
         finish_page(self, scroll)
-        self._load_from_db()
         self._switch_tab("Today")
         if self._role in ("Admin", "Receptionist"):
             self._switch_view("Appointments")
@@ -201,28 +317,10 @@ class AppointmentsPage(QWidget):
         self._active_tab = label
         for name, btn in self._tab_buttons.items():
             btn.setStyleSheet(TAB_ACTIVE if name == label else TAB_INACTIVE)
-        self._refresh_table()
-
-    def _rows_for_tab(self) -> list[dict]:
-        today = date.today()
-        tab = self._active_tab
-        def _parse(d):
-            try: return datetime.strptime(str(d), "%Y-%m-%d").date()
-            except: return None
-        if tab == "Today": return [a for a in self._all_appointments if _parse(a.get("appointment_date")) == today]
-        if tab == "Tomorrow":
-            tmr = today + timedelta(days=1); return [a for a in self._all_appointments if _parse(a.get("appointment_date")) == tmr]
-        if tab == "This Week":
-            start = today - timedelta(days=today.weekday()); end = start + timedelta(days=6)
-            return [a for a in self._all_appointments if (d := _parse(a.get("appointment_date"))) and start <= d <= end]
-        if tab == "This Month":
-            ym = today.strftime("%Y-%m"); return [a for a in self._all_appointments if str(a.get("appointment_date",""))[:7] == ym]
-        return list(self._all_appointments)
+        self._load_from_db()
 
     def _refresh_table(self):
-        rows = self._rows_for_tab()
-        rows.sort(key=lambda a: (str(a.get("appointment_date","")), str(a.get("appointment_time",""))),
-                  reverse=(self._active_tab == "All"))
+        rows = self._all_appointments  # already windowed, filtered and ordered by the backend
         self.table.setRowCount(0)
         self.table.setRowCount(len(rows))
         self._appointment_ids = []
@@ -275,8 +373,9 @@ class AppointmentsPage(QWidget):
                     edit_btn = make_table_btn("Edit")
                     edit_btn.clicked.connect(lambda checked, a=appt: self._on_edit(a))
                     self.table.setCellWidget(r, col_count - 1, self._make_centered_action_cell(edit_btn))
-        self._summary_label.setText(f"Showing {len(rows)} appointment{'s' if len(rows)!=1 else ''}")
-        self._apply_filters()
+        more = " (more available)" if self._next_cursor else ""
+        self._summary_label.setText(f"Showing {len(rows)} appointment{'s' if len(rows)!=1 else ''}{more}")
+        self._more_btn.setVisible(self._next_cursor is not None)
 
     def _make_centered_action_cell(self, *btns) -> QWidget:
         w = QWidget()
@@ -288,23 +387,6 @@ class AppointmentsPage(QWidget):
             lay.addWidget(b)
         return w
 
-    def _apply_filters(self, _=None):
-        search = self.search.text().lower()
-        doc = self.doc_filter.currentText()
-        status = self.status_filter.currentText()
-        visible = 0
-        for r in range(self.table.rowCount()):
-            row_text = " ".join(self.table.item(r,c).text().lower() if self.table.item(r,c) else "" for c in range(self.table.columnCount()-1))
-            doc_cell = self.table.item(r,3); status_cell = self.table.item(r,6)
-            ok = (not search or search in row_text) and \
-                 (doc=="All Doctors" or (doc_cell and doc_cell.text()==doc)) and \
-                 (status=="All Status" or (status_cell and status_cell.text()==status))
-            self.table.setRowHidden(r, not ok)
-            if ok: visible += 1
-        total = self.table.rowCount()
-        self._summary_label.setText(f"Showing {visible} of {total} appointment{'s' if total!=1 else ''}" if visible != total
-                                    else f"Showing {total} appointment{'s' if total!=1 else ''}")
-
     # ── Doctor Availability view (Receptionist / Admin) ────────────
     def _switch_view(self, label: str):
         """Toggle between Appointments list and Doctor Availability."""
@@ -387,15 +469,47 @@ class AppointmentsPage(QWidget):
             d = dlg.get_data()
             if not d["patient_name"].strip() or d["patient_id"] is None:
                 QMessageBox.warning(self, "Validation", "Please select a patient from the list."); return
-            if self._backend:
+            if self._backend and d.get("repeat"):
+                if not self._book_series(d): return
+            elif self._backend:
                 ok = self._backend.add_appointment(d)
                 if not ok:
                     QMessageBox.warning(self, "Error", "Failed to save appointment."); return
                 QMessageBox.information(self, "Success", f"Appointment for '{d['patient_name']}' created.")
             self._load_from_db(); self._refresh_table()
 
+    def _book_series(self, d: dict) -> bool:
+        """Validate every occurrence up front, then book the series in one go."""
+        rep = d["repeat"]
+        plan = self._backend.plan_recurring_appointments(
+            d, every=rep["every"], unit=rep["unit"], count=rep["count"])
+        ok_dates = [p["date"] for p in plan if p["ok"]]
+        bad = [p for p in plan if not p["ok"]]
+        if not ok_dates:
+            QMessageBox.warning(self, "No Available Dates",
+                                "None of the requested dates can be booked:\n" +
+                                "\n".join(f"{_pretty_date(p['date'])}: {p['reason']}" for p in bad))
+            return False
+        if bad:
+            reply = QMessageBox.question(
+                self, "Some Dates Unavailable",
+                "These dates can't be booked and will be skipped:\n" +
+                "\n".join(f"{_pretty_date(p['date'])}: {p['reason']}" for p in bad) +
+                f"\n\nBook the other {len(ok_dates)} visit{'s' if len(ok_dates) != 1 else ''}?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                return False
+        created = self._backend.add_recurring_appointments(
+            d, ok_dates, every=rep["every"], unit=rep["unit"])
+        if not created:
+            QMessageBox.warning(self, "Error", "Failed to save the appointment series."); return False
+        QMessageBox.information(self, "Success",
+                                f"{created} appointments for '{d['patient_name']}' created.")
+        return True
+
     def _on_edit(self, appt: dict):
         data = {
+            "appointment_id": appt.get("appointment_id"),
             "patient": appt.get("patient_name",""), "doctor": appt.get("doctor_name",""),
             "date": str(appt.get("appointment_date","")), "time": str(appt.get("appointment_time","")),
             "purpose": appt.get("service_name",""), "status": appt.get("status",""),
@@ -414,10 +528,11 @@ class AppointmentsPage(QWidget):
                 QMessageBox.warning(self, "Validation", "Please select a patient from the list."); return
             appt_id = appt.get("appointment_id")
             if self._backend and appt_id:
-                ok = self._backend.update_appointment(appt_id, d)
-                if not ok:
+                row = self._backend.update_appointment(appt_id, d)
+                if not row:
                     QMessageBox.warning(self, "Error", "Failed to update appointment."); return
-            self._load_from_db(); self._refresh_table()
+                if not self._patch_row(row):
+                    self._load_from_db(); self._refresh_table()
             QMessageBox.information(self, "Success", f"Appointment for '{d['patient_name']}' updated.")
 
     def _on_view(self, appt: dict):
@@ -435,16 +550,17 @@ class AppointmentsPage(QWidget):
             f"Confirm appointment for {patient}?",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            ok = self._backend.exec(
-                "UPDATE appointments SET status='Confirmed' WHERE appointment_id=%s",
-                (appt_id,))
-            if ok:
-                self._backend.log_activity("Edited", "Appointment",
-                    f"Confirmed appt #{appt_id} for {patient}")
-                self._load_from_db(); self._refresh_table()
-                QMessageBox.information(self, "Confirmed",
-                    f"Appointment for {patient} confirmed.\n"
-                    "It will appear in the Clinical Queue on the appointment date.")
+            res = self._backend.transition_appointments([appt_id], "Confirmed")
+            if not isinstance(res, dict):
+                QMessageBox.warning(self, "Error", f"Failed to confirm appointment:\n{res}"); return
+            self._load_from_db(); self._refresh_table()
+            if not res["updated"]:
+                status = res["skipped"][0][1] if res["skipped"] else "Missing"
+                QMessageBox.warning(self, "Not Confirmed",
+                    f"Appointment for {patient} can't be confirmed (status: {status})."); return
+            QMessageBox.information(self, "Confirmed",
+                f"Appointment for {patient} confirmed.\n"
+                "It will appear in the Clinical Queue on the appointment date.")
 
     def _on_cancel(self, appt: dict):
         appt_id = appt.get("appointment_id")
@@ -458,11 +574,55 @@ class AppointmentsPage(QWidget):
         reason = dlg.get_reason()
         if not reason:
             return
-        self._backend.exec(
-            "UPDATE appointments SET status='Cancelled', cancellation_reason=%s WHERE appointment_id=%s",
-            (reason.strip(), appt_id))
-        self._backend.log_activity("Edited", "Appointment",
-            f"Cancelled appt #{appt_id} for {patient}")
+        res = self._backend.transition_appointments([appt_id], "Cancelled", reason)
+        if not isinstance(res, dict):
+            QMessageBox.warning(self, "Error", f"Failed to cancel appointment:\n{res}"); return
         self._load_from_db(); self._refresh_table()
+        if not res["updated"]:
+            status = res["skipped"][0][1] if res["skipped"] else "Missing"
+            QMessageBox.warning(self, "Not Cancelled",
+                f"Appointment for {patient} can't be cancelled (status: {status})."); return
         QMessageBox.information(self, "Cancelled",
             f"Appointment for {patient} has been cancelled.")
+
+    # ── Bulk status changes ────────────────────────────────────────
+    def _selected_appointment_ids(self) -> list[int]:
+        rows = sorted({i.row() for i in self.table.selectionModel().selectedRows()})
+        return [self._appointment_ids[r] for r in rows if r < len(self._appointment_ids)]
+
+    def _update_bulk_bar(self):
+        n = len(self._selected_appointment_ids())
+        self._bulk_label.setText(f"{n} selected" if n else "Select rows to confirm, cancel or mark no-show")
+        for btn in self._bulk_btns:
+            btn.setEnabled(n > 0)
+
+    def _on_bulk_transition(self, status: str):
+        ids = self._selected_appointment_ids()
+        if not ids or not self._backend:
+            return
+        n = len(ids); noun = f"{n} appointment{'s' if n != 1 else ''}"
+        reason = None
+        if status == "Cancelled":
+            from ui.shared.appointment_dialog import CancelAppointmentDialog
+            dlg = CancelAppointmentDialog(self, noun)
+            if dlg.exec() != QDialog.DialogCode.Accepted:
+                return
+            reason = dlg.get_reason()
+            if not reason:
+                return
+        else:
+            verb = "Confirm" if status == "Confirmed" else "Mark as no-show:"
+            reply = QMessageBox.question(
+                self, "Update Appointments", f"{verb} {noun}?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+        res = self._backend.transition_appointments(ids, status, reason)
+        if not isinstance(res, dict):
+            QMessageBox.warning(self, "Error", f"Failed to update appointments:\n{res}"); return
+        self._load_from_db(); self._refresh_table()
+        msg = f"{len(res['updated'])} of {n} updated."
+        if res["skipped"]:
+            msg += (f"\n{len(res['skipped'])} skipped (status doesn't allow"
+                    f" changing to {status}).")
+        QMessageBox.information(self, "Appointments Updated", msg)
@@ -8,8 +8,8 @@ from PyQt6.QtWidgets import (
     QComboBox, QStackedWidget, QDialog, QFormLayout,
     QMessageBox,
 )
-from PyQt6.QtCore import Qt, QTimer, QSize
-from PyQt6.QtGui import QColor
+from PyQt6.QtCore import Qt, QTimer, QSize, QUrl
+from PyQt6.QtGui import QColor, QDesktopServices
 from ui.styles import (
     configure_table, make_page_layout, finish_page, make_banner, make_read_only_table,
     make_table_btn, make_table_btn_danger, make_action_table,
@@ -863,97 +863,17 @@ class ClinicalPage(QWidget):
     def _on_print_receipt(self, invoice_id: int):
         if not self._backend:
             return
-        detail = self._backend.get_invoice_detail(invoice_id)
-        if not detail:
-            QMessageBox.warning(self, "Error", "Could not load invoice details.")
+        from PyQt6.QtWidgets import QFileDialog
+        path, _ = QFileDialog.getSaveFileName(
+            self, f"Save Receipt \u2013 Invoice #{invoice_id}",
+            f"receipt_{invoice_id}.pdf", "PDF Files (*.pdf)")
+        if not path:
             return
-        info = detail["info"]
-        items = detail["items"]
-
-        total_amount = float(info.get("total_amount", 0))
-        amount_paid = float(info.get("amount_paid", 0))
-        discount_pct = float(info.get("discount_percent", 0))
-
-        # Calculate raw subtotal from line items
-        raw_subtotal = sum(
-            float(it.get("unit_price", 0)) * int(it.get("quantity", 1))
-            for it in items
-        )
-        discount_amount = raw_subtotal - total_amount
-        balance = total_amount - amount_paid
-
-        w = 44
-
-        lines = [
-            "",
-            "C A R E C R U D".center(w),
-            "Healthcare Management System".center(w),
-            "\u2500" * w,
-            "",
-            f"  Invoice #  :  {info.get('invoice_id', '')}",
-            f"  Date       :  {str(info.get('created_at', ''))[:19]}",
-            f"  Patient    :  {info.get('patient_name', '')}",
-            f"  Phone      :  {info.get('phone', '') or '\u2014'}",
-            f"  Payment    :  {info.get('payment_method', '\u2014')}",
-            "",
-            "\u2500" * w,
-        ]
-
-        # Item lines
-        for it in items:
-            sname = it.get("service_name", "")
-            qty = int(it.get("quantity", 1))
-            unit = float(it.get("unit_price", 0))
-            sub = float(it.get("subtotal", 0))
-            lines.append(f"  {sname}")
-            lines.append(f"    {qty} x \u20b1{unit:,.2f}          \u20b1{sub:,.2f}")
-
-        lines.append("\u2500" * w)
-
-        if discount_amount > 0:
-            lines.append(f"  Subtotal           \u20b1{raw_subtotal:>10,.2f}")
-            lines.append(f"  Discount          -\u20b1{discount_amount:>10,.2f}")
-            lines.append("")
-
-        lines.append(f"  TOTAL              \u20b1{total_amount:>10,.2f}")
-        lines.append(f"  AMOUNT PAID        \u20b1{amount_paid:>10,.2f}")
-
-        if balance > 0:
-            lines.append(f"  BALANCE DUE        \u20b1{balance:>10,.2f}")
-
-        status = info.get("status", "")
-        lines.append(f"  Status: {status}")
-        lines.append("")
-        lines.append("\u2500" * w)
-        lines.append("Thank you for choosing us!".center(w))
-        lines.append("\u2500" * w)
-
-        text = "\n".join(lines)
-
-        # Show in a proper dialog with monospace font
-        from PyQt6.QtWidgets import QTextEdit as _QTE
-        dlg = QDialog(self)
-        dlg.setWindowTitle(f"Receipt \u2013 Invoice #{invoice_id}")
-        dlg.setMinimumWidth(420)
-        dl = QVBoxLayout(dlg)
-        dl.setContentsMargins(20, 16, 20, 16)
-        dl.setSpacing(12)
-        receipt_box = _QTE()
-        receipt_box.setReadOnly(True)
-        receipt_box.setPlainText(text)
-        receipt_box.setStyleSheet(
-            "QTextEdit { font-family: 'Consolas', 'Courier New', monospace;"
-            " font-size: 13px; background: #FFFFFF; color: #2C3E50;"
-            " border: 1px solid #BADFE7; border-radius: 8px; padding: 16px; }")
-        receipt_box.setMinimumHeight(380)
-        dl.addWidget(receipt_box)
-        ok_btn = QPushButton("Close")
-        ok_btn.setObjectName("actionBtn")
-        ok_btn.setMinimumHeight(38)
-        ok_btn.setCursor(Qt.CursorShape.PointingHandCursor)
-        ok_btn.clicked.connect(dlg.accept)
-        dl.addWidget(ok_btn, alignment=Qt.AlignmentFlag.AlignCenter)
-        dlg.exec()
+        res = self._backend.render_receipt(invoice_id, path)
+        if res != path:
+            QMessageBox.warning(self, "Error", f"Could not create receipt.\n\n{res}")
+            return
+        QDesktopServices.openUrl(QUrl.fromLocalFile(path))
 
     # ══════════════════════════════════════════════════════════════
     #  SERVICES TAB
@@ -47,7 +47,8 @@ class HREmployeesPage(QWidget):
     def _load_from_db(self):
         if not self.isVisible():
             return
-        rows = self._backend.get_employees_detailed() or []
+        snap = self._backend.get_hr_snapshot()
+        rows = snap["employees"]
         self._employees = rows
         self.table.setRowCount(0)
         for emp in rows:
@@ -80,7 +81,7 @@ class HREmployeesPage(QWidget):
             self.table.setCellWidget(r, 10, make_action_cell(view_btn, edit_btn))
 
         # HR Stats
-        stats = self._backend.get_hr_stats()
+        stats = snap["stats"]
         for key, lbl in self._stat_labels.items():
             val = stats.get(key, 0) or 0
             if key in ("avg_salary", "total_payroll"):
@@ -89,7 +90,7 @@ class HREmployeesPage(QWidget):
                 lbl.setText(str(val))
 
         # Department payroll
-        dept_payroll = self._backend.get_payroll_summary()
+        dept_payroll = snap["payroll_by_department"]
         self._dept_table.setRowCount(len(dept_payroll))
         for r, d in enumerate(dept_payroll):
             self._dept_table.setItem(r, 0, QTableWidgetItem(d.get("department_name", "")))
@@ -100,7 +101,7 @@ class HREmployeesPage(QWidget):
             self._dept_table.setItem(r, 3, QTableWidgetItem(f"₱{avg_sal:,.0f}"))
 
         # Leave tracker
-        leave_emps = self._backend.get_leave_employees()
+        leave_emps = snap["on_leave"]
         self._leave_table.setRowCount(len(leave_emps))
         for r, le in enumerate(leave_emps):
             self._leave_table.setItem(r, 0, QTableWidgetItem(le.get("full_name", "")))
@@ -109,7 +110,7 @@ class HREmployeesPage(QWidget):
             self._leave_table.setItem(r, 3, QTableWidgetItem(str(le.get("leave_until", "") or "—")))
 
         # Employment type counts
-        type_counts = self._backend.get_employment_type_counts()
+        type_counts = snap["employment_types"]
         self._type_table.setRowCount(len(type_counts))
         for r, tc in enumerate(type_counts):
             self._type_table.setItem(r, 0, QTableWidgetItem(tc.get("employment_type", "")))
@@ -265,46 +266,139 @@ class HREmployeesPage(QWidget):
         card = make_card(min_height=400)
         c_lay = QVBoxLayout(card)
         c_lay.setContentsMargins(16, 14, 16, 14); c_lay.setSpacing(10)
-        
+
         hdr = QHBoxLayout()
-        title = QLabel("Daily Attendance Logs")
+        title = QLabel("Attendance")
         title.setObjectName("cardTitle")
         hdr.addWidget(title)
         hdr.addStretch()
-        
+
+        self._att_mode = QComboBox()
+        self._att_mode.setObjectName("formCombo")
+        self._att_mode.addItems(["Daily Logs", "Monthly Summary"])
+        self._att_mode.setMinimumHeight(36)
+        self._att_mode.currentIndexChanged.connect(self._on_att_mode_changed)
+        hdr.addWidget(self._att_mode)
+
         from ui.shared.modern_calendar import apply_modern_calendar
-        self._att_date = QDateEdit()
-        self._att_date.setObjectName("formCombo")
-        apply_modern_calendar(self._att_date)
-        self._att_date.setDate(QDate.currentDate())
-        self._att_date.setMinimumHeight(38)
-        self._att_date.setFixedWidth(130)
-        self._att_date.setDisplayFormat("M/d/yyyy")
-        self._att_date.dateChanged.connect(lambda: self._filter_attendance())
-        
-        hdr.addWidget(self._att_date)
+        self._att_from = QDateEdit()
+        self._att_until = QDateEdit()
+        for w in (self._att_from, self._att_until):
+            w.setObjectName("formCombo")
+            apply_modern_calendar(w)
+            w.setDate(QDate.currentDate())
+            w.setMinimumHeight(38)
+            w.setFixedWidth(130)
+            w.setDisplayFormat("M/d/yyyy")
+            w.dateChanged.connect(lambda _: self._load_attendance())
+        hdr.addWidget(self._att_from)
+        self._att_to_lbl = QLabel("to")
+        hdr.addWidget(self._att_to_lbl)
+        hdr.addWidget(self._att_until)
+
+        self._att_role = QComboBox()
+        self._att_role.setObjectName("formCombo")
+        self._att_role.addItems(["All Roles", "Doctor", "Nurse", "Receptionist", "Admin", "HR", "Finance"])
+        self._att_role.setMinimumHeight(36)
+        self._att_role.currentIndexChanged.connect(lambda _: self._load_attendance())
+        hdr.addWidget(self._att_role)
+
+        self._att_status = QComboBox()
+        self._att_status.setObjectName("formCombo")
+        self._att_status.addItems(["All Status", "Present", "Late", "Half-day", "Absent"])
+        self._att_status.setMinimumHeight(36)
+        self._att_status.currentIndexChanged.connect(lambda _: self._load_attendance())
+        hdr.addWidget(self._att_status)
 
         self._att_search = QLineEdit()
         self._att_search.setPlaceholderText("Search employee...")
         self._att_search.setMinimumHeight(32)
         self._att_search.setFixedWidth(200)
-        self._att_search.textChanged.connect(lambda txt: self._filter_attendance())
+        # Debounced: every keystroke would otherwise be a query
+        self._att_search_timer = QTimer(self)
+        self._att_search_timer.setSingleShot(True)
+        self._att_search_timer.setInterval(300)
+        self._att_search_timer.timeout.connect(self._load_attendance)
+        self._att_search.textChanged.connect(lambda _: self._att_search_timer.start())
+        hdr.addWidget(self._att_search)
         c_lay.addLayout(hdr)
 
         self._attendance_table = make_read_only_table(
             ["#", "Employee", "Role", "Date", "In", "Out", "Status", "Notes"],
             min_h=300, row_h=44)
         c_lay.addWidget(self._attendance_table)
+
+        self._att_summary_table = make_read_only_table(
+            ["Employee", "Role", "Present", "Late", "Half-day", "Absent",
+             "Worked Days", "Net Hours"],
+            min_h=300, row_h=44)
+        self._att_summary_table.setVisible(False)
+        c_lay.addWidget(self._att_summary_table)
+
+        foot = QHBoxLayout()
+        self._att_info = QLabel()
+        self._att_info.setObjectName("mutedSummary")
+        foot.addWidget(self._att_info)
+        foot.addStretch()
+        self._att_more_btn = QPushButton("Load more")
+        self._att_more_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        self._att_more_btn.setMinimumHeight(36)
+        self._att_more_btn.setStyleSheet(TAB_INACTIVE)
+        self._att_more_btn.clicked.connect(self._on_att_load_more)
+        self._att_more_btn.setVisible(False)
+        foot.addWidget(self._att_more_btn)
+        c_lay.addLayout(foot)
+
+        self._att_rows: list[dict] = []
+        self._att_cursor = None
         lay.addWidget(card)
         lay.addStretch()
         return inner
 
+    def _att_filters(self) -> dict:
+        role = self._att_role.currentText()
+        status = self._att_status.currentText()
+        return {
+            "role_name": None if role == "All Roles" else role,
+            "status": None if status == "All Status" else status,
+            "search": self._att_search.text().strip() or None,
+        }
+
+    def _on_att_mode_changed(self, _=None):
+        summary = self._att_mode.currentIndex() == 1
+        # Summary mode covers the month of the "from" date
+        for w in (self._att_to_lbl, self._att_until, self._att_status, self._attendance_table):
+            w.setVisible(not summary)
+        self._att_summary_table.setVisible(summary)
+        self._att_from.setDisplayFormat("MMMM yyyy" if summary else "M/d/yyyy")
+        self._load_attendance()
+
     def _load_attendance(self):
         if not self._backend or not hasattr(self, "_attendance_table"):
             return
-        rows = self._backend.get_all_attendance() or []
-        self._att_all_rows = rows
-        self._filter_attendance()
+        if self._att_mode.currentIndex() == 1:
+            self._load_attendance_summary()
+            return
+        page = self._fetch_attendance_page(None)
+        self._att_rows = page["rows"]
+        self._att_cursor = page["next_cursor"]
+        self._populate_attendance_table(self._att_rows)
+
+    def _fetch_attendance_page(self, cursor) -> dict:
+        from_d = self._att_from.date().toPyDate()
+        until_d = self._att_until.date().toPyDate()
+        if until_d < from_d:
+            from_d, until_d = until_d, from_d
+        return self._backend.get_attendance_window(
+            date_from=from_d, date_to=until_d, cursor=cursor, **self._att_filters())
+
+    def _on_att_load_more(self):
+        if not self._att_cursor or not self._backend:
+            return
+        page = self._fetch_attendance_page(self._att_cursor)
+        self._att_rows.extend(page["rows"])
+        self._att_cursor = page["next_cursor"]
+        self._populate_attendance_table(self._att_rows)
 
     def _populate_attendance_table(self, rows):
         self._attendance_table.setRowCount(0)
@@ -316,7 +410,7 @@ class HREmployeesPage(QWidget):
             self._attendance_table.setItem(r, 3, QTableWidgetItem(str(row.get("record_date", ""))))
             self._attendance_table.setItem(r, 4, QTableWidgetItem(str(row.get("time_in", ""))))
             self._attendance_table.setItem(r, 5, QTableWidgetItem(str(row.get("time_out", ""))))
-            
+
             status = row.get("status", "")
             item = QTableWidgetItem(status)
             item.setForeground(Qt.GlobalColor.white)
@@ -325,24 +419,33 @@ class HREmployeesPage(QWidget):
             elif status == "Late": item.setBackground(QColor("#F39C12"))
             else: item.setBackground(QColor("#95A5A6"))
             self._attendance_table.setItem(r, 6, item)
-            
-            self._attendance_table.setItem(r, 7, QTableWidgetItem(row.get("notes", "")))
 
-    def _filter_attendance(self, *_):
-        if not hasattr(self, "_att_all_rows"): return
-        text = self._att_search.text()
-        needle = text.strip().lower()
-        target_date = self._att_date.date().toString("yyyy-MM-dd")
-
-        filtered_rows = []
-        for r in self._att_all_rows:
-            d = (r.get("employee_name", "") + " " + r.get("role_name", "")).lower()
-            date_match = target_date in str(r.get("record_date", "") or r.get("clock_in_time", ""))
-            
-            if needle in d and date_match:
-                filtered_rows.append(r)
-                
-        self._populate_attendance_table(filtered_rows)
+            self._attendance_table.setItem(r, 7, QTableWidgetItem(row.get("notes", "")))
+        more = self._att_cursor is not None
+        self._att_more_btn.setVisible(more)
+        self._att_info.setText(
+            f"Showing {len(rows)} record{'s' if len(rows) != 1 else ''}"
+            + (" · more available" if more else ""))
+
+    def _load_attendance_summary(self):
+        filters = self._att_filters()
+        res = self._backend.get_attendance_summary(
+            self._att_from.date().toPyDate(),
+            role_name=filters["role_name"], search=filters["search"])
+        rows = res["rows"]
+        self._att_summary_table.setRowCount(0)
+        for r, row in enumerate(rows):
+            self._att_summary_table.insertRow(r)
+            values = [row["employee_name"], row["role_name"],
+                      row["full_days"] - row["late_days"], row["late_days"],
+                      row["half_days"], row["absent_days"],
+                      f"{row['worked_days']:g} / {res['workdays']}", f"{row['net_hours']:,.1f}"]
+            for c, val in enumerate(values):
+                self._att_summary_table.setItem(r, c, QTableWidgetItem(str(val)))
+        self._att_more_btn.setVisible(False)
+        self._att_info.setText(
+            f"{res['month']} · {len(rows)} employee{'s' if len(rows) != 1 else ''} · "
+            f"{res['workdays']} working days")
 
     def _build_leave_tab(self):
         inner, lay = self._make_tab_content()
@@ -831,11 +934,7 @@ class HREmployeesPage(QWidget):
             return
         self._pr_table.setSortingEnabled(False)
         filt = self._pr_status_filter.currentText()
-        all_reqs = self._backend.get_all_paycheck_requests() or []
-        if filt == "All":
-            reqs = all_reqs
-        else:
-            reqs = [r for r in all_reqs if r.get("status") == filt]
+        reqs = self._backend.get_all_paycheck_requests(None if filt == "All" else filt) or []
         self._paycheck_requests = reqs
         self._pr_table.setRowCount(0)
         for req in reqs:
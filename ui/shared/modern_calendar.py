@@ -2,6 +2,19 @@ from PyQt6.QtWidgets import QCalendarWidget
 from PyQt6.QtCore import Qt, QDate, QRect
 from PyQt6.QtGui import QColor, QPainter, QPen
 
+# Load shading for days with appointments: (max utilization, background)
+_HEAT_LEVELS = ((0.5, "#E8F6F3"), (0.85, "#FFF4E0"), (float("inf"), "#FDECEA"))
+
+
+def heat_color(day_load):
+    """Background colour for a heatmap entry, or None for an idle day."""
+    if not day_load or not day_load.get("count"):
+        return None
+    for limit, color in _HEAT_LEVELS:
+        if day_load["utilization"] <= limit:
+            return color
+
+
 class ModernCalendarWidget(QCalendarWidget):
     """
     Subclassed to provide perfect control over cell painting,
@@ -15,6 +28,25 @@ class ModernCalendarWidget(QCalendarWidget):
         self.setHorizontalHeaderFormat(QCalendarWidget.HorizontalHeaderFormat.ShortDayNames)
         self.setMinimumSize(360, 290)
         # We do NOT setNavigationBarVisible(False) because QDateEdit popup relies on the native bar.
+        self._heatmap = {}          # 'YYYY-MM-DD' -> {'count', 'capacity', 'utilization'}
+        self._heat_source = None    # callable(first_of_month) -> heatmap dict
+        self._heat_months = set()   # (year, month) already loaded
+        self.currentPageChanged.connect(self._load_heat_page)
+
+    def set_heatmap_source(self, source):
+        """Shade days by load; *source* is called once per shown month."""
+        self._heat_source = source
+        self._heatmap.clear()
+        self._heat_months.clear()
+        self._load_heat_page(self.yearShown(), self.monthShown())
+
+    def _load_heat_page(self, year, month):
+        if self._heat_source is None or (year, month) in self._heat_months:
+            return
+        self._heat_months.add((year, month))
+        from datetime import date
+        self._heatmap.update(self._heat_source(date(year, month, 1)) or {})
+        self.updateCells()
 
     def paintCell(self, painter, rect, date):
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
@@ -36,6 +68,12 @@ class ModernCalendarWidget(QCalendarWidget):
             painter.setBrush(QColor("#388087")) # Modern Teal
             painter.setPen(Qt.PenStyle.NoPen)
             painter.drawRoundedRect(highlight_rect, size // 2, size // 2)
+        elif not is_out_of_month and self._heatmap:
+            shade = heat_color(self._heatmap.get(date.toString("yyyy-MM-dd")))
+            if shade:
+                painter.setBrush(QColor(shade))
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.drawRoundedRect(highlight_rect, size // 2, size // 2)
 
         if is_selected:
             text_color = QColor("#FFFFFF")
@@ -98,11 +136,13 @@ class DayButton(QPushButton):
 
 class ContinuousCalendarWidget(QWidget):
     clicked = pyqtSignal(QDate)
+    MONTHS_SHOWN = 12
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, heatmap=None):
         super().__init__(parent)
         self.selected_date = None
         self._day_buttons = []
+        self._heatmap = heatmap or {}
         
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
@@ -152,7 +192,7 @@ class ContinuousCalendarWidget(QWidget):
         today = QDate.currentDate()
         start_date = QDate(today.year(), today.month(), 1).addMonths(-1) # 1 month ago
         
-        for i in range(12): # show 12 months ahead
+        for i in range(self.MONTHS_SHOWN): # show 12 months ahead
             m_date = start_date.addMonths(i)
             
             m_lbl = QLabel(m_date.toString("MMMM yyyy"))
@@ -177,6 +217,11 @@ class ContinuousCalendarWidget(QWidget):
                 
                 if d == QDate.currentDate():
                     btn.setStyleSheet(btn.styleSheet() + "QPushButton { color: #D9534F; font-weight: bold; font-size: 15px; }")
+                load = self._heatmap.get(d.toString("yyyy-MM-dd"))
+                shade = heat_color(load)
+                if shade:
+                    btn.setStyleSheet(btn.styleSheet() + f"QPushButton:!checked {{ background-color: {shade}; }}")
+                    btn.setToolTip(f"{load['count']} of {load['capacity']} slots booked")
                 
                 btn.clicked.connect(lambda checked, bd=d, b=btn: self.on_day_clicked(bd, b))
                 self._day_buttons.append(btn)
@@ -220,7 +265,7 @@ class ContinuousCalendarWidget(QWidget):
                 self.selected_date = date
 
 class CenteredCalendarDialog(QDialog):
-    def __init__(self, current_date=None, min_date=None, max_date=None, parent=None):
+    def __init__(self, current_date=None, min_date=None, max_date=None, parent=None, heatmap=None):
         super().__init__(parent)
         self.setWindowTitle("Select Date")
         self.setFixedSize(380, 500)
@@ -244,7 +289,7 @@ class CenteredCalendarDialog(QDialog):
         c_layout = QVBoxLayout(container)
         c_layout.setContentsMargins(6, 6, 6, 12)
         
-        self.calendar = ContinuousCalendarWidget(self)
+        self.calendar = ContinuousCalendarWidget(self, heatmap=heatmap)
         if min_date: self.calendar.setMinimumDate(min_date)
         if max_date: self.calendar.setMaximumDate(max_date)
         if current_date: self.calendar.setSelectedDate(current_date)
@@ -1,5 +1,6 @@
 # Payroll page - Finance approves paycheck requests, HR submits/disburses
 
+import threading
 from calendar import monthrange
 from datetime import date, timedelta
 
@@ -7,10 +8,10 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QTableWidget, QTableWidgetItem, QHeaderView, QScrollArea, QFrame,
     QComboBox, QDialog, QMessageBox, QTextEdit, QLineEdit, QDateEdit,
-    QFormLayout, QDialogButtonBox, QStackedWidget, QSpinBox,
+    QFormLayout, QDialogButtonBox, QStackedWidget, QSpinBox, QDoubleSpinBox, QCheckBox,
 )
-from PyQt6.QtCore import Qt, QDate, QTimer, QSize
-from PyQt6.QtGui import QColor, QFont
+from PyQt6.QtCore import Qt, QDate, QTimer, QSize, QUrl, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QDesktopServices
 from ui.styles import (
     make_page_layout, finish_page, make_banner, make_card, make_stat_card,
     make_read_only_table, make_action_table, make_table_btn, make_table_btn_danger,
@@ -21,6 +22,8 @@ from ui.icons import get_icon
 
 
 class PayrollPage(QWidget):
+    # (result of render_payroll_payslips, merged PDF path) from the render thread
+    _payslips_ready = pyqtSignal(object, str)
 
     def __init__(self, backend=None, role: str = "Finance", user_email: str = ""):
         super().__init__()
@@ -28,12 +31,14 @@ class PayrollPage(QWidget):
         self._role = role
         self._user_email = user_email
         self._requests: list[dict] = []
+        self._req_cursor = None
         self._history: list[dict] = []
         if self._role == "Doctor":
             self._build_doctor()
         else:
             self._build()
         self._load_data()
+        self._payslips_ready.connect(self._on_payslips_ready)
         self._refresh_timer = QTimer(self)
         self._refresh_timer.timeout.connect(self._load_data)
         self._refresh_timer.start(300_000)
@@ -83,15 +88,24 @@ class PayrollPage(QWidget):
         if self._role == "Doctor":
             self._load_doctor_history()
             return
+        page = self._fetch_requests_page(None)
+        self._requests = page["rows"]
+        self._req_cursor = page["next_cursor"]
+        self._populate_table()
+
+    def _fetch_requests_page(self, cursor) -> dict:
         filt = self._status_filter.currentText()
-        if filt == "Pending":
-            self._requests = self._backend.get_pending_paycheck_requests() or []
-        else:
-            all_reqs = self._backend.get_all_paycheck_requests() or []
-            if filt == "All":
-                self._requests = all_reqs
-            else:
-                self._requests = [r for r in all_reqs if r.get("status") == filt]
+        # Pending is a work queue, oldest first; everything else newest first
+        return self._backend.get_paycheck_requests_page(
+            status=None if filt == "All" else filt, cursor=cursor,
+            oldest_first=filt == "Pending")
+
+    def _on_load_more(self):
+        if not self._req_cursor or not self._backend:
+            return
+        page = self._fetch_requests_page(self._req_cursor)
+        self._requests.extend(page["rows"])
+        self._req_cursor = page["next_cursor"]
         self._populate_table()
 
     def _load_doctor_history(self):
@@ -192,7 +206,7 @@ class PayrollPage(QWidget):
             partial_card = make_card()
             partial_lay = QHBoxLayout(partial_card)
             partial_lay.setContentsMargins(16, 10, 16, 10)
-            partial_info = QLabel("Submit a prorated paycheck based on days worked in a period:")
+            partial_info = QLabel("Submit a prorated paycheck for one employee, or run payroll for a whole period:")
             partial_info.setStyleSheet("font-size: 12px; color: #555;")
             partial_lay.addWidget(partial_info)
             partial_lay.addStretch()
@@ -205,6 +219,15 @@ class PayrollPage(QWidget):
                 " QPushButton:hover { background-color: #D4A72C; }")
             partial_btn.clicked.connect(self._on_partial_request)
             partial_lay.addWidget(partial_btn)
+            run_btn = QPushButton("Run Payroll")
+            run_btn.setMinimumHeight(34)
+            run_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+            run_btn.setStyleSheet(
+                "QPushButton { background-color: #388087; color: #FFF; border: none;"
+                " border-radius: 8px; padding: 8px 20px; font-size: 12px; font-weight: bold; }"
+                " QPushButton:hover { background-color: #2C6A70; }")
+            run_btn.clicked.connect(self._on_payroll_run)
+            partial_lay.addWidget(run_btn)
             lay.addWidget(partial_card)
 
         # Filter bar
@@ -267,6 +290,17 @@ class PayrollPage(QWidget):
         self._table = make_action_table(cols, min_h=400, row_h=48, action_col_width=280)
         lay.addWidget(self._table)
 
+        more_row = QHBoxLayout()
+        more_row.addStretch()
+        self._more_btn = QPushButton("Load more")
+        self._more_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        self._more_btn.setMinimumHeight(36)
+        self._more_btn.setStyleSheet(TAB_INACTIVE)
+        self._more_btn.clicked.connect(self._on_load_more)
+        self._more_btn.setVisible(False)
+        more_row.addWidget(self._more_btn)
+        lay.addLayout(more_row)
+
         # ── Employee Paycheck History Section ─────────────────────
         hist_card = make_card()
         hist_lay = QVBoxLayout(hist_card)
@@ -384,7 +418,10 @@ class PayrollPage(QWidget):
                 self._table.setCellWidget(r, 11, make_action_cell(*parts))
 
         total = len(self._requests)
-        self._summary.setText(f"Showing {total} request{'s' if total != 1 else ''}")
+        more = self._req_cursor is not None
+        self._more_btn.setVisible(more)
+        self._summary.setText(f"Showing {total} request{'s' if total != 1 else ''}"
+                              + (" · more available" if more else ""))
         self._apply_filters()
 
     def _apply_filters(self, _=None):
@@ -803,12 +840,66 @@ class PayrollPage(QWidget):
                 prorated = round(data["full_salary"] * data["days_worked"] / data["total_days"], 2)
                 QMessageBox.information(self, "Success",
                     f"Partial paycheck (₱{prorated:,.2f}) submitted for {data['employee_name']}.\n"
-                    f"({data['days_worked']}/{data['total_days']} days)")
+                    f"({data['days_worked']:g}/{data['total_days']} days)")
                 self._load_data()
             else:
                 err = ok if isinstance(ok, str) else ""
                 QMessageBox.warning(self, "Error", f"Failed to submit partial request.\n{err}")
 
+    # ── Batch Payroll Run ────────────────────────────────────────
+
+    def _on_payroll_run(self):
+        """HR submits paycheck requests for everyone in a pay period at once."""
+        hr_emp_id = self._backend.get_employee_id_by_email(self._user_email)
+        if not hr_emp_id:
+            QMessageBox.warning(self, "Error", "Could not determine your employee ID.")
+            return
+        dlg = _PayrollRunDialog(self, backend=self._backend)
+        if dlg.exec() != QDialog.DialogCode.Accepted:
+            return
+        data = dlg.get_data()
+        res = self._backend.create_payroll_run(
+            data["period_from"], data["period_until"], hr_emp_id,
+            department_id=data["department_id"], role_name=data["role_name"],
+            prorate=data["prorate"], filters=data["filters"])
+        if isinstance(res, dict):
+            t = res["totals"]
+            msg = (f"Payroll run #{res['run_id']} submitted {res['created']} paycheck "
+                   f"request{'s' if res['created'] != 1 else ''}.\n"
+                   f"Gross ₱{t['gross']:,.2f} · Net ₱{t['net']:,.2f}")
+            if res["skipped"]:
+                msg += f"\n{len(res['skipped'])} employee(s) skipped."
+            msg += "\n\nSave the payslips for this run as one PDF?"
+            ans = QMessageBox.question(self, "Payroll Run", msg)
+            self._load_data()
+            if ans == QMessageBox.StandardButton.Yes and res["created"]:
+                self._save_run_payslips(res["run_id"])
+        else:
+            QMessageBox.warning(self, "Error", f"Failed to run payroll.\n{res or ''}")
+
+    def _save_run_payslips(self, run_id: int):
+        from PyQt6.QtWidgets import QFileDialog
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save Payslips", f"payslips_run_{run_id}.pdf", "PDF Files (*.pdf)")
+        if not path:
+            return
+        # Rendering a whole run takes seconds; keep it off the UI thread.
+        threading.Thread(target=self._render_run_payslips, args=(run_id, path),
+                         name="carecrud-payslips", daemon=True).start()
+
+    def _render_run_payslips(self, run_id: int, path: str):
+        try:
+            res = self._backend.render_payroll_payslips(run_id, merged_path=path)
+        except Exception as e:
+            res = str(e)
+        self._payslips_ready.emit(res, path)
+
+    def _on_payslips_ready(self, res, path: str):
+        if not isinstance(res, dict):
+            QMessageBox.warning(self, "Error", f"Could not create payslips.\n\n{res}")
+            return
+        QDesktopServices.openUrl(QUrl.fromLocalFile(path))
+
 
 # ══════════════════════════════════════════════════════════════════════
 #  Paycheck Request Dialog (used by HR)
@@ -970,8 +1061,8 @@ class _PartialPaycheckDialog(QDialog):
 
         info = QLabel(
             "Submit a prorated paycheck for an employee based on the number of "
-            "days worked in a period. The system will automatically compute the "
-            "partial amount from their base salary.")
+            "days worked in a period. Days worked and working days are filled in "
+            "from the attendance records and can be adjusted before saving.")
         info.setWordWrap(True)
         info.setStyleSheet("font-size: 12px; color: #555; padding-bottom: 6px;")
         lay.addWidget(info)
@@ -1003,7 +1094,7 @@ class _PartialPaycheckDialog(QDialog):
         self._from_date.setObjectName("formCombo")
         self._from_date.setMinimumHeight(40)
         self._from_date.setDisplayFormat("M/d/yyyy")
-        self._from_date.dateChanged.connect(self._recalc)
+        self._from_date.dateChanged.connect(self._load_timesheet)
         form.addRow("Period From", self._from_date)
 
         self._until_date = QDateEdit()
@@ -1012,13 +1103,15 @@ class _PartialPaycheckDialog(QDialog):
         self._until_date.setObjectName("formCombo")
         self._until_date.setMinimumHeight(40)
         self._until_date.setDisplayFormat("M/d/yyyy")
-        self._until_date.dateChanged.connect(self._recalc)
+        self._until_date.dateChanged.connect(self._load_timesheet)
         form.addRow("Period Until", self._until_date)
 
         # Days worked / Total days
         days_row = QHBoxLayout()
-        self._days_worked = QSpinBox()
-        self._days_worked.setMinimum(1)
+        self._days_worked = QDoubleSpinBox()
+        self._days_worked.setDecimals(1)
+        self._days_worked.setSingleStep(0.5)
+        self._days_worked.setMinimum(0.5)
         self._days_worked.setMaximum(31)
         self._days_worked.setValue(15)
         self._days_worked.setMinimumHeight(40)
@@ -1037,6 +1130,12 @@ class _PartialPaycheckDialog(QDialog):
         days_row.addWidget(self._total_days)
         form.addRow("Days", days_row)
 
+        # Attendance summary for the period
+        self._timesheet_label = QLabel("—")
+        self._timesheet_label.setStyleSheet("font-size: 12px; color: #555;")
+        self._timesheet_label.setWordWrap(True)
+        form.addRow("Attendance", self._timesheet_label)
+
         # Computed amount
         self._computed_label = QLabel("—")
         self._computed_label.setStyleSheet("font-size: 14px; color: #388087; font-weight: bold;")
@@ -1067,10 +1166,11 @@ class _PartialPaycheckDialog(QDialog):
         btns.rejected.connect(self.reject)
         lay.addWidget(btns)
 
-        # Auto-fill total days from period & trigger initial calc
-        self._recalc()
+        # Auto-fill days from the first employee's attendance & trigger initial calc
         if self._emp_combo.count() > 0:
             self._on_employee_changed(0)
+        else:
+            self._recalc()
 
     def _on_employee_changed(self, _=None):
         emp_id = self._emp_combo.currentData()
@@ -1079,20 +1179,35 @@ class _PartialPaycheckDialog(QDialog):
                 if emp.get("employee_id") == emp_id:
                     self._current_salary = float(emp.get("salary", 0) or 0)
                     self._salary_label.setText(f"₱{self._current_salary:,.2f}")
-                    self._recalc()
+                    self._load_timesheet()
                     break
         else:
             self._current_salary = 0
 
-    def _recalc(self, _=None):
+    def _load_timesheet(self, _=None):
+        """Fill days worked / working days from the employee's attendance."""
+        emp_id = self._emp_combo.currentData()
         from_d = self._from_date.date().toPyDate()
         until_d = self._until_date.date().toPyDate()
-        total_days = (until_d - from_d).days + 1
-        if total_days < 1:
-            total_days = 1
-        self._total_days.blockSignals(True)
-        self._total_days.setValue(total_days)
-        self._total_days.blockSignals(False)
+        if not emp_id or not self._backend or until_d < from_d:
+            self._timesheet_label.setText("—")
+            self._recalc()
+            return
+        sheet = self._backend.get_employee_timesheet(emp_id, from_d, until_d)
+        total_days = max(sheet["workdays"], 1)
+        for box, value in ((self._total_days, total_days),
+                           (self._days_worked, max(min(sheet["worked_days"], total_days), 0.5))):
+            box.blockSignals(True)
+            box.setValue(value)
+            box.blockSignals(False)
+        self._timesheet_label.setText(
+            f"{sheet['worked_days']:g} day{'s' if sheet['worked_days'] != 1 else ''} worked "
+            f"of {sheet['workdays']} working days · {sheet['late_days']} late · "
+            f"{sheet['half_days']} half-day · {sheet['net_hours']:,.1f} h net of breaks")
+        self._recalc()
+
+    def _recalc(self, _=None):
+        total_days = max(self._total_days.value(), 1)
         if self._days_worked.value() > total_days:
             self._days_worked.blockSignals(True)
             self._days_worked.setValue(total_days)
@@ -1102,7 +1217,7 @@ class _PartialPaycheckDialog(QDialog):
         salary = getattr(self, "_current_salary", 0)
         if salary > 0 and total_days > 0:
             prorated = round(salary * self._days_worked.value() / total_days, 2)
-            self._computed_label.setText(f"₱{prorated:,.2f}  ({self._days_worked.value()}/{total_days} days)")
+            self._computed_label.setText(f"₱{prorated:,.2f}  ({self._days_worked.value():g}/{total_days} days)")
             if self._backend:
                 ded = self._backend.calculate_deductions(prorated)
                 self._net_label.setText(
@@ -1123,8 +1238,8 @@ class _PartialPaycheckDialog(QDialog):
         if self._from_date.date() > self._until_date.date():
             QMessageBox.warning(self, "Validation", "Period 'From' must be before 'Until'.")
             return
-        if self._days_worked.value() < 1:
-            QMessageBox.warning(self, "Validation", "Days worked must be at least 1.")
+        if self._days_worked.value() <= 0:
+            QMessageBox.warning(self, "Validation", "Days worked must be more than zero.")
             return
         self.accept()
 
@@ -1140,3 +1255,161 @@ class _PartialPaycheckDialog(QDialog):
             "period_from": self._from_date.date().toString("yyyy-MM-dd"),
             "period_until": self._until_date.date().toString("yyyy-MM-dd"),
         }
+
+
+# ══════════════════════════════════════════════════════════════════════
+#  Batch Payroll Run Dialog
+# ══════════════════════════════════════════════════════════════════════
+class _PayrollRunDialog(QDialog):
+    """Preview and submit paychecks for every active employee in a period."""
+
+    def __init__(self, parent=None, backend=None):
+        super().__init__(parent)
+        self.setWindowTitle("Run Payroll")
+        self.setMinimumSize(900, 620)
+        self._backend = backend
+        self._plan = None
+
+        lay = QVBoxLayout(self)
+        lay.setSpacing(14)
+        lay.setContentsMargins(24, 20, 24, 20)
+
+        info = QLabel(
+            "Creates a paycheck request for every active employee matching the "
+            "filters. Salaries are prorated by attendance over the working days "
+            "of the period unless proration is turned off. Employees who already "
+            "have a paycheck covering the period are skipped.")
+        info.setWordWrap(True)
+        info.setStyleSheet("font-size: 12px; color: #555; padding-bottom: 6px;")
+        lay.addWidget(info)
+
+        form = QFormLayout()
+        form.setSpacing(12)
+
+        from ui.shared.modern_calendar import apply_modern_calendar
+        today = QDate.currentDate()
+        self._from_date = QDateEdit()
+        apply_modern_calendar(self._from_date)
+        self._from_date.setDate(QDate(today.year(), today.month(), 1))
+        self._from_date.setObjectName("formCombo")
+        self._from_date.setMinimumHeight(40)
+        self._from_date.setDisplayFormat("M/d/yyyy")
+        form.addRow("Period From", self._from_date)
+
+        self._until_date = QDateEdit()
+        apply_modern_calendar(self._until_date)
+        self._until_date.setDate(QDate(today.year(), today.month(), today.daysInMonth()))
+        self._until_date.setObjectName("formCombo")
+        self._until_date.setMinimumHeight(40)
+        self._until_date.setDisplayFormat("M/d/yyyy")
+        form.addRow("Period Until", self._until_date)
+
+        self._dept_combo = QComboBox()
+        self._dept_combo.setObjectName("formCombo")
+        self._dept_combo.setMinimumHeight(40)
+        self._dept_combo.addItem("All Departments", None)
+        for d in (self._backend.get_all_departments() if self._backend else []) or []:
+            self._dept_combo.addItem(d["department_name"], d["department_id"])
+        form.addRow("Department", self._dept_combo)
+
+        self._role_combo = QComboBox()
+        self._role_combo.setObjectName("formCombo")
+        self._role_combo.setMinimumHeight(40)
+        self._role_combo.addItems(["All Roles", "Doctor", "Nurse", "Receptionist", "Admin", "HR", "Finance"])
+        form.addRow("Role", self._role_combo)
+
+        self._prorate = QCheckBox("Prorate by attendance")
+        self._prorate.setChecked(True)
+        form.addRow("", self._prorate)
+        lay.addLayout(form)
+
+        for w in (self._from_date, self._until_date):
+            w.dateChanged.connect(self._refresh_preview)
+        for w in (self._dept_combo, self._role_combo):
+            w.currentIndexChanged.connect(self._refresh_preview)
+        self._prorate.toggled.connect(self._refresh_preview)
+
+        self._summary = QLabel()
+        self._summary.setObjectName("mutedSummary")
+        self._summary.setWordWrap(True)
+        lay.addWidget(self._summary)
+
+        cols = ["Employee", "Role", "Department", "Days", "Gross", "SSS",
+                "PhilHealth", "Hospital", "Net Amount"]
+        self._table = make_read_only_table(cols, min_h=280, row_h=36)
+        lay.addWidget(self._table)
+
+        btns = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Save | QDialogButtonBox.StandardButton.Cancel)
+        btns.button(QDialogButtonBox.StandardButton.Save).setText("Submit Run")
+        style_dialog_btns(btns)
+        btns.accepted.connect(self._validate_and_accept)
+        btns.rejected.connect(self.reject)
+        lay.addWidget(btns)
+
+        self._refresh_preview()
+
+    def _refresh_preview(self, _=None):
+        self._table.setRowCount(0)
+        if not self._backend or self._from_date.date() > self._until_date.date():
+            self._plan = None
+            self._summary.setText("Choose a valid period.")
+            return
+        d = self.get_data()
+        self._plan = self._backend.preview_payroll_run(
+            d["period_from"], d["period_until"], department_id=d["department_id"],
+            role_name=d["role_name"], prorate=d["prorate"])
+        for line in self._plan["lines"]:
+            r = self._table.rowCount()
+            self._table.insertRow(r)
+            days = f"{line['days_worked']:g}/{line['workdays']}" if d["prorate"] else "—"
+            values = [line["employee_name"], line["role_name"], line["department_name"], days,
+                      f"₱{line['amount']:,.2f}", f"₱{line['sss_deduction']:,.2f}",
+                      f"₱{line['philhealth_deduction']:,.2f}", f"₱{line['hospital_share']:,.2f}",
+                      f"₱{line['net_amount']:,.2f}"]
+            for c, val in enumerate(values):
+                item = QTableWidgetItem(str(val))
+                if c in (4, 8):
+                    item.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
+                self._table.setItem(r, c, item)
+        t = self._plan["totals"]
+        text = (f"{t['employees']} paycheck{'s' if t['employees'] != 1 else ''} · "
+                f"Gross ₱{t['gross']:,.2f} · Deductions ₱{t['deductions']:,.2f} · "
+                f"Net ₱{t['net']:,.2f}")
+        skipped = self._plan["skipped"]
+        if skipped:
+            text += "<br>Skipped: " + ", ".join(
+                f"{s['employee_name']} ({s['reason'].lower()})" for s in skipped[:8])
+            if len(skipped) > 8:
+                text += f" and {len(skipped) - 8} more"
+        self._summary.setText(text)
+
+    def _validate_and_accept(self):
+        if self._from_date.date() > self._until_date.date():
+            QMessageBox.warning(self, "Validation", "Period 'From' must be before 'Until'.")
+            return
+        if not self._plan or not self._plan["lines"]:
+            QMessageBox.warning(self, "Validation", "There are no paychecks to submit for this period.")
+            return
+        t = self._plan["totals"]
+        reply = QMessageBox.question(
+            self, "Submit Payroll Run",
+            f"Submit {t['employees']} paycheck request{'s' if t['employees'] != 1 else ''} "
+            f"totalling ₱{t['net']:,.2f} net?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Yes:
+            self.accept()
+
+    def get_data(self) -> dict:
+        dept_id = self._dept_combo.currentData()
+        role = self._role_combo.currentText()
+        role = None if role == "All Roles" else role
+        filters = [f for f in (dept_id and self._dept_combo.currentText(), role) if f]
+        return {
+            "period_from": self._from_date.date().toString("yyyy-MM-dd"),
+            "period_until": self._until_date.date().toString("yyyy-MM-dd"),
+            "department_id": dept_id,
+            "role_name": role,
+            "prorate": self._prorate.isChecked(),
+            "filters": ", ".join(filters) or "All employees",
+        }